@@ -0,0 +1,161 @@
+import os
+import re
+import json
+from itertools import product
+from typing import Any, Dict, List, Optional, Tuple
+from .analyte_matcher import AnalyteMatcher
+from .fuzzy_alias_index import FuzzyAliasIndex
+import logging
+
+logger = logging.getLogger(__name__)
+
+CATALOG_PATH = os.path.join(os.path.dirname(__file__), "data", "analyte_catalog.json")
+
+_END = ""  # Trie key marking the end of an alias; never collides with a real character
+_WORD_END = 0  # Trie key marking the end of a short alias that must be a whole word; an int is never a character
+
+# Aliases this short ("hb", "k", "ca") occur inside other words, so unanchored matching requires word boundaries
+SHORT_ALIAS_LENGTH = 3
+_WHITESPACE = re.compile(r"\s+")
+
+def _normalize(text: str) -> str:
+    return _WHITESPACE.sub(" ", text.strip().lower())
+
+class AliasTrie:
+    def __init__(self, aliases: Dict[str, List[str]], anchored: bool = False):
+        """Prefix tree over analyte aliases, so matching cost depends on line length, not catalog size
+
+        Same contract as AnalyteMatcher: matching is case-insensitive, the analyte listed
+        first wins when several match, and `anchored` requires the whole line to be an alias.
+        Spaces inside an alias are optional, like `\\s*` in the old patterns. Unanchored,
+        an alias of up to SHORT_ALIAS_LENGTH characters only matches when no letter touches
+        it on either side, so "hb" finds "Hb 13.2" but not "HbA1c".
+        """
+        self.names = list(aliases)
+        self.anchored = anchored
+        self._root: Dict[Any, Any] = {}
+        for index, name_aliases in enumerate(aliases.values()):
+            for alias in name_aliases:
+                alias = _normalize(alias)
+                end = _WORD_END if not anchored and len(alias) <= SHORT_ALIAS_LENGTH else _END
+                for variant in self._variants(alias):
+                    node = self._root
+                    for char in variant:
+                        node = node.setdefault(char, {})
+                    node[end] = min(node.get(end, index), index)
+
+    @staticmethod
+    def _variants(alias: str) -> List[str]:
+        """Every spelling of an alias with each inner space kept or dropped"""
+        words = alias.split(" ")
+        variants = []
+        for joiners in product((" ", ""), repeat=len(words) - 1):
+            variants.append(words[0] + "".join(joiner + word for joiner, word in zip(joiners, words[1:])))
+        return variants
+
+    def match(self, text: str) -> Optional[str]:
+        """Return the highest-priority analyte matching the text, or None"""
+        index = self.match_index(text)
+        return self.names[index] if index is not None else None
+
+    def match_index(self, text: str) -> Optional[int]:
+        """Position in `names` of the highest-priority match, or None"""
+        text = _normalize(text)
+        if self.anchored:
+            node = self._root
+            for char in text:
+                node = node.get(char)
+                if node is None:
+                    return None
+            return node.get(_END)
+
+        best = None
+        for start in range(len(text)):
+            node = self._root
+            word_start = start == 0 or not text[start - 1].isalpha()
+            for position in range(start, len(text)):
+                node = node.get(text[position])
+                if node is None:
+                    break
+                index = node.get(_END)
+                if word_start and _WORD_END in node and (position + 1 == len(text) or not text[position + 1].isalpha()):
+                    index = node[_WORD_END] if index is None else min(index, node[_WORD_END])
+                if index is not None and (best is None or index < best):
+                    best = index
+                    if best == 0:
+                        return best
+        return best
+
+class AnalyteCatalog:
+    def __init__(self, data: Dict[str, Any]):
+        """In-memory indexes over the analyte catalog: alias tries, unit table and range tables"""
+        self.version = data["version"]
+        self.analytes: Dict[str, Dict[str, Any]] = data["analytes"]
+        self.names = list(self.analytes)
+        self.aliases = {name: entry["aliases"] for name, entry in self.analytes.items()}
+
+        # Substring matching for free text, whole-line matching for strict parsers
+        self.alias_trie = AliasTrie(self.aliases)
+        self.exact_alias_trie = AliasTrie(self.aliases, anchored=True)
+
+        # Units in priority order; the first listed unit wins when several match a line
+        self.units = [unit["unit"] for unit in data["units"]]
+        self.unit_matcher = AnalyteMatcher({
+            unit["unit"]: "|".join(re.escape(alias) for alias in unit["aliases"]) for unit in data["units"]
+        })
+        # Whole-token lookup for parsers that already have the unit isolated
+        self.unit_aliases: Dict[str, str] = {
+            alias.lower(): unit["unit"] for unit in data["units"] for alias in unit["aliases"] + [unit["unit"]]
+        }
+
+        self.reference_ranges: Dict[str, List[Dict[str, Any]]] = {
+            name: entry["reference_ranges"] for name, entry in self.analytes.items() if "reference_ranges" in entry
+        }
+        # Factor from each alternative unit to the analyte's own unit
+        self.conversions: Dict[str, Dict[str, float]] = {
+            name: entry["conversions"] for name, entry in self.analytes.items() if "conversions" in entry
+        }
+        self.valid_ranges: Dict[str, Tuple[float, float]] = {
+            name: tuple(entry["valid_range"]) for name, entry in self.analytes.items() if "valid_range" in entry
+        }
+        self._fuzzy_index: Optional[FuzzyAliasIndex] = None
+
+    @classmethod
+    def load(cls, path: str = CATALOG_PATH) -> "AnalyteCatalog":
+        with open(path, "r", encoding="utf-8") as f:
+            catalog = cls(json.load(f))
+        logger.info(f"Loaded analyte catalog v{catalog.version} with {len(catalog.names)} analytes")
+        return catalog
+
+    @property
+    def fuzzy_index(self) -> FuzzyAliasIndex:
+        """OCR-tolerant alias lookup, built on first use since only some parsers need it"""
+        if self._fuzzy_index is None:
+            self._fuzzy_index = FuzzyAliasIndex(self.aliases)
+        return self._fuzzy_index
+
+    def matcher(self, names: List[str], anchored: bool = False) -> AliasTrie:
+        """Alias trie over a subset of analytes, prioritized in the given order"""
+        return AliasTrie({name: self.aliases[name] for name in names}, anchored)
+
+    def display_name(self, name: str) -> str:
+        entry = self.analytes.get(name, {})
+        return entry.get("display_name", name.replace("_", " ").title())
+
+    def unit(self, name: str) -> Optional[str]:
+        """Unit the analyte's reference ranges are expressed in"""
+        return self.analytes.get(name, {}).get("unit")
+
+    def alias_pattern(self, name: str) -> str:
+        """Regex alternation of an analyte's aliases, longest first, for parsers that embed names in larger patterns"""
+        aliases = sorted(self.aliases[name], key=len, reverse=True)
+        return "|".join(r"\s*".join(re.escape(word) for word in alias.split()) for alias in aliases)
+
+_catalog: Optional[AnalyteCatalog] = None
+
+def get_catalog() -> AnalyteCatalog:
+    """Catalog shared by the whole process, loaded on first use"""
+    global _catalog
+    if _catalog is None:
+        _catalog = AnalyteCatalog.load(os.getenv("ANALYTE_CATALOG_PATH", CATALOG_PATH))
+    return _catalog
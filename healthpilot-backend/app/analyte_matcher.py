@@ -0,0 +1,42 @@
+import re
+from typing import Dict, Optional
+
+class AnalyteMatcher:
+    def __init__(self, patterns: Dict[str, str], anchored: bool = False):
+        """Classify a line against many name patterns with one compiled regex
+
+        All patterns are joined into a single case-insensitive alternation with one named group
+        per entry. When several entries match, the one listed first in `patterns` wins, the same
+        result as looping over the patterns in order. With `anchored` the whole line must match
+        a pattern; otherwise a pattern may match anywhere in the line.
+        """
+        self.names = list(patterns)
+        self.anchored = anchored
+        # Group names must be identifiers, so entries are numbered in priority order
+        groups = "|".join(f"(?P<_{i}>{pattern})" for i, pattern in enumerate(patterns.values()))
+        if anchored:
+            self._regex = re.compile(groups, re.IGNORECASE)
+        else:
+            # Zero-width lookahead reports a match at every position, so an earlier entry that
+            # overlaps a later one's match is never hidden
+            self._regex = re.compile(f"(?=(?:{groups}))", re.IGNORECASE)
+
+    def match(self, text: str) -> Optional[str]:
+        """Return the highest-priority name matching the text, or None"""
+        index = self.match_index(text)
+        return self.names[index] if index is not None else None
+
+    def match_index(self, text: str) -> Optional[int]:
+        """Position in `names` of the highest-priority match, or None"""
+        if self.anchored:
+            match = self._regex.fullmatch(text)
+            return int(match.lastgroup[1:]) if match else None
+
+        best = None
+        for match in self._regex.finditer(text):
+            index = int(match.lastgroup[1:])
+            if best is None or index < best:
+                best = index
+                if best == 0:
+                    break
+        return best
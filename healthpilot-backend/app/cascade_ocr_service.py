@@ -0,0 +1,133 @@
+import os
+import re
+from typing import Dict, Iterator, Tuple, Optional, Any
+from .pdf_page_results import assemble_pdf_result
+import logging
+
+logger = logging.getLogger(__name__)
+
+# A line that looks like a lab row: some letters followed somewhere by a number
+LAB_ROW_PATTERN = re.compile(r"[A-Za-z]{2,}.*?\d")
+
+class CascadeOCRService:
+    def __init__(self, primary: Any, fallback: Optional[Any] = None, min_confidence: Optional[float] = None,
+                 min_rows: Optional[int] = None, fallback_dpi: Optional[int] = None):
+        """Run every page through a cheap OCR engine and re-run only weak pages through a heavier one
+
+        With no fallback engine, weak pages are re-rendered at fallback_dpi and re-run
+        through the primary engine instead.
+        """
+        self.primary = primary
+        self.fallback = fallback or primary
+        self.min_confidence = min_confidence if min_confidence is not None else float(os.getenv("OCR_CASCADE_MIN_CONFIDENCE", "0.75"))
+        self.min_rows = min_rows if min_rows is not None else int(os.getenv("OCR_CASCADE_MIN_ROWS", "1"))
+        self.fallback_dpi = fallback_dpi or int(os.getenv("OCR_CASCADE_FALLBACK_DPI", "300"))
+        self.rasterizer = primary.rasterizer
+
+    def close(self):
+        """Release the engines' worker pools"""
+        for engine in {id(self.primary): self.primary, id(self.fallback): self.fallback}.values():
+            if hasattr(engine, "close"):
+                engine.close()
+
+    def cache_signature(self, preprocess: Optional[bool] = None) -> Dict:
+        """Engine and settings that affect OCR output, used to key cached results"""
+        return {
+            "engine": "cascade",
+            "primary": self.primary.cache_signature(preprocess),
+            "fallback": self.fallback.cache_signature(preprocess) if self.fallback is not self.primary else None,
+            "min_confidence": self.min_confidence,
+            "min_rows": self.min_rows,
+            "fallback_dpi": self.fallback_dpi
+        }
+
+    def count_lab_rows(self, page_result: Dict) -> int:
+        """Cheap parse-yield estimate: lines that look like a test name with a value
+
+        Both engines report one entry per printed row in `lines`, so scoring those
+        compares pages on the same structure whichever engine produced them.
+        """
+        lines = page_result.get("lines")
+        if lines is None:
+            lines = page_result.get("text", "").split('\n')
+        return sum(1 for line in lines if LAB_ROW_PATTERN.search(line))
+
+    def is_weak(self, page_result: Dict) -> bool:
+        """Check whether a page result is worth re-running through the heavy path"""
+        if not page_result["success"]:
+            return True
+        return (page_result.get("average_confidence", 0) < self.min_confidence or
+                self.count_lab_rows(page_result) < self.min_rows)
+
+    def _pick_better(self, first: Dict, second: Dict) -> Tuple[Dict, bool]:
+        """Prefer the result with more lab rows, then higher confidence; returns (result, second_won)"""
+        if not second["success"]:
+            return first, False
+        if not first["success"]:
+            return second, True
+        first_score = (self.count_lab_rows(first), first.get("average_confidence", 0))
+        second_score = (self.count_lab_rows(second), second.get("average_confidence", 0))
+        return (second, True) if second_score > first_score else (first, False)
+
+    def extract_text_from_image(self, image_path: str, preprocess: Optional[bool] = None) -> Dict:
+        """OCR an image file with the cheap engine, escalating if the result is weak"""
+        result = self.primary.extract_text_from_image(image_path, preprocess)
+        if not self.is_weak(result) or self.fallback is self.primary:
+            return result
+
+        logger.info(f"Primary OCR weak for {image_path}, retrying with fallback engine")
+        result, _ = self._pick_better(result, self.fallback.extract_text_from_image(image_path, preprocess))
+        return result
+
+    def extract_text_from_pdf(self, pdf_path: str, preprocess: Optional[bool] = None) -> Dict:
+        """Extract text from PDF, escalating only the pages the cheap engine struggled with"""
+        try:
+            logger.info(f"Starting cascade PDF processing for: {pdf_path}")
+            page_count = self.rasterizer.get_page_count(pdf_path)
+            logger.info(f"PDF has {page_count} pages")
+
+            result = assemble_pdf_result(self.iter_page_results(pdf_path, page_count, preprocess), page_count)
+            escalated = sum(1 for page in result["page_sources"] if page["source"] == "ocr_fallback")
+            logger.info(f"Cascade escalated {escalated}/{page_count} pages")
+            return result
+
+        except Exception as e:
+            logger.error(f"PDF processing failed for {pdf_path}: {e}")
+            return {
+                "text": "",
+                "pages": 0,
+                "average_confidence": 0,
+                "success": False,
+                "error": str(e)
+            }
+
+    def iter_page_results(self, pdf_path: str, page_count: int, preprocess: Optional[bool] = None) -> Iterator[Tuple[int, Dict, str]]:
+        """Yield primary page results, swapping in the heavy result for weak OCR pages"""
+        for page_number, page_result, source in self.primary.iter_page_results(pdf_path, page_count, preprocess):
+            if source != "ocr" or not self.is_weak(page_result):
+                yield page_number, page_result, source
+                continue
+
+            logger.info(f"Page {page_number} weak (confidence {page_result.get('average_confidence', 0):.2f}), escalating")
+            retry = self._rerun_page(pdf_path, page_number, preprocess)
+            best, escalated = self._pick_better(page_result, retry)
+            yield page_number, best, "ocr_fallback" if escalated else source
+
+    def _rerun_page(self, pdf_path: str, page_number: int, preprocess: Optional[bool] = None) -> Dict:
+        """Render one page at the fallback DPI and OCR it with the fallback engine"""
+        for _, image in self.rasterizer.iter_pages(pdf_path, pages=[page_number], dpi=self.fallback_dpi):
+            try:
+                return self.fallback.extract_text_from_image_data(image, preprocess)
+            finally:
+                image.close()
+        return {"text": "", "success": False, "error": f"Page {page_number} could not be rendered"}
+
+    def process_file(self, file_path: str, preprocess: Optional[bool] = None) -> Dict:
+        """Process any file (PDF, image, or text) and extract text"""
+        file_ext = os.path.splitext(file_path)[1].lower()
+
+        if file_ext == '.pdf':
+            return self.extract_text_from_pdf(file_path, preprocess)
+        elif file_ext in ['.png', '.jpg', '.jpeg', '.tiff', '.bmp']:
+            return self.extract_text_from_image(file_path, preprocess)
+        return self.primary.process_file(file_path)
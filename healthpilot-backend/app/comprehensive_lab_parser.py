@@ -1,115 +1,62 @@
 import re
 from typing import List, Dict, Any, Optional
+from .analyte_catalog import get_catalog
+from .lab_result import LabResult
 import logging
 
 logger = logging.getLogger(__name__)
 
 class ComprehensiveLabParser:
     def __init__(self):
-        # Known abnormal values from the lab report
-        self.known_results = {
-            "urate": {
-                "value": 590,
-                "unit": "umol/L",
-                "flag": "HI",
-                "reference_range": "230-480",
-                "classification": "HIGH"
-            },
-            "triglycerides": {
-                "value": 1.98,
-                "unit": "mmol/L",
-                "flag": "HI",
-                "reference_range": "<1.00",
-                "classification": "HIGH"
-            },
-            "total_cholesterol": {
-                "value": 5.20,
-                "unit": "mmol/L",
-                "flag": "HI",
-                "reference_range": "<4.40",
-                "classification": "HIGH"
-            },
-            "hdl": {
-                "value": 0.95,
-                "unit": "mmol/L",
-                "flag": "LO",
-                "reference_range": ">1.20",
-                "classification": "LOW"
-            },
-            "ldl": {
-                "value": 3.43,
-                "unit": "mmol/L",
-                "flag": "HI",
-                "reference_range": "<2.80",
-                "classification": "HIGH"
-            },
-            "non_hdl_cholesterol": {
-                "value": 4.25,
-                "unit": "mmol/L",
-                "flag": "HI",
-                "reference_range": "<3.10",
-                "classification": "HIGH"
-            }
-        }
+        self.catalog = get_catalog()
+        
+        # Generic "<name>: <value> <unit>" patterns, with test names taken from the catalog aliases;
+        # a name must start a word and not follow "non" (so "Non HDL" is not read as HDL)
+        self.generic_patterns = [
+            (re.compile(rf"(?<![a-z])(?<!non[\s-])(?:{self.catalog.alias_pattern(test_name)})[:\s]+(\d+\.?\d*)\s*({units})", re.IGNORECASE), test_name)
+            for test_name, units in [
+                ("glucose", "mg/dl|mmol/l"),
+                ("hemoglobin", "g/dl"),
+                ("total_cholesterol", "mg/dl|mmol/l"),
+                ("hdl", "mg/dl|mmol/l"),
+                ("ldl", "mg/dl|mmol/l"),
+                ("triglycerides", "mg/dl|mmol/l"),
+            ]
+        ]
     
     def parse_lab_results(self, text: str) -> List[Dict[str, Any]]:
-        """Parse OCR text and extract known lab results"""
-        results = []
-        
-        # Check if the text contains indicators of the specific lab report
-        if "Urate HI 590" in text or "triglyceride" in text.lower():
-            # This is the known lab report, return the known results
-            for test_name, result_data in self.known_results.items():
-                results.append({
-                    "test_name": test_name,
-                    "original_name": test_name.replace("_", " ").title(),
-                    "value": result_data["value"],
-                    "unit": result_data["unit"],
-                    "flag": result_data["flag"],
-                    "reference_range": result_data["reference_range"],
-                    "classification": result_data["classification"],
-                    "line": f"{test_name.replace('_', ' ').title()}: {result_data['value']} {result_data['unit']} ({result_data['flag']})"
-                })
-        else:
-            # For other lab reports, use a more generic approach
-            results = self._parse_generic_results(text)
+        """Results of parse_records as JSON-ready dicts"""
+        return [result.to_dict() for result in self.parse_records(text)]
+    
+    def parse_records(self, text: str) -> List[LabResult]:
+        """Parse OCR text with the generic patterns; known vendor layouts are handled by TemplateRegistry"""
+        results = self._parse_generic_results(text)
         
         logger.info(f"Parsed {len(results)} lab results from text")
         return results
     
-    def _parse_generic_results(self, text: str) -> List[Dict[str, Any]]:
+    def _parse_generic_results(self, text: str) -> List[LabResult]:
         """Parse generic lab results for other formats"""
         results = []
         lines = text.split('\n')
         
         # Look for common patterns
-        patterns = [
-            (r"glucose[:\s]+(\d+\.?\d*)\s*(mg/dl|mmol/l)", "glucose"),
-            (r"hemoglobin[:\s]+(\d+\.?\d*)\s*(g/dl)", "hemoglobin"),
-            (r"cholesterol[:\s]+(\d+\.?\d*)\s*(mg/dl|mmol/l)", "total_cholesterol"),
-            (r"hdl[:\s]+(\d+\.?\d*)\s*(mg/dl|mmol/l)", "hdl"),
-            (r"ldl[:\s]+(\d+\.?\d*)\s*(mg/dl|mmol/l)", "ldl"),
-            (r"triglycerides?[:\s]+(\d+\.?\d*)\s*(mg/dl|mmol/l)", "triglycerides"),
-        ]
-        
-        for pattern, test_name in patterns:
+        for pattern, test_name in self.generic_patterns:
             for line in lines:
-                match = re.search(pattern, line, re.IGNORECASE)
+                match = pattern.search(line)
                 if match:
                     try:
                         value = float(match.group(1))
                         unit = match.group(2)
                         
-                        results.append({
-                            "test_name": test_name,
-                            "original_name": test_name.replace("_", " ").title(),
-                            "value": value,
-                            "unit": unit,
-                            "flag": "",
-                            "reference_range": "",
-                            "classification": "UNKNOWN",
-                            "line": line
-                        })
+                        results.append(LabResult(
+                            test_name=test_name,
+                            original_name=self.catalog.display_name(test_name),
+                            value=value,
+                            unit=unit,
+                            classification="UNKNOWN",
+                            line=line
+                        ))
                     except (ValueError, IndexError):
                         continue
         
@@ -0,0 +1,100 @@
+import re
+from itertools import combinations
+from typing import Dict, List, Optional, Set, Tuple
+
+_WHITESPACE = re.compile(r"\s+")
+
+def _normalize(text: str) -> str:
+    # Spacing is unreliable in OCR output, so it's ignored entirely
+    return _WHITESPACE.sub("", text.lower())
+
+def edit_distance(a: str, b: str, max_distance: int) -> int:
+    """Optimal string alignment distance (edits plus adjacent swaps), or max_distance + 1 if larger"""
+    if abs(len(a) - len(b)) > max_distance:
+        return max_distance + 1
+    previous_previous = None
+    previous = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                current[j] = min(current[j], previous_previous[j - 2] + 1)
+        if min(current) > max_distance:
+            return max_distance + 1
+        previous_previous, previous = previous, current
+    return previous[-1]
+
+class FuzzyAliasIndex:
+    def __init__(self, aliases: Dict[str, List[str]], max_distance: int = 2):
+        """SymSpell-style deletion index for looking up analyte names garbled by OCR
+
+        Every alias is stored under each string reachable by deleting up to its allowed number
+        of characters. A query only generates its own deletions and looks them up, so lookup
+        cost depends on the query length, not on how many aliases the catalog has. Short
+        aliases allow fewer edits, so "k" or "na" never match arbitrary words.
+        """
+        self.names = list(aliases)
+        self.max_distance = max_distance
+        self._deletes: Dict[str, Set[Tuple[str, int]]] = {}
+        raw_aliases = [alias for name_aliases in aliases.values() for alias in name_aliases]
+        lengths = [len(_normalize(alias)) for alias in raw_aliases] or [0]
+        self._min_length, self._max_length = min(lengths), max(lengths)
+        self._max_tokens = max((len(alias.split()) for alias in raw_aliases), default=0)
+        for index, name_aliases in enumerate(aliases.values()):
+            for alias in name_aliases:
+                alias = _normalize(alias)
+                for variant in self._deletions(alias, self.allowed_distance(len(alias))):
+                    self._deletes.setdefault(variant, set()).add((alias, index))
+
+    def allowed_distance(self, length: int) -> int:
+        """Edits tolerated for an alias of this length"""
+        if length <= 3:
+            return 0
+        if length <= 7:
+            return min(1, self.max_distance)
+        return self.max_distance
+
+    @staticmethod
+    def _deletions(word: str, distance: int) -> Set[str]:
+        """The word with every combination of up to `distance` characters removed"""
+        variants = {word}
+        for count in range(1, min(distance, len(word) - 1) + 1):
+            for positions in combinations(range(len(word)), count):
+                variants.add("".join(char for i, char in enumerate(word) if i not in positions))
+        return variants
+
+    def lookup(self, text: str) -> Optional[Tuple[str, float]]:
+        """Closest analyte within the allowed edit distance, as (name, score in (0, 1]), or None
+
+        Ties on distance go to the analyte listed first in the catalog.
+        """
+        # Sentences and table rows can't be an alias however garbled; reject them before
+        # paying for deletions (OCR may split one word in two, hence the extra token)
+        if len(text.split()) > self._max_tokens + 1:
+            return None
+        query = _normalize(text)
+        if not query or not (self._min_length - self.max_distance <= len(query) <= self._max_length + self.max_distance):
+            return None
+
+        # An alias within its allowed distance never needs more query deletions than the
+        # query's own length allows, since allowed_distance grows with length
+        candidates: Set[Tuple[str, int]] = set()
+        for variant in self._deletions(query, self.allowed_distance(len(query))):
+            candidates.update(self._deletes.get(variant, ()))
+
+        best = None
+        for alias, index in candidates:
+            allowed = self.allowed_distance(len(alias))
+            distance = edit_distance(query, alias, allowed)
+            if distance > allowed:
+                continue
+            if best is None or (distance, index) < best[:2]:
+                best = (distance, index, alias)
+
+        if best is None:
+            return None
+        distance, index, alias = best
+        score = 1 - distance / max(len(query), len(alias))
+        return self.names[index], round(score, 4)
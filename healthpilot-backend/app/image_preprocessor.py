@@ -0,0 +1,101 @@
+import time
+from typing import Dict, Tuple, Union, Sequence
+import numpy as np
+from PIL import Image
+
+class ImagePreprocessor:
+    STEPS = ("grayscale", "binarize", "deskew", "crop")
+
+    def __init__(self, steps: Sequence[str] = STEPS, window: int = 31, offset: float = 10,
+                 max_skew: float = 5.0, skew_step: float = 0.25, margin: int = 10):
+        """NumPy page clean-up applied before OCR: grayscale, adaptive binarization, deskew and border crop"""
+        unknown = set(steps) - set(self.STEPS)
+        if unknown:
+            raise ValueError(f"Unknown preprocessing steps: {sorted(unknown)}")
+        # Always run in pipeline order; grayscale is required since later steps work on one channel
+        self.steps = ["grayscale"] + [step for step in self.STEPS[1:] if step in steps]
+        self.window = window | 1  # Local threshold window must be odd
+        self.offset = offset
+        self.max_skew = max_skew
+        self.skew_step = skew_step
+        self.margin = margin
+
+    def process(self, image: Union[Image.Image, np.ndarray]) -> Tuple[np.ndarray, Dict[str, float]]:
+        """Run the enabled steps, returning a uint8 grayscale page and per-step timings in ms"""
+        timings = {}
+        for step in self.steps:
+            start = time.perf_counter()
+            if step == "grayscale":
+                pixels = self._to_gray(image)
+            elif step == "binarize":
+                pixels = self.binarize(pixels)
+            elif step == "deskew":
+                pixels = self.deskew(pixels)
+            elif step == "crop":
+                pixels = self.crop_borders(pixels)
+            timings[step] = round((time.perf_counter() - start) * 1000, 2)
+        return pixels, timings
+
+    def _to_gray(self, image: Union[Image.Image, np.ndarray]) -> np.ndarray:
+        if isinstance(image, Image.Image):
+            return np.asarray(image.convert('L'), dtype=np.uint8)
+        if image.ndim == 3:
+            # ITU-R 601 luma weights, same as PIL's 'L' conversion
+            return (image[..., :3] @ np.array([0.299, 0.587, 0.114])).astype(np.uint8)
+        return image.astype(np.uint8, copy=False)
+
+    def binarize(self, gray: np.ndarray) -> np.ndarray:
+        """Adaptive mean threshold: a pixel is ink if it's darker than its neighbourhood mean minus offset"""
+        half = self.window // 2
+        padded = np.pad(gray.astype(np.float64), half + 1, mode='edge')
+
+        # Summed-area table gives every window sum with four lookups
+        table = padded.cumsum(axis=0).cumsum(axis=1)
+        h, w = gray.shape
+        w_size = self.window
+        sums = (table[w_size:w_size + h, w_size:w_size + w] - table[:h, w_size:w_size + w]
+                - table[w_size:w_size + h, :w] + table[:h, :w])
+        means = sums / (w_size * w_size)
+
+        return np.where(gray < means - self.offset, 0, 255).astype(np.uint8)
+
+    def estimate_skew(self, pixels: np.ndarray, max_points: int = 20000) -> float:
+        """Estimate text skew in degrees using the projection profile of ink pixels"""
+        ys, xs = np.nonzero(pixels < 128)
+        if ys.size < 100:
+            return 0.0
+        if ys.size > max_points:
+            # A strided sample is plenty for a histogram and keeps this step fast
+            stride = ys.size // max_points + 1
+            ys, xs = ys[::stride], xs[::stride]
+
+        angles = np.deg2rad(np.arange(-self.max_skew, self.max_skew + self.skew_step / 2, self.skew_step))
+        # Project every ink pixel onto the row axis of each candidate rotation at once
+        projected = np.outer(np.cos(angles), ys) - np.outer(np.sin(angles), xs)
+        projected = np.round(projected - projected.min(axis=1, keepdims=True)).astype(np.int64)
+
+        # Straight text rows give the spikiest row histogram
+        scores = [np.square(np.bincount(row)).sum() for row in projected]
+        return float(np.rad2deg(angles[int(np.argmax(scores))]))
+
+    def deskew(self, pixels: np.ndarray) -> np.ndarray:
+        angle = self.estimate_skew(pixels)
+        if abs(angle) < self.skew_step:
+            return pixels
+        # PIL rotates counter-clockwise, which undoes a negative measured skew
+        rotated = Image.fromarray(pixels).rotate(angle, resample=Image.Resampling.BILINEAR,
+                                                 expand=True, fillcolor=255)
+        return np.asarray(rotated, dtype=np.uint8)
+
+    def crop_borders(self, pixels: np.ndarray) -> np.ndarray:
+        """Crop to the bounding box of the ink plus a small margin"""
+        ink = pixels < 128
+        rows = np.flatnonzero(ink.any(axis=1))
+        cols = np.flatnonzero(ink.any(axis=0))
+        if rows.size == 0 or cols.size == 0:
+            return pixels
+        top = max(0, rows[0] - self.margin)
+        bottom = min(pixels.shape[0], rows[-1] + self.margin + 1)
+        left = max(0, cols[0] - self.margin)
+        right = min(pixels.shape[1], cols[-1] + self.margin + 1)
+        return pixels[top:bottom, left:right]
@@ -1,82 +1,34 @@
 import re
 from typing import List, Dict, Any, Optional, Tuple
+from .analyte_catalog import get_catalog
+from .line_features import LineFeatureIndex
+from .lab_result import LabResult
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Aliases, units and validation ranges come from the shared analyte catalog, indexed once at import
+CATALOG = get_catalog()
+TEST_MATCHER = CATALOG.exact_alias_trie  # Test names must match the whole line
+FUZZY_MATCHER = CATALOG.fuzzy_index  # Fallback for names garbled by OCR, e.g. "Hemog1obin"
+UNIT_MATCHER = CATALOG.unit_matcher
+
+# Lines that can't be a bare test name: "Label: value" pairs and lines with a standalone
+# number. Digits within a word ("Hemog1obin", "5odium", "B12") are OCR slips and still go fuzzy.
+NOT_A_NAME = re.compile(r":|(?<!\S)[<>]?\d[\d.,]*(?!\S)")
+
 class IntelligentLabParser:
     def __init__(self):
-        # Common lab test names with more specific patterns
-        self.test_patterns = {
-            "hemoglobin": r"^hemoglobin$|^hgb$|^hb$",
-            "hematocrit": r"^hematocrit$|^hct$",
-            "white_blood_cells": r"^white\s*blood\s*cells$|^wbc$|^leukocytes$",
-            "platelets": r"^platelets$|^plt$",
-            "red_blood_cells": r"^red\s*blood\s*cells$|^rbc$",
-            "glucose": r"^glucose$|^glu$",
-            "creatinine": r"^creatinine$|^creat$",
-            "bun": r"^bun$|^blood\s*urea\s*nitrogen$",
-            "sodium": r"^sodium$|^na$",
-            "potassium": r"^potassium$|^k$",
-            "chloride": r"^chloride$|^cl$",
-            "co2": r"^co2$|^bicarbonate$|^hco3$",
-            "calcium": r"^calcium$|^ca$",
-            "total_protein": r"^total\s*protein$|^tp$",
-            "albumin": r"^albumin$|^alb$",
-            "total_bilirubin": r"^total\s*bilirubin$|^tbil$",
-            "alkaline_phosphatase": r"^alkaline\s*phosphatase$|^alp$",
-            "alt": r"^alt$|^alanine\s*aminotransferase$",
-            "ast": r"^ast$|^aspartate\s*aminotransferase$",
-            "total_cholesterol": r"^cholesterol$",
-            "hdl": r"^hdl\s*cholesterol$|^hdl$",
-            "ldl": r"^ldl\s*cholesterol$|^ldl$",
-            "triglycerides": r"^triglyceride$|^triglycerides$|^trig$",
-            "hba1c": r"^hba1c$|^a1c$|^glycated\s*hemoglobin$",
-            "tsh": r"^tsh$|^thyroid\s*stimulating\s*hormone$",
-            "t4": r"^t4$|^thyroxine$|^free\s*t4$",
-            "t3": r"^t3$|^triiodothyronine$|^free\s*t3$",
-            "urate": r"^urate$|^uric\s*acid$",
-            "creatine_kinase": r"^creatine\s*kinase$|^ck$",
-            "non_hdl_cholesterol": r"^non\s*hdl\s*cholesterol$|^non\s*hdl$"
-        }
-        
-        # Unit patterns
-        self.unit_patterns = {
-            "g/dL": r"g/dl|g/dL",
-            "mg/dL": r"mg/dl|mg/dL",
-            "mEq/L": r"meq/l|mEq/L",
-            "U/L": r"u/l|U/L",
-            "K/uL": r"k/ul|K/uL",
-            "M/uL": r"m/ul|M/uL",
-            "%": r"%|percent",
-            "mIU/L": r"miu/l|mIU/L",
-            "ng/dL": r"ng/dl|ng/dL",
-            "mmol/L": r"mmol/l|mmol/L",
-            "umol/L": r"umol/l|umol/L",
-            "pmol/L": r"pmol/l|pmol/L"
-        }
+        self.catalog = CATALOG
         
         # Valid value ranges for common tests (for validation)
-        self.valid_ranges = {
-            "glucose": (50, 500),  # mg/dL
-            "hemoglobin": (5, 25),  # g/dL
-            "sodium": (120, 160),   # mEq/L
-            "potassium": (2, 8),    # mEq/L
-            "chloride": (90, 120),  # mEq/L
-            "creatinine": (0.5, 15), # mg/dL
-            "total_cholesterol": (100, 600), # mg/dL
-            "hdl": (20, 100),       # mg/dL
-            "ldl": (50, 300),       # mg/dL
-            "triglycerides": (30, 1000), # mg/dL
-            "urate": (2, 15),       # mg/dL
-            "alt": (5, 200),        # U/L
-            "ast": (5, 200),        # U/L
-            "tsh": (0.1, 20),       # mIU/L
-            "t4": (0.5, 4),         # ng/dL
-            "t3": (0.5, 4),         # ng/dL
-        }
+        self.valid_ranges = CATALOG.valid_ranges
     
     def parse_lab_results(self, text: str) -> List[Dict[str, Any]]:
+        """Results of parse_records as JSON-ready dicts"""
+        return [result.to_dict() for result in self.parse_records(text)]
+    
+    def parse_records(self, text: str) -> List[LabResult]:
         """Parse OCR text and extract lab results using intelligent pattern matching"""
         results = []
         lines = text.split('\n')
@@ -84,23 +36,31 @@ class IntelligentLabParser:
         # Step 1: Find test names and their positions
         test_positions = self._find_test_positions(lines)
         
+        # Tag every line's values, units and ranges once so the lookups below are index reads
+        features = LineFeatureIndex(lines, UNIT_MATCHER, self._extract_value_from_line)
+        
         # Step 2: For each test, find associated values with validation
         for test_info in test_positions:
-            value_info = self._find_test_value_with_validation(lines, test_info)
+            value_info = self._find_test_value_with_validation(features, test_info)
             if value_info:
-                results.append({
-                    "test_name": test_info['test_name'],
-                    "original_name": test_info['original_name'],
-                    "value": value_info['value'],
-                    "unit": value_info['unit'],
-                    "flag": value_info['flag'],
-                    "reference_range": value_info['reference_range'],
-                    "line": test_info['line'] + " -> " + value_info['line']
-                })
+                results.append(self._build_result(test_info, value_info))
         
         logger.info(f"Parsed {len(results)} lab results from text")
         return results
     
+    def _build_result(self, test_info: Dict[str, Any], value_info: Dict[str, Any]) -> LabResult:
+        return LabResult(
+            test_name=test_info['test_name'],
+            original_name=test_info['original_name'],
+            value=value_info['value'],
+            unit=value_info['unit'],
+            flag=value_info['flag'],
+            reference_range=value_info['reference_range'],
+            match_score=test_info['match_score'],
+            line=test_info['line'],
+            value_line=value_info['line']
+        )
+    
     def _find_test_positions(self, lines: List[str]) -> List[Dict[str, Any]]:
         """Find test names using strict matching"""
         test_positions = []
@@ -110,49 +70,51 @@ class IntelligentLabParser:
             if not line:
                 continue
             
-            # Use strict matching for test names
-            for test_name, pattern in self.test_patterns.items():
-                if re.search(pattern, line, re.IGNORECASE):
-                    test_positions.append({
-                        'line_index': i,
-                        'test_name': test_name,
-                        'original_name': line,
-                        'line': line
-                    })
-                    break
+            test_match = self._match_test_name(line)
+            if test_match:
+                test_name, match_score = test_match
+                test_positions.append({
+                    'line_index': i,
+                    'test_name': test_name,
+                    'original_name': line,
+                    'line': line,
+                    'match_score': match_score
+                })
         
         return test_positions
     
-    def _find_test_value_with_validation(self, lines: List[str], test_info: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    def _match_test_name(self, line: str) -> Optional[Tuple[str, float]]:
+        """(test name, match score) if the line names a test, else None"""
+        # Use strict matching for test names, then a bounded-edit-distance lookup
+        test_name = TEST_MATCHER.match(line)
+        if test_name:
+            return test_name, 1.0
+        if NOT_A_NAME.search(line):
+            return None
+        return FUZZY_MATCHER.lookup(line)
+    
+    def _find_test_value_with_validation(self, features: LineFeatureIndex, test_info: Dict[str, Any]) -> Optional[Dict[str, Any]]:
         """Find and validate test values"""
         line_index = test_info['line_index']
         test_name = test_info['test_name']
         
-        # Look in a window around the test name
-        start_idx = max(0, line_index - 3)
-        end_idx = min(len(lines), line_index + 10)
-        
-        for i in range(start_idx, end_idx):
-            line = lines[i].strip()
-            if not line:
-                continue
+        # Lines with a value in a window around the test name
+        for i in features.value_lines(line_index - 3, line_index + 10):
+            value_info = features.value_at(i)
             
-            # Try to extract value from this line
-            value_info = self._extract_value_from_line(line)
-            if value_info:
-                # Validate the value
-                if self._validate_value(test_name, value_info['value']):
-                    # Look for units and reference ranges
-                    unit = self._find_unit_in_context(lines, i)
-                    reference_range = self._find_reference_range_in_context(lines, i)
-                    
-                    return {
-                        'value': value_info['value'],
-                        'unit': unit,
-                        'flag': value_info['flag'],
-                        'reference_range': reference_range,
-                        'line': line
-                    }
+            # Validate the value
+            if self._validate_value(test_name, value_info['value']):
+                # Look for units and reference ranges
+                unit = self._find_unit_in_context(features, i)
+                reference_range = self._find_reference_range_in_context(features, i)
+                
+                return {
+                    'value': value_info['value'],
+                    'unit': unit,
+                    'flag': value_info['flag'],
+                    'reference_range': reference_range,
+                    'line': features.lines[i]
+                }
         
         return None
     
@@ -206,47 +168,11 @@ class IntelligentLabParser:
         # For tests without defined ranges, use general validation
         return 0 < value < 10000  # Reasonable range for most lab values
     
-    def _find_unit_in_context(self, lines: List[str], value_line_index: int) -> str:
+    def _find_unit_in_context(self, features: LineFeatureIndex, value_line_index: int) -> str:
         """Find unit in the same line or nearby lines"""
-        # Look in the same line first
-        line = lines[value_line_index]
-        for unit, pattern in self.unit_patterns.items():
-            if re.search(pattern, line, re.IGNORECASE):
-                return unit
-        
-        # Look in nearby lines
-        for i in range(max(0, value_line_index - 2), min(len(lines), value_line_index + 3)):
-            line = lines[i].strip()
-            if not line:
-                continue
-            for unit, pattern in self.unit_patterns.items():
-                if re.search(pattern, line, re.IGNORECASE):
-                    return unit
-        
-        return ""
+        # Look in the same line first, then nearby lines
+        return features.unit_at(value_line_index) or features.first_unit(value_line_index - 2, value_line_index + 3)
     
-    def _find_reference_range_in_context(self, lines: List[str], value_line_index: int) -> str:
+    def _find_reference_range_in_context(self, features: LineFeatureIndex, value_line_index: int) -> str:
         """Find reference range in nearby lines"""
-        for i in range(max(0, value_line_index - 3), min(len(lines), value_line_index + 5)):
-            line = lines[i].strip()
-            if not line:
-                continue
-            
-            # Look for various reference range patterns
-            patterns = [
-                r"([\d.-]+)\s*[-–]\s*([\d.-]+)",  # "230-480"
-                r"Desired:\s*([<>]\s*[\d.]+)",     # "Desired: <4.40"
-                r"Reference:\s*([\d.-]+)",         # "Reference: 230-480"
-                r"Normal:\s*([\d.-]+)",           # "Normal: 230-480"
-                r"Range:\s*([\d.-]+)"             # "Range: 230-480"
-            ]
-            
-            for pattern in patterns:
-                match = re.search(pattern, line, re.IGNORECASE)
-                if match:
-                    if len(match.groups()) == 2:
-                        return f"{match.group(1)}-{match.group(2)}"
-                    else:
-                        return match.group(1)
-        
-        return "" 
\ No newline at end of file
+        return features.first_range(value_line_index - 3, value_line_index + 5)
\ No newline at end of file
@@ -1,10 +1,8 @@
 import time
 from datetime import datetime
+from typing import Optional
 from dotenv import load_dotenv
-from .tesseract_ocr_service import TesseractOCRService
-from .upload_service import UploadService
-from .analysis_engine import AnalysisEngine
-from .database import DatabaseService  # Add this import
+from .service_registry import registry
 import logging
 
 # Load environment variables
@@ -26,10 +24,14 @@ def process_upload_job(file_path):
         "timestamp": datetime.now().isoformat()
     }
 
-def process_lab_report_job(file_path: str, report_id: str):
-    """Process uploaded lab report with OCR and analysis"""
-    upload_service = UploadService()
-    db_service = DatabaseService()
+def process_lab_report_job(file_path: str, report_id: str, preprocess: Optional[bool] = None):
+    """Process uploaded lab report with OCR and analysis
+
+    `preprocess` switches image clean-up before OCR for this job; None uses the worker default.
+    """
+    # Services are created once per worker process and reused across jobs
+    upload_service = registry.get_upload_service()
+    db_service = registry.get_db_service()
     
     try:
         # Check if file exists at start
@@ -37,15 +39,25 @@ def process_lab_report_job(file_path: str, report_id: str):
         logger.info(f"Job started for file: {file_path}")
         logger.info(f"File exists at start: {os.path.exists(file_path)}")
         
-        # Initialize services
-        ocr_service = TesseractOCRService()
-        analysis_engine = AnalysisEngine()
+        ocr_service = registry.get_ocr_service()
+        analysis_engine = registry.get_analysis_engine()
+        ocr_cache = registry.get_ocr_cache()
         
         # Check file exists before OCR
         logger.info(f"File exists before OCR: {os.path.exists(file_path)}")
         
-        # Extract text from file
-        ocr_result = ocr_service.process_file(file_path)
+        # Reuse OCR output for files we've already seen with the same engine settings
+        cache_key = ocr_cache.make_key(file_path, ocr_service.cache_signature(preprocess)) if ocr_cache.enabled else None
+        ocr_result = ocr_cache.get(cache_key) if cache_key else None
+        ocr_cache_hit = ocr_result is not None
+        
+        if ocr_cache_hit:
+            logger.info(f"OCR cache hit for {file_path}, skipping OCR")
+        else:
+            # Extract text from file
+            ocr_result = ocr_service.process_file(file_path, preprocess=preprocess)
+            if cache_key:
+                ocr_cache.set(cache_key, ocr_result)
         logger.info(f"OCR completed. Success: {ocr_result['success']}, Text length: {len(ocr_result.get('text', ''))}")
         
         if not ocr_result["success"]:
@@ -60,8 +72,14 @@ def process_lab_report_job(file_path: str, report_id: str):
             }
         
         # Analyze the lab results
-        analysis_result = analysis_engine.analyze_lab_report(ocr_result["text"])
+        # Text-layer pages carry no word boxes, so the layout only describes the whole document when every page was OCR'd
+        ocr_layout = ocr_result.get("layout")
+        if any(page["source"] == "text_layer" for page in ocr_result.get("page_sources", [])):
+            ocr_layout = None
+        analysis_result = analysis_engine.analyze_lab_report(ocr_result["text"], ocr_layout=ocr_layout)
         logger.info(f"Analysis completed. Success: {analysis_result.get('success', False)}")
+        template_stats = analysis_engine.templates.stats()
+        logger.info(f"Lab template hit rate: {template_stats['template_hit_rate']:.1%} over {template_stats['lookups']} reports so far")
         
         # Save analysis result to database
         analysis = db_service.save_analysis_result(report_id, ocr_result, analysis_result)
@@ -80,7 +98,12 @@ def process_lab_report_job(file_path: str, report_id: str):
             "extracted_text": ocr_result["text"],
             "confidence": ocr_result.get("average_confidence", 0),
             "pages": ocr_result.get("pages", 1),
+            "page_sources": ocr_result.get("page_sources", []),
+            "skipped_pages": ocr_result.get("skipped_pages", []),
+            "ocr_cache_hit": ocr_cache_hit,
+            "ocr_quality": ocr_result["layout"].quality_stats() if "layout" in ocr_result else None,
             "analysis": analysis_result,
+            "lab_templates": template_stats,
             "timestamp": datetime.now().isoformat()
         }
         
@@ -89,9 +112,14 @@ def process_lab_report_job(file_path: str, report_id: str):
         logger.error(f"Job failed with exception: {str(e)}")
         upload_service.cleanup_temp_file(file_path)
         logger.error(f"Job failed: {str(e)}")
+        
+        # Rebuild any service that broke so the next job starts clean
+        registry.health_check(repair=True)
         return {
             "status": "failed",
             "error": str(e),
             "file_path": file_path,
             "timestamp": datetime.now().isoformat()
-        }
\ No newline at end of file
+        }
+    finally:
+        registry.record_job()
\ No newline at end of file
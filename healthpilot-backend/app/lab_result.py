@@ -0,0 +1,67 @@
+from dataclasses import dataclass, fields
+from typing import Any, Dict, Optional
+
+@dataclass(slots=True)
+class LabResult:
+    """One lab value, carried as the same object from parsing through classification
+
+    Converted with `to_dict()` only where results leave the engine (API responses and the
+    database). Optional fields still None are left out, so each parser keeps its JSON shape.
+    """
+    test_name: str
+    original_name: str
+    value: float
+    unit: str = ""
+    flag: str = ""
+    reference_range: Optional[str] = ""
+    classification: Optional[str] = None
+    match_score: Optional[float] = None
+    line: str = ""
+    value_line: Optional[str] = None  # Line the value came from, when it differs from `line`
+    status: Optional[str] = None
+    interpretation: Optional[str] = None
+    extras: Optional[Dict[str, Any]] = None  # Parser-specific fields, e.g. page or agreed_parsers
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = {
+            "test_name": self.test_name,
+            "original_name": self.original_name,
+            "value": self.value,
+            "unit": self.unit,
+            "flag": self.flag,
+            "reference_range": self.reference_range
+        }
+        if self.classification is not None:
+            data["classification"] = self.classification
+        if self.match_score is not None:
+            data["match_score"] = self.match_score
+        data["line"] = f"{self.line} -> {self.value_line}" if self.value_line is not None else self.line
+        if self.extras:
+            data.update(self.extras)
+        if self.status is not None:
+            data["status"] = self.status
+        if self.interpretation is not None:
+            data["interpretation"] = self.interpretation
+        return data
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "LabResult":
+        """Rebuild a record from to_dict output, e.g. the results stored with an analysis"""
+        line, _, value_line = data.get("line", "").partition(" -> ")
+        known = {field.name for field in fields(cls)}
+        extras = {key: value for key, value in data.items() if key not in known}
+        return cls(
+            test_name=data["test_name"],
+            original_name=data.get("original_name", data["test_name"]),
+            value=data["value"],
+            unit=data.get("unit", ""),
+            flag=data.get("flag", ""),
+            reference_range=data.get("reference_range", ""),
+            classification=data.get("classification"),
+            match_score=data.get("match_score"),
+            line=line,
+            value_line=value_line or None,
+            status=data.get("status"),
+            interpretation=data.get("interpretation"),
+            extras=extras or None
+        )
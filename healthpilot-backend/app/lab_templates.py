@@ -0,0 +1,281 @@
+import os
+import re
+import json
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+from .analyte_catalog import get_catalog
+from .unit_converter import get_unit_converter
+from .layout_lab_parser import FLAG_CLASSIFICATIONS
+from .lab_result import LabResult
+import logging
+
+logger = logging.getLogger(__name__)
+
+TEMPLATES_PATH = os.path.join(os.path.dirname(__file__), "data", "lab_templates.json")
+
+# Optional HI/LO flag then the value; a number that starts a range ("230-480") or follows a comparator is not a value
+DEFAULT_VALUE_PATTERN = r"(?<![\w.<>])(?:(HI|LO)\s+)?(\d+(?:\.\d+)?)(?![\d.]*\s*[-–]\s*\d)"
+
+TOKEN = re.compile(r"\S+")
+
+COUNTERS = ("lookups", "fingerprint_hits", "template_hits")
+
+class LocalTemplateCounters:
+    """Template counters kept in this process, cumulative while jobs run in it (WORKER_FORK=false)"""
+
+    def __init__(self):
+        self._counts = dict.fromkeys(COUNTERS, 0)
+
+    def incr(self, field: str):
+        self._counts[field] += 1
+
+    def totals(self) -> Dict[str, int]:
+        return dict(self._counts)
+
+class RedisTemplateCounters:
+    def __init__(self, redis_conn=None, key: str = "lab_templates:stats"):
+        """Template counters in a Redis hash, so totals add up across forked job processes and workers"""
+        if redis_conn is None:
+            from redis import Redis
+            redis_conn = Redis(host='localhost', port=6379, db=0)
+        self.redis = redis_conn
+        self.key = key
+
+    def incr(self, field: str):
+        self.redis.hincrby(self.key, field, 1)
+
+    def totals(self) -> Dict[str, int]:
+        counts = self.redis.hgetall(self.key)
+        return {field: int(counts.get(field.encode('utf-8'), 0)) for field in COUNTERS}
+
+def create_template_counters():
+    """Counter store selected by LAB_TEMPLATE_STATS_BACKEND (redis or local)
+
+    Forked job processes (the default WORKER_FORK=true) exit after every job, so
+    in-process counters would only ever cover one report; those default to Redis.
+    """
+    forked = os.getenv("WORKER_FORK", "true").lower() == "true"
+    backend = os.getenv("LAB_TEMPLATE_STATS_BACKEND", "redis" if forked else "local").lower()
+    return RedisTemplateCounters() if backend == "redis" else LocalTemplateCounters()
+
+class ExtractionPlan:
+    def __init__(self, template: Dict[str, Any]):
+        """A vendor template compiled for extraction: marker list plus one compiled label/value pair per row"""
+        self.id = template["id"]
+        self.description = template.get("description", "")
+        self.markers: List[str] = template["markers"]
+        self.min_rows = template.get("min_rows", 1)
+        self.rows = [
+            {
+                "test_name": row["test_name"],
+                "label": re.compile(row["label"], re.IGNORECASE),
+                "value": re.compile(row.get("value_pattern", DEFAULT_VALUE_PATTERN), re.IGNORECASE),
+                "window": row.get("window", 0),
+                "unit": row["unit"],
+                "reference_range": row.get("reference_range", "")
+            }
+            for row in template["rows"]
+        ]
+
+    def _find_value(self, row: Dict[str, Any], lines: List[str], line_index: int, label_end: int):
+        """First value after the label, on the label line or within the row's window of following lines"""
+        match = row["value"].search(lines[line_index], label_end)
+        for offset in range(1, row["window"] + 1):
+            if match or line_index + offset >= len(lines):
+                break
+            match = row["value"].search(lines[line_index + offset])
+        return match
+
+    @staticmethod
+    def _printed_unit(line: str, start: int) -> Optional[str]:
+        """First token after `start` that is a known unit, or None if the row prints no unit"""
+        converter = get_unit_converter()
+        for token in TOKEN.findall(line, start):
+            if converter.unit_index(token) >= 0:
+                return token
+        return None
+
+    def extract(self, lines: List[str], positions: Dict[int, int]) -> Tuple[Optional[List[LabResult]], Dict[int, int]]:
+        """Read every row of the plan, trying known row positions before scanning forward
+
+        Rows appear in template order, so each label search starts below the previous row
+        and the document is walked once. Returns the results and the line each row was found on,
+        or None for the results if a row prints a unit other than the template's.
+        """
+        catalog = get_catalog()
+        converter = get_unit_converter()
+        results = []
+        found: Dict[int, int] = {}
+        cursor = 0
+        for row_index, row in enumerate(self.rows):
+            line_index = positions.get(row_index)
+            label = None
+            if line_index is not None and line_index < len(lines):
+                label = row["label"].search(lines[line_index])
+            if label is None:
+                line_index = None
+                for i in range(cursor, len(lines)):
+                    label = row["label"].search(lines[i])
+                    if label:
+                        line_index = i
+                        break
+            if line_index is None:
+                continue
+
+            cursor = line_index + 1
+            match = self._find_value(row, lines, line_index, label.end())
+            if match is None:
+                continue
+            # The values are only what the template says they are if the report agrees on the unit
+            printed = self._printed_unit(match.string, match.end())
+            if printed is not None and converter.normalize_unit(printed) != converter.normalize_unit(row["unit"]):
+                logger.info(f"Template {self.id} rejected: {row['test_name']} is printed in {printed}, not {row['unit']}")
+                return None, {}
+            found[row_index] = line_index
+            flag = (match.group(1) or "").upper()
+            results.append(LabResult(
+                test_name=row["test_name"],
+                original_name=catalog.display_name(row["test_name"]),
+                value=float(match.group(2)),
+                unit=row["unit"],
+                flag=flag,
+                reference_range=row["reference_range"],
+                classification=FLAG_CLASSIFICATIONS.get(flag, "UNKNOWN"),
+                line=lines[line_index].strip()
+            ))
+        return results, found
+
+class TemplateRegistry:
+    def __init__(self, templates: List[Dict[str, Any]], header_lines: int = 60, footer_lines: int = 20,
+                 max_fingerprints: int = 1024, counters=None):
+        """Recognizes known lab-vendor layouts and parses them with a precomputed extraction plan
+
+        Template markers are vendor header and footer text, never analyte names, which any
+        report of the same panel prints. A document's fingerprint is which markers appear on
+        which of its first `header_lines` and last `footer_lines` non-empty lines, so patient
+        details don't change it but a different layout does. Fingerprints are cached with the
+        matched plan (or None for unknown layouts) and the line each row was found on, which
+        the next document with the same fingerprint tries first.
+
+        The fingerprint cache lives in this process, so it only stays warm across jobs
+        when they run in-process (WORKER_FORK=false); a forked job process starts cold.
+        Hit counters go to `counters` (in-process by default) so they can outlive it.
+        """
+        self.plans = [ExtractionPlan(template) for template in templates]
+        self.header_lines = header_lines
+        self.footer_lines = footer_lines
+        self.max_fingerprints = max_fingerprints
+
+        # One alternation over every distinct marker, one group per marker
+        self.markers = list(dict.fromkeys(marker for plan in self.plans for marker in plan.markers))
+        self._plan_markers = [{self.markers.index(marker) for marker in plan.markers} for plan in self.plans]
+        groups = "|".join(f"(?P<_{i}>{re.escape(marker)})" for i, marker in enumerate(self.markers))
+        self._marker_regex = re.compile(groups, re.IGNORECASE) if self.markers else None
+
+        self._fingerprints: "OrderedDict[Tuple, Tuple[Optional[int], Dict[int, int]]]" = OrderedDict()
+        self.counters = counters or LocalTemplateCounters()
+
+    @classmethod
+    def load(cls, path: str = TEMPLATES_PATH, counters=None) -> "TemplateRegistry":
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        registry = cls(data["templates"], counters=counters)
+        logger.info(f"Loaded {len(registry.plans)} lab templates (v{data['version']})")
+        return registry
+
+    def fingerprint(self, lines: List[str]) -> Tuple[Tuple[int, int], ...]:
+        """(marker, line number) pairs for every marker in the header and footer regions
+
+        Footer lines are numbered back from the end of the document (-1 is the last line).
+        """
+        if self._marker_regex is None:
+            return ()
+        features = []
+        text_lines = [line for line in lines if line.strip()]
+        footer_start = max(self.header_lines, len(text_lines) - self.footer_lines)
+        regions = (
+            (range(min(self.header_lines, len(text_lines))), 0),
+            (range(footer_start, len(text_lines)), len(text_lines))
+        )
+        for line_numbers, origin in regions:
+            for line_number in line_numbers:
+                for match in self._marker_regex.finditer(text_lines[line_number]):
+                    features.append((int(match.lastgroup[1:]), line_number - origin))
+        return tuple(features)
+
+    def _match_plan(self, fingerprint: Tuple[Tuple[int, int], ...]) -> Optional[int]:
+        """First template whose markers all appear in the fingerprint"""
+        present = {marker for marker, _ in fingerprint}
+        for index, markers in enumerate(self._plan_markers):
+            if markers <= present:
+                return index
+        return None
+
+    def parse(self, text: str) -> Optional[Dict[str, Any]]:
+        """Parse a document with its vendor template, or None if the layout is not recognized
+
+        Returns {"template_id", "fingerprint_cache_hit", "results"} with LabResult records.
+        """
+        self._count("lookups")
+        lines = text.split('\n')
+        fingerprint = self.fingerprint(lines)
+
+        cached = self._fingerprints.get(fingerprint)
+        if cached is not None:
+            self._count("fingerprint_hits")
+            self._fingerprints.move_to_end(fingerprint)
+            plan_index, positions = cached
+        else:
+            plan_index, positions = self._match_plan(fingerprint), {}
+
+        if plan_index is None:
+            self._remember(fingerprint, None, {})
+            return None
+
+        plan = self.plans[plan_index]
+        results, found = plan.extract(lines, positions)
+        if results is None:
+            return None
+        if len(results) < plan.min_rows:
+            logger.info(f"Template {plan.id} matched but only {len(results)} rows were extracted")
+            return None
+
+        self._count("template_hits")
+        self._remember(fingerprint, plan_index, found)
+        logger.info(f"Parsed {len(results)} lab results with template {plan.id}")
+        return {
+            "template_id": plan.id,
+            "fingerprint_cache_hit": cached is not None,
+            "results": results
+        }
+
+    def _remember(self, fingerprint: Tuple, plan_index: Optional[int], positions: Dict[int, int]):
+        self._fingerprints[fingerprint] = (plan_index, positions)
+        self._fingerprints.move_to_end(fingerprint)
+        if len(self._fingerprints) > self.max_fingerprints:
+            self._fingerprints.popitem(last=False)
+
+    def _count(self, field: str):
+        # Monitoring must never fail a parse
+        try:
+            self.counters.incr(field)
+        except Exception as e:
+            logger.warning(f"Lab template counter update failed: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        """Cumulative counters for monitoring how much traffic the templates cover"""
+        try:
+            totals = self.counters.totals()
+        except Exception as e:
+            logger.warning(f"Lab template counters unavailable: {e}")
+            totals = dict.fromkeys(COUNTERS, 0)
+        lookups = totals["lookups"]
+        return {
+            "templates": len(self.plans),
+            "lookups": lookups,
+            "template_hits": totals["template_hits"],
+            "template_hit_rate": round(totals["template_hits"] / lookups, 4) if lookups else 0.0,
+            "fingerprint_cache_hits": totals["fingerprint_hits"],
+            "fingerprint_cache_hit_rate": round(totals["fingerprint_hits"] / lookups, 4) if lookups else 0.0,
+            "cached_fingerprints": len(self._fingerprints)
+        }
@@ -0,0 +1,194 @@
+import re
+from typing import Any, Dict, List, Optional, Tuple
+import numpy as np
+from .analyte_catalog import get_catalog
+from .ocr_layout import OCRLayout
+from .lab_result import LabResult
+import logging
+
+logger = logging.getLogger(__name__)
+
+CATALOG = get_catalog()
+
+NUMBER_TOKEN = re.compile(r"\d+(?:\.\d+)?")
+RANGE_CHARS = re.compile(r"[\d.<>≤≥=–-]+")
+RANGE_TOKEN = re.compile(r"\d+(?:\.\d+)?[-–]\d+(?:\.\d+)?|[<>≤≥]=?\d+(?:\.\d+)?")
+COMPARATOR_TOKEN = re.compile(r"[<>≤≥]=?")
+DASH_TOKEN = re.compile(r"[-–]")
+FLAG_TOKENS = {"h": "HI", "hi": "HI", "high": "HI", "l": "LO", "lo": "LO", "low": "LO"}
+FLAG_CLASSIFICATIONS = {"HI": "HIGH", "LO": "LOW"}
+
+# Header words that name a table column, mapped to the field the column holds
+HEADER_ROLES = {
+    "test": "test", "tests": "test", "analyte": "test", "parameter": "test", "investigation": "test",
+    "component": "test", "result": "result", "results": "result", "value": "result", "observed": "result",
+    "flag": "flag", "flags": "flag", "unit": "unit", "units": "unit", "uom": "unit",
+    "reference": "range", "range": "range", "ref": "range", "interval": "range", "normal": "range"
+}
+
+class LayoutLabParser:
+    def __init__(self, row_tolerance: float = 0.6, cell_gap: float = 1.0):
+        """Lab table parser that works from OCR word boxes instead of flattened text
+
+        Words whose vertical centers lie within `row_tolerance` word heights of each other form
+        a row, and a horizontal gap wider than `cell_gap` word heights starts a new cell. When
+        the page has a header row (Test / Result / Units / Reference ...), each word is assigned
+        to the nearest header column; otherwise cells are read by their content.
+        """
+        self.catalog = CATALOG
+        self.unit_aliases = self.catalog.unit_aliases
+        self.row_tolerance = row_tolerance
+        self.cell_gap = cell_gap
+
+    def parse_layout(self, layout: OCRLayout) -> List[Dict[str, Any]]:
+        """Results of parse_records as JSON-ready dicts"""
+        return [result.to_dict() for result in self.parse_records(layout)]
+
+    def parse_records(self, layout: OCRLayout) -> List[LabResult]:
+        """Extract lab results from a document layout, one row at a time"""
+        results = []
+        for page_index in np.unique(layout.page_indices).tolist():
+            columns = None
+            for row in self._page_rows(layout, np.flatnonzero(layout.page_indices == page_index)):
+                cells = self._row_cells(layout, row)
+                header = self._header_columns(layout, cells)
+                if header is not None:
+                    columns = header
+                    continue
+                tokens = self._row_tokens(layout, row, columns)
+                result = self._read_row(tokens)
+                if result:
+                    result.extras = {
+                        "page": page_index + 1,
+                        "ocr_confidence": round(float(layout.confidences[row].mean()), 4)
+                    }
+                    results.append(result)
+
+        logger.info(f"Parsed {len(results)} lab results from layout")
+        return results
+
+    def _page_rows(self, layout: OCRLayout, indices: np.ndarray) -> List[np.ndarray]:
+        """Word indexes of each visual row on a page, top to bottom, words left to right"""
+        if not len(indices):
+            return []
+        boxes = layout.boxes[indices]
+        centers = boxes[:, 1] + boxes[:, 3] / 2
+        order = np.argsort(centers, kind="stable")
+        tolerance = self.row_tolerance * max(float(np.median(boxes[:, 3])), 1.0)
+        breaks = np.flatnonzero(np.diff(centers[order]) > tolerance) + 1
+
+        rows = []
+        for group in np.split(order, breaks):
+            words = indices[group]
+            rows.append(words[np.argsort(layout.boxes[words, 0], kind="stable")])
+        return rows
+
+    def _row_cells(self, layout: OCRLayout, row: np.ndarray) -> List[np.ndarray]:
+        """Split a row's words into cells wherever the horizontal gap is wider than a column gap"""
+        boxes = layout.boxes[row]
+        gaps = boxes[1:, 0] - (boxes[:-1, 0] + boxes[:-1, 2])
+        threshold = self.cell_gap * max(float(np.median(boxes[:, 3])), 1.0)
+        return np.split(row, np.flatnonzero(gaps > threshold) + 1)
+
+    def _header_columns(self, layout: OCRLayout, cells: List[np.ndarray]) -> Optional[Tuple[np.ndarray, List[str]]]:
+        """(column x centers, column roles) if this row is a table header, else None"""
+        centers, roles = [], []
+        for cell in cells:
+            first_word = layout.words[cell[0]].lower().strip(":")
+            role = HEADER_ROLES.get(first_word)
+            if role is None or role in roles:
+                continue
+            boxes = layout.boxes[cell]
+            centers.append((boxes[:, 0].min() + (boxes[:, 0] + boxes[:, 2]).max()) / 2)
+            roles.append(role)
+        # A header names at least the test, its result and one more column
+        if len(roles) < 3 or "test" not in roles or "result" not in roles:
+            return None
+        return np.asarray(centers), roles
+
+    def _row_tokens(self, layout: OCRLayout, row: np.ndarray, columns: Optional[Tuple[np.ndarray, List[str]]]) -> List[Tuple[str, Optional[str]]]:
+        """(word, column role) for each word of a row, roles only known under a header"""
+        if columns is None:
+            return [(layout.words[i], None) for i in row]
+        centers, roles = columns
+        boxes = layout.boxes[row]
+        word_centers = boxes[:, 0] + boxes[:, 2] / 2
+        nearest = np.abs(word_centers[:, None] - centers[None, :]).argmin(axis=1)
+        return [(layout.words[i], roles[column]) for i, column in zip(row.tolist(), nearest.tolist())]
+
+    def _resolve_name(self, name: str) -> Optional[Tuple[str, float]]:
+        test_name = self.catalog.exact_alias_trie.match(name)
+        if test_name:
+            return test_name, 1.0
+        return self.catalog.fuzzy_index.lookup(name)
+
+    def _read_row(self, tokens: List[Tuple[str, Optional[str]]]) -> Optional[LabResult]:
+        """Read test, result, flag, unit and range from a row's tokens in a single left-to-right pass"""
+        name_words: List[str] = []
+        value = None
+        flag = ""
+        unit = ""
+        range_parts: List[str] = []
+        i = 0
+        while i < len(tokens):
+            word, role = tokens[i]
+            text = word.strip(",;:()")
+            lower = text.lower()
+            i += 1
+            if not text:
+                continue
+
+            # Under a header the column decides; the name runs until the first non-name token otherwise
+            if role == "test" or (role is None and value is None and not flag and not range_parts
+                                  and not NUMBER_TOKEN.fullmatch(text) and not RANGE_TOKEN.fullmatch(text)
+                                  and not COMPARATOR_TOKEN.fullmatch(text) and lower not in FLAG_TOKENS
+                                  and lower not in self.unit_aliases):
+                name_words.append(word)
+                continue
+            if not name_words:
+                # Row numbers and the like before the test name
+                continue
+            if role == "range":
+                # Labels such as "Desired:" share the column with the range itself
+                if RANGE_CHARS.fullmatch(text):
+                    range_parts.append(text)
+                continue
+            if role == "unit":
+                unit = self.unit_aliases.get(lower, unit or text)
+                continue
+
+            if lower in FLAG_TOKENS:
+                flag = FLAG_TOKENS[lower]
+            elif role is None and RANGE_TOKEN.fullmatch(text):
+                range_parts.append(text)
+            elif (role is None and NUMBER_TOKEN.fullmatch(text) and i + 1 < len(tokens)
+                  and DASH_TOKEN.fullmatch(tokens[i][0]) and NUMBER_TOKEN.fullmatch(tokens[i + 1][0])):
+                # "230 - 480" split into three words
+                range_parts.append(f"{text}-{tokens[i + 1][0]}")
+                i += 2
+            elif role is None and COMPARATOR_TOKEN.fullmatch(text) and i < len(tokens) and NUMBER_TOKEN.fullmatch(tokens[i][0]):
+                range_parts.append(f"{text}{tokens[i][0]}")
+                i += 1
+            elif NUMBER_TOKEN.fullmatch(text) and value is None:
+                value = float(text)
+            elif lower in self.unit_aliases:
+                unit = self.unit_aliases[lower]
+
+        if not name_words or value is None:
+            return None
+        resolved = self._resolve_name(" ".join(name_words).rstrip(":"))
+        if resolved is None:
+            return None
+        test_name, score = resolved
+
+        return LabResult(
+            test_name=test_name,
+            original_name=self.catalog.display_name(test_name),
+            value=value,
+            unit=unit,
+            flag=flag,
+            reference_range="".join(range_parts),
+            classification=FLAG_CLASSIFICATIONS.get(flag, "UNKNOWN"),
+            match_score=score,
+            line=" ".join(word for word, _ in tokens)
+        )
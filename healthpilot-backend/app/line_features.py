@@ -0,0 +1,106 @@
+import re
+from typing import Any, Callable, Dict, Iterator, List, Optional
+import numpy as np
+from .analyte_matcher import AnalyteMatcher
+
+# Reference range expressions, tried in order
+REFERENCE_RANGE_PATTERNS = [
+    re.compile(r"([\d.-]+)\s*[-–]\s*([\d.-]+)", re.IGNORECASE),  # "230-480"
+    re.compile(r"Desired:\s*([<>]\s*[\d.]+)", re.IGNORECASE),     # "Desired: <4.40"
+    re.compile(r"Reference:\s*([\d.-]+)", re.IGNORECASE),         # "Reference: 230-480"
+    re.compile(r"Normal:\s*([\d.-]+)", re.IGNORECASE),            # "Normal: 230-480"
+    re.compile(r"Range:\s*([\d.-]+)", re.IGNORECASE)              # "Range: 230-480"
+]
+
+def extract_reference_range(line: str) -> Optional[str]:
+    """Return the first reference range expression in a line, or None"""
+    for pattern in REFERENCE_RANGE_PATTERNS:
+        match = pattern.search(line)
+        if match:
+            if len(match.groups()) == 2:
+                return f"{match.group(1)}-{match.group(2)}"
+            return match.group(1)
+    return None
+
+def _next_index(present: np.ndarray) -> np.ndarray:
+    """For each line, the index of the first line at or after it where `present` is set (len if none)"""
+    n = len(present)
+    positions = np.where(present, np.arange(n, dtype=np.int32), n).astype(np.int32)
+    # A reversed running minimum carries each hit back to the lines before it
+    return np.append(np.minimum.accumulate(positions[::-1])[::-1], np.int32(n))
+
+class LineFeatureIndex:
+    """What each line of one document contains, tagged in a single pass
+
+    Units, values, flags and reference ranges are extracted once per line and stored in
+    parallel arrays, with next-hit indexes so "first line in this window with a unit" is
+    an array read instead of a rescan of the window.
+    """
+
+    def __init__(self, lines: List[str], unit_matcher: AnalyteMatcher,
+                 value_extractor: Optional[Callable[[str], Optional[Dict[str, Any]]]] = None,
+                 range_extractor: Callable[[str], Optional[str]] = extract_reference_range):
+        self.lines = [line.strip() for line in lines]
+        n = len(self.lines)
+
+        self.unit_names = unit_matcher.names
+        self.unit_codes = np.full(n, -1, dtype=np.int16)
+        self.values = np.full(n, np.nan, dtype=np.float64)
+        self.flags: List[str] = [""] * n
+        self.ranges: List[Optional[str]] = [None] * n
+
+        for i, line in enumerate(self.lines):
+            if not line:
+                continue
+            unit_code = unit_matcher.match_index(line)
+            if unit_code is not None:
+                self.unit_codes[i] = unit_code
+            if value_extractor:
+                value_info = value_extractor(line)
+                if value_info:
+                    self.values[i] = value_info['value']
+                    self.flags[i] = value_info['flag']
+            self.ranges[i] = range_extractor(line)
+
+        self.next_unit = _next_index(self.unit_codes >= 0)
+        self.next_value = _next_index(~np.isnan(self.values))
+        self.next_range = _next_index(np.array([r is not None for r in self.ranges], dtype=bool))
+
+    def __len__(self) -> int:
+        return len(self.lines)
+
+    def _clip(self, start: int, end: int):
+        return max(0, start), min(len(self.lines), end)
+
+    def unit_at(self, index: int) -> str:
+        code = self.unit_codes[index]
+        return self.unit_names[code] if code >= 0 else ""
+
+    def first_unit(self, start: int, end: int) -> str:
+        """Unit of the first line in [start, end) that has one, or empty string"""
+        start, end = self._clip(start, end)
+        if start >= end:
+            return ""
+        hit = self.next_unit[start]
+        return self.unit_at(hit) if hit < end else ""
+
+    def first_range(self, start: int, end: int) -> str:
+        """Reference range of the first line in [start, end) that has one, or empty string"""
+        start, end = self._clip(start, end)
+        if start >= end:
+            return ""
+        hit = self.next_range[start]
+        return self.ranges[hit] if hit < end else ""
+
+    def value_lines(self, start: int, end: int) -> Iterator[int]:
+        """Indexes of lines in [start, end) that carry a value, in order"""
+        start, end = self._clip(start, end)
+        if start >= end:
+            return
+        hit = self.next_value[start]
+        while hit < end:
+            yield int(hit)
+            hit = self.next_value[hit + 1]
+
+    def value_at(self, index: int) -> Dict[str, Any]:
+        return {'value': float(self.values[index]), 'flag': self.flags[index]}
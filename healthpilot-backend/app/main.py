@@ -215,7 +215,8 @@ async def upload_file(
     file: UploadFile = File(...),
     user_id: str = Form(...),
     age: Optional[int] = Form(None),
-    sex: Optional[str] = Form(None)
+    sex: Optional[str] = Form(None),
+    preprocess: Optional[bool] = Form(None)
 ):
     """Upload a lab report file for processing"""
     try:
@@ -240,7 +241,7 @@ async def upload_file(
             raise HTTPException(status_code=500, detail="Failed to save report to database")
         
         # Enqueue processing job with report ID
-        job_result = enqueue_lab_report_job(upload_result["file_path"], report["id"])
+        job_result = enqueue_lab_report_job(upload_result["file_path"], report["id"], preprocess)
         print(f"DEBUG: Job queued: {job_result}")
         
         return {
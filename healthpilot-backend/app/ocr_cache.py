@@ -0,0 +1,196 @@
+import os
+import json
+import time
+import hashlib
+import tempfile
+from typing import Any, Dict, List, Optional, Tuple
+from .ocr_layout import OCRLayout
+import logging
+
+logger = logging.getLogger(__name__)
+
+class LocalOCRCacheBackend:
+    # Other workers on the host write to the same directory, so this process's running total
+    # undercounts; it is resynced from disk at least every this many writes
+    RESCAN_EVERY = 64
+
+    def __init__(self, cache_dir: str, max_bytes: int):
+        """Disk-backed cache shared by all workers on a host, evicting least recently used entries"""
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        os.makedirs(cache_dir, exist_ok=True)
+        self._total_bytes = sum(size for _, size, _ in self._scan())
+        self._writes_since_scan = 0
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def get(self, key: str) -> Optional[str]:
+        path = self._path(key)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                payload = f.read()
+        except FileNotFoundError:
+            return None
+
+        # Bump the modification time so eviction treats this entry as recently used;
+        # another worker may have evicted it since the read, which doesn't spoil the hit
+        try:
+            os.utime(path, None)
+        except FileNotFoundError:
+            pass
+        return payload
+
+    def set(self, key: str, payload: str):
+        path = self._path(key)
+        try:
+            previous_size = os.stat(path).st_size
+        except FileNotFoundError:
+            previous_size = 0
+
+        # Write to a temp file and rename so readers never see a partial entry
+        data = payload.encode('utf-8')
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+        # Only walk the directory when the running total says the cache may be over its bound
+        self._total_bytes += len(data) - previous_size
+        self._writes_since_scan += 1
+        if self._total_bytes > self.max_bytes or self._writes_since_scan >= self.RESCAN_EVERY:
+            self._evict()
+
+    def _scan(self) -> List[Tuple[float, int, str]]:
+        """(mtime, size, path) of every cache entry"""
+        entries = []
+        for entry in os.scandir(self.cache_dir):
+            if entry.is_file() and entry.name.endswith(".json"):
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue  # Evicted by another worker mid-scan
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+        return entries
+
+    def _evict(self):
+        """Remove the oldest entries until the cache fits within max_bytes"""
+        entries = self._scan()
+        total = sum(size for _, size, _ in entries)
+        self._writes_since_scan = 0
+
+        if total > self.max_bytes:
+            for _, size, path in sorted(entries):
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass  # Another worker evicted it first; the space is free either way
+                total -= size
+                if total <= self.max_bytes:
+                    break
+        self._total_bytes = total
+
+class RedisOCRCacheBackend:
+    def __init__(self, max_bytes: int, redis_conn=None, prefix: str = "ocr_cache"):
+        """Redis-backed cache shared across hosts, with LRU eviction bounded by total payload size"""
+        if redis_conn is None:
+            from redis import Redis
+            redis_conn = Redis(host='localhost', port=6379, db=0)
+        self.redis = redis_conn
+        self.max_bytes = max_bytes
+        self.prefix = prefix
+        self.lru_key = f"{prefix}:lru"        # sorted set: key -> last access time
+        self.sizes_key = f"{prefix}:sizes"    # hash: key -> payload size
+        self.total_key = f"{prefix}:total"    # running total of payload bytes
+
+    def get(self, key: str) -> Optional[str]:
+        payload = self.redis.get(f"{self.prefix}:{key}")
+        if payload is None:
+            return None
+        self.redis.zadd(self.lru_key, {key: time.time()})
+        return payload.decode('utf-8')
+
+    def set(self, key: str, payload: str):
+        previous_size = int(self.redis.hget(self.sizes_key, key) or 0)
+        pipe = self.redis.pipeline()
+        pipe.set(f"{self.prefix}:{key}", payload)
+        pipe.zadd(self.lru_key, {key: time.time()})
+        pipe.hset(self.sizes_key, key, len(payload))
+        pipe.incrby(self.total_key, len(payload) - previous_size)
+        pipe.execute()
+        self._evict()
+
+    def _evict(self):
+        """Remove the least recently used entries until the cache fits within max_bytes"""
+        total = int(self.redis.get(self.total_key) or 0)
+        while total > self.max_bytes:
+            oldest = self.redis.zpopmin(self.lru_key, 1)
+            if not oldest:
+                break
+            key = oldest[0][0].decode('utf-8')
+            size = int(self.redis.hget(self.sizes_key, key) or 0)
+            pipe = self.redis.pipeline()
+            pipe.delete(f"{self.prefix}:{key}")
+            pipe.hdel(self.sizes_key, key)
+            pipe.decrby(self.total_key, size)
+            pipe.execute()
+            total -= size
+
+class OCRCache:
+    def __init__(self, backend: Optional[str] = None, cache_dir: Optional[str] = None,
+                 max_mb: Optional[int] = None, redis_conn=None):
+        """Content-addressed cache of OCR results keyed by file hash and OCR settings"""
+        backend = backend or os.getenv("OCR_CACHE_BACKEND", "local")
+        max_bytes = (max_mb or int(os.getenv("OCR_CACHE_MAX_MB", "512"))) * 1024 * 1024
+
+        if backend == "redis":
+            self.backend = RedisOCRCacheBackend(max_bytes, redis_conn)
+        elif backend == "local":
+            cache_dir = cache_dir or os.getenv("OCR_CACHE_DIR", "uploads/ocr_cache")
+            self.backend = LocalOCRCacheBackend(cache_dir, max_bytes)
+        else:
+            self.backend = None  # Caching disabled
+        logger.info(f"OCR cache backend: {backend}")
+
+    @property
+    def enabled(self) -> bool:
+        return self.backend is not None
+
+    def make_key(self, file_path: str, signature: Dict[str, Any]) -> str:
+        """Build a cache key from the SHA-256 of the file bytes plus the OCR engine signature"""
+        file_hash = hashlib.sha256()
+        with open(file_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                file_hash.update(chunk)
+
+        settings = json.dumps(signature, sort_keys=True)
+        return hashlib.sha256(f"{file_hash.hexdigest()}:{settings}".encode('utf-8')).hexdigest()
+
+    def get(self, key: str) -> Optional[Dict]:
+        """Get a cached OCR result, or None on a miss"""
+        if not self.enabled:
+            return None
+        try:
+            payload = self.backend.get(key)
+            if payload is None:
+                return None
+            ocr_result = json.loads(payload)
+            if "layout" in ocr_result:
+                ocr_result["layout"] = OCRLayout.from_dict(ocr_result["layout"])
+            return ocr_result
+        except Exception as e:
+            # A broken cache should never fail the job, just cost us the OCR
+            logger.warning(f"OCR cache read failed: {e}")
+            return None
+
+    def set(self, key: str, ocr_result: Dict):
+        """Store a successful OCR result"""
+        if not self.enabled or not ocr_result.get("success"):
+            return
+        try:
+            payload = dict(ocr_result)
+            if isinstance(payload.get("layout"), OCRLayout):
+                payload["layout"] = payload["layout"].to_dict()
+            self.backend.set(key, json.dumps(payload))
+        except Exception as e:
+            logger.warning(f"OCR cache write failed: {e}")
@@ -0,0 +1,123 @@
+from typing import List, Dict, Any, Iterable, Sequence
+import numpy as np
+
+class OCRLayout:
+    """Word-level OCR output stored as parallel arrays, one entry per word
+
+    `boxes` rows are (left, top, width, height) in page pixels, `line_ids` group words
+    into OCR lines (unique across the whole document) and `page_indices` are 0-based.
+    """
+    __slots__ = ("words", "confidences", "boxes", "line_ids", "page_indices")
+
+    def __init__(self, words: Sequence[str], confidences: Iterable[float], boxes: Iterable[Sequence[int]],
+                 line_ids: Iterable[int], page_indices: Iterable[int]):
+        self.words = list(words)
+        self.confidences = np.asarray(confidences, dtype=np.float32)
+        self.boxes = np.asarray(boxes, dtype=np.int32).reshape(-1, 4)
+        self.line_ids = np.asarray(line_ids, dtype=np.int32)
+        self.page_indices = np.asarray(page_indices, dtype=np.int16)
+
+    @classmethod
+    def empty(cls) -> "OCRLayout":
+        return cls([], [], [], [], [])
+
+    @classmethod
+    def from_segments(cls, words: Sequence[str], confidences: Sequence[float],
+                      boxes: Sequence[Sequence[int]]) -> "OCRLayout":
+        """Page layout from unordered text segments, grouped into visual rows
+
+        Engines like PaddleOCR detect a test name and its value as separate boxes;
+        segments whose vertical centers sit within half a text height of a row join
+        that row, ordered left to right, so each printed row becomes one line.
+        """
+        if not len(words):
+            return cls.empty()
+        box_array = np.asarray(boxes, dtype=np.float32).reshape(-1, 4)
+        centers = box_array[:, 1] + box_array[:, 3] / 2
+        tolerance = max(float(np.median(box_array[:, 3])) / 2, 1.0)
+
+        rows: List[List[int]] = []
+        row_center = 0.0
+        for index in np.argsort(centers, kind="stable").tolist():
+            if rows and centers[index] - row_center <= tolerance:
+                rows[-1].append(index)
+            else:
+                rows.append([index])
+            row_center = float(centers[rows[-1]].mean())
+
+        order = [index for row in rows for index in sorted(row, key=lambda i: box_array[i, 0])]
+        line_ids = [line_id for line_id, row in enumerate(rows) for _ in row]
+        return cls([words[i] for i in order], [confidences[i] for i in order],
+                   [boxes[i] for i in order], line_ids, [0] * len(order))
+
+    @classmethod
+    def concat(cls, layouts: List["OCRLayout"]) -> "OCRLayout":
+        """Join page layouts into one document layout, keeping line ids unique"""
+        layouts = [layout for layout in layouts if len(layout)]
+        if not layouts:
+            return cls.empty()
+
+        line_ids = []
+        offset = 0
+        for layout in layouts:
+            line_ids.append(layout.line_ids + offset)
+            offset += int(layout.line_ids.max()) + 1
+
+        return cls(
+            [word for layout in layouts for word in layout.words],
+            np.concatenate([layout.confidences for layout in layouts]),
+            np.concatenate([layout.boxes for layout in layouts]),
+            np.concatenate(line_ids),
+            np.concatenate([layout.page_indices for layout in layouts])
+        )
+
+    def __len__(self) -> int:
+        return len(self.words)
+
+    def with_page_index(self, page_index: int) -> "OCRLayout":
+        """Copy of this layout with every word assigned to the given page"""
+        return OCRLayout(self.words, self.confidences, self.boxes, self.line_ids,
+                         np.full(len(self.words), page_index, dtype=np.int16))
+
+    def line_texts(self) -> List[str]:
+        """Text of each line in line-id order, words joined with spaces"""
+        lines: Dict[int, List[str]] = {}
+        for word, line_id in zip(self.words, self.line_ids.tolist()):
+            lines.setdefault(line_id, []).append(word)
+        return [" ".join(lines[line_id]) for line_id in sorted(lines)]
+
+    def line_confidences(self) -> List[float]:
+        """Mean word confidence of each line in line-id order"""
+        if not len(self):
+            return []
+        ids, inverse = np.unique(self.line_ids, return_inverse=True)
+        sums = np.bincount(inverse, weights=self.confidences)
+        counts = np.bincount(inverse)
+        return (sums / counts).tolist()
+
+    @property
+    def average_confidence(self) -> float:
+        return float(self.confidences.mean()) if len(self) else 0.0
+
+    def quality_stats(self, low_confidence: float = 0.6) -> Dict[str, Any]:
+        """Summary numbers for tracking OCR quality over time"""
+        return {
+            "words": len(self),
+            "lines": int(np.unique(self.line_ids).size),
+            "average_confidence": round(self.average_confidence, 4),
+            "low_confidence_ratio": round(float((self.confidences < low_confidence).mean()), 4) if len(self) else 0.0
+        }
+
+    def to_dict(self) -> Dict[str, List]:
+        """JSON-friendly form (still parallel arrays)"""
+        return {
+            "words": self.words,
+            "confidences": self.confidences.round(4).tolist(),
+            "boxes": self.boxes.tolist(),
+            "line_ids": self.line_ids.tolist(),
+            "page_indices": self.page_indices.tolist()
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, List]) -> "OCRLayout":
+        return cls(data["words"], data["confidences"], data["boxes"], data["line_ids"], data["page_indices"])
@@ -1,14 +1,16 @@
 import os
-import tempfile
-from typing import List, Dict, Optional
+from typing import Dict, Optional, Union
+import numpy as np
+import paddleocr
 from paddleocr import PaddleOCR
-from pdf2image import convert_from_path
 from PIL import Image
+from .ocr_layout import OCRLayout
+from .pdf_page_results import PDFPagePipeline
 import logging
 
 logger = logging.getLogger(__name__)
 
-class OCRService:
+class OCRService(PDFPagePipeline):
     def __init__(self):
         """Initialize PaddleOCR with English language"""
         try:
@@ -17,146 +19,102 @@ class OCRService:
         except Exception as e:
             logger.error(f"Failed to initialize PaddleOCR: {e}")
             raise
+        
+        # Pages are OCR'd in this process; one PaddleOCR model per pool process would not fit in memory
+        self._init_page_pipeline()
+    
+    def cache_signature(self, preprocess: Optional[bool] = None) -> Dict:
+        """Engine and settings that affect OCR output, used to key cached results"""
+        return {
+            "engine": "paddleocr",
+            "version": getattr(paddleocr, "__version__", "unknown"),
+            "lang": "en",
+            "angle_cls": True,
+            "dpi": self.rasterizer.dpi,
+            "text_layer": self.use_text_layer,
+            "preprocess": self.preprocess if preprocess is None else preprocess,
+            "skip_blank": self.skip_blank_pages,
+            "skip_duplicates": self.skip_duplicate_pages
+        }
     
-    def extract_text_from_image(self, image_path: str) -> Dict:
+    def extract_text_from_image(self, image_path: str, preprocess: Optional[bool] = None) -> Dict:
         """Extract text from an image file"""
+        if self._preprocessor_for(preprocess) is None:
+            return self._run_ocr(image_path, image_path)
         try:
-            result = self.ocr.ocr(image_path)
-            
-            # Extract text from OCR result
-            extracted_text = []
-            confidence_scores = []
-            
-            for line in result:
-                for word_info in line:
-                    text = word_info[1][0]  # The text
-                    confidence = word_info[1][1]  # Confidence score
-                    extracted_text.append(text)
-                    confidence_scores.append(confidence)
-            
-            return {
-                "text": " ".join(extracted_text),
-                "lines": extracted_text,
-                "confidence_scores": confidence_scores,
-                "average_confidence": sum(confidence_scores) / len(confidence_scores) if confidence_scores else 0,
-                "success": True
-            }
-            
+            image = Image.open(image_path)
         except Exception as e:
             logger.error(f"OCR failed for {image_path}: {e}")
             return {
                 "text": "",
-                "lines": [],
                 "confidence_scores": [],
                 "average_confidence": 0,
                 "success": False,
                 "error": str(e)
             }
+        with image:
+            return self.extract_text_from_image_data(image, preprocess)
     
-    def extract_text_from_pdf(self, pdf_path: str) -> Dict:
-        """Extract text from PDF by converting to images first with memory optimization"""
+    def extract_text_from_image_data(self, image: Union[Image.Image, np.ndarray], preprocess: Optional[bool] = None) -> Dict:
+        """Extract text from an in-memory PIL image or NumPy array"""
+        timings = None
+        preprocessor = self._preprocessor_for(preprocess)
+        if preprocessor is not None:
+            image, timings = preprocessor.process(image)
+        
+        if isinstance(image, Image.Image):
+            # PaddleOCR expects BGR arrays, the same layout cv2.imread produces
+            image = np.asarray(image.convert('RGB'))[:, :, ::-1]
+        elif image.ndim == 2:
+            image = np.stack([image] * 3, axis=-1)
+        result = self._run_ocr(image, "in-memory image")
+        if timings is not None:
+            result["preprocessing"] = timings
+        return result
+    
+    def _run_ocr(self, source: Union[str, np.ndarray], label: str) -> Dict:
+        """Run PaddleOCR on a file path or image array"""
         try:
-            logger.info(f"Starting PDF processing for: {pdf_path}")
-            logger.info(f"PDF file exists: {os.path.exists(pdf_path)}")
-            
-            # Convert PDF to images with lower DPI to reduce memory usage
-            logger.info("Converting PDF to images...")
-            images = convert_from_path(
-                pdf_path,
-                dpi=150,  # Lower DPI to reduce memory usage (default is 200)
-                fmt='PNG',
-                thread_count=1  # Single thread to reduce memory usage
-            )
-            logger.info(f"PDF converted to {len(images)} images")
+            result = self.ocr.ocr(source)
             
-            all_text = []
-            all_confidence_scores = []
+            # Extract text from OCR result
+            extracted_text = []
+            confidence_scores = []
+            boxes = []
             
-            for i, image in enumerate(images):
-                logger.info(f"Processing page {i+1}/{len(images)}")
-                
-                # Resize image to reduce memory usage if it's too large
-                max_size = (2000, 2000)  # Maximum dimensions
-                if image.size[0] > max_size[0] or image.size[1] > max_size[1]:
-                    image.thumbnail(max_size, Image.Resampling.LANCZOS)
-                
-                # Save image temporarily
-                with tempfile.NamedTemporaryFile(suffix='.png', delete=False) as tmp_file:
-                    image.save(tmp_file.name, 'PNG', optimize=True)
-                    tmp_path = tmp_file.name
-                
-                try:
-                    # Extract text from this page
-                    page_result = self.extract_text_from_image(tmp_path)
-                    if page_result["success"]:
-                        all_text.append(f"--- Page {i+1} ---\n{page_result['text']}")
-                        all_confidence_scores.extend(page_result["confidence_scores"])
-                        logger.info(f"Page {i+1} text extracted: {len(page_result['text'])} chars")
-                    else:
-                        logger.warning(f"Page {i+1} OCR failed: {page_result.get('error', 'Unknown error')}")
-                    
-                    # Clear image from memory
-                    image.close()
+            for line in result:
+                for word_info in line or []:
+                    text = word_info[1][0]  # The text
+                    confidence = word_info[1][1]  # Confidence score
+                    extracted_text.append(text)
+                    confidence_scores.append(confidence)
                     
-                finally:
-                    # Clean up temporary file
-                    try:
-                        os.unlink(tmp_path)
-                    except:
-                        pass
+                    # Detection polygon -> axis-aligned (left, top, width, height)
+                    xs = [point[0] for point in word_info[0]]
+                    ys = [point[1] for point in word_info[0]]
+                    boxes.append((min(xs), min(ys), max(xs) - min(xs), max(ys) - min(ys)))
             
-            final_text = "\n\n".join(all_text)
-            logger.info(f"PDF processing completed. Total text length: {len(final_text)}")
+            # Paddle detects names and values as separate segments; group them into printed rows
+            # so text and lines have the same one-row-per-line shape as Tesseract's output
+            layout = OCRLayout.from_segments(extracted_text, confidence_scores, boxes)
+            lines = layout.line_texts()
             
             return {
-                "text": final_text,
-                "pages": len(images),
-                "average_confidence": sum(all_confidence_scores) / len(all_confidence_scores) if all_confidence_scores else 0,
+                "text": "\n".join(lines),
+                "lines": lines,
+                "confidence_scores": layout.line_confidences(),
+                "average_confidence": layout.average_confidence,
+                "layout": layout,
                 "success": True
             }
             
         except Exception as e:
-            logger.error(f"PDF processing failed for {pdf_path}: {e}")
+            logger.error(f"OCR failed for {label}: {e}")
             return {
                 "text": "",
-                "pages": 0,
+                "lines": [],
+                "confidence_scores": [],
                 "average_confidence": 0,
                 "success": False,
                 "error": str(e)
             }
-    
-    def process_file(self, file_path: str) -> Dict:
-        """Process any file (PDF, image, or text) and extract text"""
-        file_ext = os.path.splitext(file_path)[1].lower()
-        
-        if file_ext == '.pdf':
-            return self.extract_text_from_pdf(file_path)
-        elif file_ext in ['.png', '.jpg', '.jpeg', '.tiff', '.bmp']:
-            return self.extract_text_from_image(file_path)
-        elif file_ext == '.txt':
-            # For text files, just read the content directly
-            try:
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    text = f.read()
-                return {
-                    "text": text,
-                    "lines": text.split('\n'),
-                    "confidence_scores": [1.0] * len(text.split('\n')),  # Perfect confidence for text files
-                    "average_confidence": 1.0,
-                    "success": True
-                }
-            except Exception as e:
-                return {
-                    "text": "",
-                    "lines": [],
-                    "confidence_scores": [],
-                    "average_confidence": 0,
-                    "success": False,
-                    "error": str(e)
-                }
-        else:
-            return {
-                "text": "",
-                "success": False,
-                "error": f"Unsupported file type: {file_ext}"
-            }
\ No newline at end of file
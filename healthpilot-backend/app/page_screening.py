@@ -0,0 +1,89 @@
+import os
+from typing import Dict, Iterator, List, Optional, Tuple
+import numpy as np
+from PIL import Image
+import logging
+
+logger = logging.getLogger(__name__)
+
+class PageScreener:
+    def __init__(self, skip_blank: bool = True, skip_duplicates: bool = True, blank_max_std: Optional[float] = None,
+                 hash_size: int = 16, max_hash_distance: int = 8, max_tile_diff: float = 0.01, tiles: int = 32):
+        """Cheap per-page check that spots near-blank pages and repeats of earlier pages in one document
+
+        A page is blank when no tile's pixel std exceeds blank_max_std, so a few lines of
+        small text still count as content. A perceptual hash (dHash) finds duplicate
+        candidates; a candidate is only skipped if no tile of the two pages differs by more
+        than max_tile_diff, so pages that share a layout but carry different values are
+        still OCR'd.
+        """
+        self.skip_blank = skip_blank
+        self.skip_duplicates = skip_duplicates
+        self.blank_max_std = blank_max_std if blank_max_std is not None else float(os.getenv("OCR_BLANK_PAGE_MAX_STD", "5.0"))
+        self.hash_size = hash_size
+        self.max_hash_distance = max_hash_distance
+        self.max_tile_diff = max_tile_diff
+        self.tiles = tiles
+        self._seen: List[Tuple[int, int, np.ndarray]] = []  # (page_number, hash, half-resolution ink mask)
+
+    def check(self, page_number: int, image: Image.Image) -> Optional[Dict]:
+        """Return skip details for a page that doesn't need OCR, or None to OCR it"""
+        gray = np.asarray(image.convert('L'))
+
+        if self.skip_blank:
+            std = float(self._tile_view(gray).std(axis=(1, 3)).max())
+            if std <= self.blank_max_std:
+                return {"reason": "blank", "pixel_std": round(std, 2)}
+
+        if self.skip_duplicates:
+            page_hash = self.perceptual_hash(gray)
+            ink = gray[::2, ::2] < 128
+            for seen_page, seen_hash, seen_ink in self._seen:
+                if bin(page_hash ^ seen_hash).count("1") <= self.max_hash_distance and self._same_ink(ink, seen_ink):
+                    return {"reason": "duplicate", "duplicate_of": seen_page}
+            self._seen.append((page_number, page_hash, ink))
+
+        return None
+
+    def perceptual_hash(self, gray: np.ndarray) -> int:
+        """Difference hash: one bit per neighbouring pixel pair of a tiny grayscale thumbnail"""
+        thumb = np.asarray(Image.fromarray(gray).resize((self.hash_size + 1, self.hash_size), Image.Resampling.BILINEAR),
+                           dtype=np.int16)
+        bits = (thumb[:, 1:] > thumb[:, :-1]).ravel()
+        return int.from_bytes(np.packbits(bits).tobytes(), "big")
+
+    def _same_ink(self, ink: np.ndarray, other: np.ndarray) -> bool:
+        """Confirm a hash match: every tile must have nearly the same ink pixels"""
+        if ink.shape != other.shape:
+            return False
+        tile_diff = self._tile_view(ink ^ other).mean(axis=(1, 3))
+        return float(tile_diff.max()) <= self.max_tile_diff
+
+    def _tile_view(self, pixels: np.ndarray) -> np.ndarray:
+        """View a page as a (rows, tile_h, cols, tile_w) grid of tiles, dropping ragged edges"""
+        h, w = pixels.shape
+        tile_h, tile_w = max(1, h // self.tiles), max(1, w // self.tiles)
+        rows, cols = h // tile_h, w // tile_w
+        return pixels[:rows * tile_h, :cols * tile_w].reshape(rows, tile_h, cols, tile_w)
+
+    def filter(self, pages: Iterator[Tuple[int, Image.Image]], skipped: Dict[int, Dict]) -> Iterator[Tuple[int, Image.Image]]:
+        """Pass through pages that need OCR, recording the others in `skipped` by page number"""
+        for page_number, image in pages:
+            skip = self.check(page_number, image)
+            if skip is None:
+                yield page_number, image
+                continue
+            logger.info(f"Skipping page {page_number}: {skip['reason']}")
+            skipped[page_number] = skip
+            image.close()
+
+def build_skipped_page_result(skip: Dict) -> Dict:
+    """Empty page result for a page that was screened out before OCR"""
+    return {
+        "text": "",
+        "lines": [],
+        "confidence_scores": [],
+        "average_confidence": 0,
+        "skipped": skip,
+        "success": True
+    }
@@ -0,0 +1,116 @@
+import os
+from dataclasses import replace
+from typing import Any, Dict, List, Optional, Set, Tuple
+from .lab_parser import LabParser
+from .flexible_lab_parser import FlexibleLabParser
+from .intelligent_lab_parser import IntelligentLabParser
+from .targeted_lab_parser import TargetedLabParser
+from .layout_lab_parser import FLAG_CLASSIFICATIONS
+from .lab_result import LabResult
+import logging
+
+logger = logging.getLogger(__name__)
+
+# How much each parser's vote counts; the strict, validating parser is trusted most
+DEFAULT_WEIGHTS = {"intelligent": 1.2, "lab": 1.0, "flexible": 0.8, "targeted": 0.6}
+
+class ParserEnsemble:
+    def __init__(self, parsers: Optional[Dict[str, Any]] = None, weights: Optional[Dict[str, float]] = None,
+                 required_tests: Optional[List[str]] = None, min_agreement: Optional[int] = None):
+        """Run several lab parsers on the same text and vote on each analyte's value
+
+        Each parser casts one vote per analyte for the first value it found, weighted by the
+        parser's weight and its match score. The value with the most weight wins. Parsers run
+        one after another, heaviest weight first, and once every required test has a winning
+        value backed by `min_agreement` parsers the remaining parsers are not run at all.
+        The parsers are pure Python and hold the GIL, so threads never ran them in parallel.
+        """
+        self.parsers = parsers or {
+            "intelligent": IntelligentLabParser(),
+            "lab": LabParser(),
+            "flexible": FlexibleLabParser(),
+            "targeted": TargetedLabParser()
+        }
+        self.weights = weights or DEFAULT_WEIGHTS
+        if required_tests is None:
+            required_tests = [t.strip() for t in os.getenv("ANALYSIS_ENSEMBLE_REQUIRED_TESTS", "").split(",") if t.strip()]
+        self.required_tests: Set[str] = set(required_tests)
+        if min_agreement is None:
+            min_agreement = int(os.getenv("ANALYSIS_ENSEMBLE_MIN_AGREEMENT", "2"))
+        self.min_agreement = min_agreement
+        # Most trusted first, so early stopping skips the parsers whose votes count least
+        order = list(self.parsers)
+        self.run_order = sorted(order, key=lambda name: (-self.weights.get(name, 1.0), order.index(name)))
+
+    def parse_lab_results(self, text: str) -> List[Dict[str, Any]]:
+        """Results of parse_records as JSON-ready dicts"""
+        return [result.to_dict() for result in self.parse_records(text)]
+
+    def parse_records(self, text: str) -> List[LabResult]:
+        """Parse OCR text with every parser and return one voted result per analyte"""
+        order = list(self.parsers)
+        # test_name -> value -> votes for that value, as (parser index, position, weight, result)
+        votes: Dict[str, Dict[float, List[Tuple[int, int, float, LabResult]]]] = {}
+        completed_weight = 0.0
+
+        for finished, name in enumerate(self.run_order, 1):
+            try:
+                results = self.parsers[name].parse_records(text)
+            except Exception as e:
+                logger.warning(f"{name} parser failed: {e}")
+                continue
+            completed_weight += self.weights.get(name, 1.0)
+            self._add_votes(votes, order.index(name), name, results)
+
+            if finished < len(self.run_order) and self._settled(votes):
+                logger.info(f"Required tests agreed after {finished} parsers, skipping {self.run_order[finished:]}")
+                break
+
+        merged = self._merge(votes, order, completed_weight)
+        logger.info(f"Ensemble parsed {len(merged)} lab results from text")
+        return merged
+
+    def _add_votes(self, votes: Dict, parser_index: int, name: str, results: List[LabResult]):
+        """Record one vote per analyte, for the first value this parser reported"""
+        seen = set()
+        for position, result in enumerate(results):
+            test_name = result.test_name
+            if test_name in seen:
+                continue
+            seen.add(test_name)
+            weight = self.weights.get(name, 1.0) * (1.0 if result.match_score is None else result.match_score)
+            value = round(float(result.value), 2)
+            votes.setdefault(test_name, {}).setdefault(value, []).append((parser_index, position, weight, result))
+
+    def _winner(self, values: Dict[float, List[Tuple]]) -> List[Tuple]:
+        """Votes for the value with the most weight; ties go to the value backed by the earliest parser"""
+        return max(values.values(), key=lambda backers: (sum(vote[2] for vote in backers), -min(vote[0] for vote in backers)))
+
+    def _settled(self, votes: Dict) -> bool:
+        if not self.required_tests:
+            return False
+        return all(
+            test_name in votes and len(self._winner(votes[test_name])) >= self.min_agreement
+            for test_name in self.required_tests
+        )
+
+    def _merge(self, votes: Dict, order: List[str], completed_weight: float) -> List[LabResult]:
+        merged = []
+        for test_name, values in votes.items():
+            backers = sorted(self._winner(values), key=lambda vote: vote[0])
+            # Fill fields the leading parser left empty from the parsers that agreed with it
+            fields = {}
+            for field in ("unit", "flag", "reference_range"):
+                if not getattr(backers[0][3], field):
+                    fields[field] = next((getattr(vote[3], field) for vote in backers if getattr(vote[3], field)), getattr(backers[0][3], field))
+            result = replace(backers[0][3], **fields)
+            result.classification = FLAG_CLASSIFICATIONS.get(result.flag, "UNKNOWN")
+            result.extras = {
+                **(result.extras or {}),
+                "agreed_parsers": [order[vote[0]] for vote in backers],
+                "confidence": round(sum(vote[2] for vote in backers) / completed_weight, 4) if completed_weight else 0.0
+            }
+            merged.append((min(vote[:2] for vote_list in values.values() for vote in vote_list), result))
+
+        merged.sort(key=lambda item: item[0])
+        return [result for _, result in merged]
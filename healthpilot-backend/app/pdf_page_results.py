@@ -0,0 +1,267 @@
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+import numpy as np
+from PIL import Image
+from .pdf_rasterizer import PDFRasterizer
+from .pdf_text_layer import PDFTextLayerExtractor
+from .image_preprocessor import ImagePreprocessor
+from .page_screening import PageScreener, build_skipped_page_result
+from .ocr_layout import OCRLayout
+import logging
+
+logger = logging.getLogger(__name__)
+
+def assemble_pdf_result(page_results: Iterable[Tuple[int, Dict, str]], page_count: int) -> Dict:
+    """Combine per-page results into a single document result
+
+    `page_results` yields (page_number, page_result, source) in page order, where source
+    records which path produced the page (text_layer, ocr, ...) or why it was skipped.
+    """
+    all_text = []
+    all_confidence_scores = []
+    page_sources = []
+    page_layouts = []
+    skipped_pages = []
+
+    for page_number, page_result, source in page_results:
+        page_source = {
+            "page": page_number,
+            "source": source,
+            "confidence": round(page_result.get("average_confidence", 0), 4)
+        }
+        if "preprocessing" in page_result:
+            page_source["preprocessing_ms"] = page_result["preprocessing"]
+        if "skipped" in page_result:
+            page_source.update({k: v for k, v in page_result["skipped"].items() if k != "reason"})
+            page_sources.append(page_source)
+            skipped_pages.append(page_number)
+            continue
+        page_sources.append(page_source)
+        if page_result["success"]:
+            all_text.append(f"--- Page {page_number} ---\n{page_result['text']}")
+            all_confidence_scores.extend(page_result["confidence_scores"])
+            if "layout" in page_result:
+                page_layouts.append(page_result["layout"].with_page_index(page_number - 1))
+            logger.info(f"Page {page_number} text extracted via {source}: {len(page_result['text'])} chars")
+        else:
+            logger.warning(f"Page {page_number} OCR failed: {page_result.get('error', 'Unknown error')}")
+
+    final_text = "\n\n".join(all_text)
+    logger.info(f"PDF processing completed. Total text length: {len(final_text)}")
+
+    return {
+        "text": final_text,
+        "pages": page_count,
+        "page_sources": page_sources,
+        "skipped_pages": skipped_pages,
+        "layout": OCRLayout.concat(page_layouts),
+        "average_confidence": sum(all_confidence_scores) / len(all_confidence_scores) if all_confidence_scores else 0,
+        "success": True
+    }
+
+class PDFPagePipeline:
+    """Document handling shared by the OCR engines: text-layer pages, page streaming and page OCR
+
+    An engine calls _init_page_pipeline() from its __init__ and supplies
+    extract_text_from_image_data() for a single page. Engines that can OCR pages in pool
+    processes also set `page_worker` to a module-level function taking (image, preprocessor).
+    """
+    page_worker: Optional[Callable[..., Dict]] = None
+    page_worker_initializer: Optional[Callable[[], None]] = None
+
+    def _init_page_pipeline(self, parallel_pages: bool = False, max_workers: Optional[int] = None):
+        # Page-parallel mode for multi-page PDFs, only for engines with a page worker
+        self.parallel_pages = parallel_pages and self.page_worker is not None
+        self.max_workers = max_workers or int(os.getenv("OCR_MAX_WORKERS", os.cpu_count() or 1))
+        # A forked RQ work-horse ends with os._exit, which would orphan a pool kept on the instance,
+        # so the page pool is only kept warm across jobs when they run in-process (WORKER_FORK=false)
+        self.keep_page_pool = os.getenv("WORKER_FORK", "true").lower() != "true"
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+        # Render pages lazily so only a few page bitmaps are in memory at once
+        self.rasterizer = PDFRasterizer(dpi=150)
+
+        # Read embedded text directly for digitally generated PDFs
+        self.use_text_layer = os.getenv("OCR_USE_TEXT_LAYER", "true").lower() == "true"
+        self.text_layer = PDFTextLayerExtractor()
+
+        # Image clean-up before OCR; jobs can switch it per call
+        self.preprocess = os.getenv("OCR_PREPROCESS", "false").lower() == "true"
+        self.preprocessor = ImagePreprocessor()
+
+        # Skip blank pages and repeats of earlier pages (cover sheets, legal footers) before OCR
+        self.skip_blank_pages = os.getenv("OCR_SKIP_BLANK_PAGES", "true").lower() == "true"
+        self.skip_duplicate_pages = os.getenv("OCR_SKIP_DUPLICATE_PAGES", "true").lower() == "true"
+
+    def extract_text_from_image_data(self, image: Union[Image.Image, np.ndarray], preprocess: Optional[bool] = None) -> Dict:
+        raise NotImplementedError
+
+    def _preprocessor_for(self, preprocess: Optional[bool]) -> Optional[ImagePreprocessor]:
+        """Resolve a per-call preprocessing switch against the service default"""
+        if preprocess is None:
+            preprocess = self.preprocess
+        return self.preprocessor if preprocess else None
+
+    def extract_text_from_pdf(self, pdf_path: str, preprocess: Optional[bool] = None) -> Dict:
+        """Extract text from PDF, reading text layers and OCR'ing the remaining pages as they are rendered"""
+        try:
+            logger.info(f"Starting PDF processing for: {pdf_path}")
+            logger.info(f"PDF file exists: {os.path.exists(pdf_path)}")
+
+            # Stream pages from the PDF instead of rendering them all up front
+            page_count = self.rasterizer.get_page_count(pdf_path)
+            logger.info(f"PDF has {page_count} pages")
+
+            return assemble_pdf_result(self.iter_page_results(pdf_path, page_count, preprocess), page_count)
+
+        except Exception as e:
+            logger.error(f"PDF processing failed for {pdf_path}: {e}")
+            return {
+                "text": "",
+                "pages": 0,
+                "average_confidence": 0,
+                "success": False,
+                "error": str(e)
+            }
+
+    def iter_page_results(self, pdf_path: str, page_count: int, preprocess: Optional[bool] = None) -> Iterator[Tuple[int, Dict, str]]:
+        """Yield (page_number, page_result, source) in page order, OCR'ing only pages without usable text"""
+        if self.use_text_layer:
+            text_pages = self.text_layer.extract_pages(pdf_path, page_count)
+        else:
+            text_pages = [None] * page_count
+
+        ocr_page_numbers = [n for n in range(1, page_count + 1) if text_pages[n - 1] is None]
+        ocr_results = None
+        skipped: Dict[int, Dict] = {}
+        if ocr_page_numbers:
+            pages = self.rasterizer.iter_pages(pdf_path, pages=ocr_page_numbers)
+            if self.skip_blank_pages or self.skip_duplicate_pages:
+                pages = PageScreener(self.skip_blank_pages, self.skip_duplicate_pages).filter(pages, skipped)
+            if self.parallel_pages and len(ocr_page_numbers) > 1:
+                ocr_results = self._ocr_pages_parallel(pages, len(ocr_page_numbers), preprocess)
+            else:
+                ocr_results = self._ocr_pages_sequential(pages, page_count, preprocess)
+
+        next_ocr = None
+        for page_number in range(1, page_count + 1):
+            text = text_pages[page_number - 1]
+            if text is not None:
+                yield page_number, self.text_layer.build_page_result(text), "text_layer"
+                continue
+
+            # OCR results arrive in page order; a gap means the page was screened out
+            if next_ocr is None:
+                next_ocr = next(ocr_results, None)
+            if next_ocr is not None and next_ocr[0] == page_number:
+                yield page_number, next_ocr[1], "ocr"
+                next_ocr = None
+            else:
+                skip = skipped[page_number]
+                yield page_number, build_skipped_page_result(skip), skip["reason"]
+
+    def _prepare_page_image(self, image: Image.Image) -> Image.Image:
+        """Resize a page image to reduce memory usage if it's too large"""
+        max_size = (2000, 2000)  # Maximum dimensions
+        if image.size[0] > max_size[0] or image.size[1] > max_size[1]:
+            image.thumbnail(max_size, Image.Resampling.LANCZOS)
+        return image
+
+    def _ocr_pages_sequential(self, pages: Iterator[Tuple[int, Image.Image]], page_count: int,
+                              preprocess: Optional[bool] = None) -> Iterator[Tuple[int, Dict]]:
+        """OCR pages one at a time in this process as they are rendered"""
+        for page_number, image in pages:
+            logger.info(f"Processing page {page_number}/{page_count}")
+            image = self._prepare_page_image(image)
+
+            # OCR straight from memory
+            yield page_number, self.extract_text_from_image_data(image, preprocess)
+
+            # Clear image from memory
+            image.close()
+
+    def _ocr_pages_parallel(self, pages: Iterator[Tuple[int, Image.Image]], page_count: int,
+                            preprocess: Optional[bool] = None) -> Iterator[Tuple[int, Dict]]:
+        """OCR pages concurrently in a process pool, yielding results in page order"""
+        workers = min(self.max_workers, page_count)
+        max_in_flight = workers * 2  # Bounds how many rendered pages wait in memory
+        preprocessor = self._preprocessor_for(preprocess)  # Runs in the pool processes too
+        logger.info(f"Processing {page_count} pages in parallel with {workers} workers")
+
+        executor = self._get_pool() if self.keep_page_pool else self._new_pool(workers)
+        pending = deque()
+        try:
+            for page_number, image in pages:
+                image = self._prepare_page_image(image)
+                pending.append((page_number, executor.submit(self.page_worker, image, preprocessor)))
+
+                # Collect the oldest page before rendering more, which keeps output in page order
+                while len(pending) >= max_in_flight:
+                    done_page, future = pending.popleft()
+                    yield done_page, future.result()
+
+            while pending:
+                done_page, future = pending.popleft()
+                yield done_page, future.result()
+        except BrokenProcessPool:
+            # A pool process died; start a fresh pool for the next job
+            self.close()
+            raise
+        finally:
+            if executor is not self._pool:
+                executor.shutdown(wait=True, cancel_futures=True)
+
+    def _new_pool(self, workers: int) -> ProcessPoolExecutor:
+        logger.info(f"Starting OCR page pool with {workers} workers")
+        return ProcessPoolExecutor(max_workers=workers, initializer=self.page_worker_initializer)
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        """Pool kept on the instance, started on the first multi-page PDF"""
+        if self._pool is None:
+            self._pool = self._new_pool(self.max_workers)
+        return self._pool
+
+    def close(self):
+        """Shut down the page pool; the next multi-page PDF starts a new one"""
+        if self._pool is not None:
+            self._pool.shutdown(wait=True, cancel_futures=True)
+            self._pool = None
+
+    def process_file(self, file_path: str, preprocess: Optional[bool] = None) -> Dict:
+        """Process any file (PDF, image, or text) and extract text"""
+        file_ext = os.path.splitext(file_path)[1].lower()
+
+        if file_ext == '.pdf':
+            return self.extract_text_from_pdf(file_path, preprocess)
+        elif file_ext in ['.png', '.jpg', '.jpeg', '.tiff', '.bmp']:
+            return self.extract_text_from_image(file_path, preprocess)
+        elif file_ext == '.txt':
+            # For text files, just read the content directly
+            try:
+                with open(file_path, 'r', encoding='utf-8') as f:
+                    text = f.read()
+                return {
+                    "text": text,
+                    "lines": text.split('\n'),
+                    "confidence_scores": [1.0] * len(text.split('\n')),  # Perfect confidence for text files
+                    "average_confidence": 1.0,
+                    "success": True
+                }
+            except Exception as e:
+                return {
+                    "text": "",
+                    "lines": [],
+                    "confidence_scores": [],
+                    "average_confidence": 0,
+                    "success": False,
+                    "error": str(e)
+                }
+        else:
+            return {
+                "text": "",
+                "success": False,
+                "error": f"Unsupported file type: {file_ext}"
+            }
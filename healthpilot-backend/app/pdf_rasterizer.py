@@ -0,0 +1,59 @@
+from typing import Iterator, Tuple, Optional, Iterable, List
+from pdf2image import convert_from_path, pdfinfo_from_path
+from PIL import Image
+import logging
+
+logger = logging.getLogger(__name__)
+
+class PDFRasterizer:
+    def __init__(self, dpi: int = 150, pages_per_batch: int = 1):
+        """Streaming PDF rasterizer that renders a small window of pages at a time"""
+        self.dpi = dpi  # Lower DPI to reduce memory usage (pdf2image default is 200)
+        self.pages_per_batch = max(1, pages_per_batch)
+
+    def get_page_count(self, pdf_path: str) -> int:
+        """Get the number of pages without rendering anything"""
+        info = pdfinfo_from_path(pdf_path)
+        return int(info["Pages"])
+
+    def iter_pages(self, pdf_path: str, pages: Optional[Iterable[int]] = None,
+                   dpi: Optional[int] = None) -> Iterator[Tuple[int, Image.Image]]:
+        """Yield (page_number, image) pairs, rendering only one window of pages at a time
+
+        Page numbers are 1-based. Peak memory is bounded by `pages_per_batch` bitmaps
+        instead of the whole document, and callers can OCR page 1 while later pages
+        are still waiting to be rendered.
+        """
+        if pages is None:
+            pages = range(1, self.get_page_count(pdf_path) + 1)
+
+        for first_page, last_page in self._page_windows(sorted(pages)):
+            images = convert_from_path(
+                pdf_path,
+                dpi=dpi or self.dpi,
+                fmt='ppm',  # Uncompressed output skips a PNG encode/decode per page
+                first_page=first_page,
+                last_page=last_page,
+                thread_count=1  # Single thread to reduce memory usage
+            )
+            logger.info(f"Rendered pages {first_page}-{last_page} of {pdf_path}")
+
+            for offset, image in enumerate(images):
+                yield first_page + offset, image
+
+            # Drop our references so the window can be freed before the next render
+            del images
+
+    def _page_windows(self, pages: List[int]) -> Iterator[Tuple[int, int]]:
+        """Group sorted page numbers into contiguous windows of at most pages_per_batch"""
+        start = None
+        end = None
+        for page in pages:
+            if start is not None and page == end + 1 and page - start < self.pages_per_batch:
+                end = page
+                continue
+            if start is not None:
+                yield start, end
+            start = end = page
+        if start is not None:
+            yield start, end
@@ -0,0 +1,61 @@
+from typing import List, Dict, Optional
+import pypdfium2 as pdfium
+import logging
+
+logger = logging.getLogger(__name__)
+
+class PDFTextLayerExtractor:
+    def __init__(self, min_chars: int = 40, min_alnum_ratio: float = 0.5):
+        """Extract embedded text from digitally generated PDFs"""
+        self.min_chars = min_chars  # Fewer visible characters than this means an image-only page
+        self.min_alnum_ratio = min_alnum_ratio  # Guards against garbled font encodings
+
+    def extract_pages(self, pdf_path: str, page_count: int) -> List[Optional[str]]:
+        """Get the text layer for each page, or None where the page has to be OCR'd"""
+        try:
+            pdf = pdfium.PdfDocument(pdf_path)
+        except Exception as e:
+            logger.warning(f"Could not read text layer from {pdf_path}: {e}")
+            return [None] * page_count
+
+        pages = []
+        try:
+            for i in range(min(len(pdf), page_count)):
+                page = pdf[i]
+                textpage = page.get_textpage()
+                try:
+                    text = textpage.get_text_range().replace('\r\n', '\n').replace('\r', '\n')
+                finally:
+                    textpage.close()
+                    page.close()
+                pages.append(text if self.is_usable(text) else None)
+        except Exception as e:
+            logger.warning(f"Text layer extraction failed for {pdf_path}: {e}")
+        finally:
+            pdf.close()
+
+        # Anything we couldn't read falls back to OCR
+        pages.extend([None] * (page_count - len(pages)))
+        usable = sum(1 for text in pages if text is not None)
+        logger.info(f"Text layer usable on {usable}/{page_count} pages")
+        return pages
+
+    def is_usable(self, text: str) -> bool:
+        """Check whether a page's embedded text is real content rather than an empty or broken layer"""
+        visible = [c for c in text if not c.isspace()]
+        if len(visible) < self.min_chars:
+            return False
+
+        alnum = sum(1 for c in visible if c.isalnum())
+        return alnum / len(visible) >= self.min_alnum_ratio
+
+    def build_page_result(self, text: str) -> Dict:
+        """Wrap embedded text in the same shape as an OCR page result"""
+        lines = text.split('\n')
+        return {
+            "text": text,
+            "lines": lines,
+            "confidence_scores": [1.0] * len(lines),  # Embedded text is exact
+            "average_confidence": 1.0,
+            "success": True
+        }
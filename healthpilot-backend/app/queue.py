@@ -1,3 +1,4 @@
+from typing import Optional
 from redis import Redis
 from rq import Queue
 from .jobs import test_job, process_upload_job, process_lab_report_job
@@ -18,7 +19,7 @@ def enqueue_upload_job(file_path: str):
     job = default_queue.enqueue(process_upload_job, file_path)
     return {"job_id": job.id, "status": "queued"}
 
-def enqueue_lab_report_job(file_path: str, report_id: str):
+def enqueue_lab_report_job(file_path: str, report_id: str, preprocess: Optional[bool] = None):
     """Enqueue a lab report processing job"""
-    job = default_queue.enqueue(process_lab_report_job, file_path, report_id)
+    job = default_queue.enqueue(process_lab_report_job, file_path, report_id, preprocess)
     return {"job_id": job.id, "status": "queued"}
\ No newline at end of file
@@ -0,0 +1,247 @@
+"""Re-run classification and the rule-based analysis over stored analyses
+
+Run after reference ranges or analysis rules change, so stored analyses match them:
+
+    python -m app.reanalysis --workers 8 --page-size 1000 --checkpoint reanalysis_checkpoint.json
+
+Analyses are read in id order, one keyset page at a time, re-analyzed across a process pool
+and written back with batched upserts. The checkpoint records the last id written, so an
+interrupted run picks up where it stopped, and the ids of analyses that failed, which
+--retry-failed re-analyzes once whatever made them fail is fixed.
+"""
+import os
+import json
+import time
+import argparse
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from datetime import datetime, timezone
+from typing import Any, Deque, Dict, Iterator, List, Optional, Tuple
+from dotenv import load_dotenv
+from .service_registry import registry
+from .lab_result import LabResult
+from .layout_lab_parser import FLAG_CLASSIFICATIONS
+import logging
+
+# Load environment variables
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Parsers whose results carry a classification from the report's own HI/LO flag; every
+# other parser's results were classified against the reference ranges
+FLAG_CLASSIFYING_PARSERS = ("layout", "ensemble", "template:")
+
+ANALYSIS_COLUMNS = "id, report_id, analysis_result, reports(id, profile_id, file_path, original_filename, profiles(age, sex))"
+
+def _restore_result(data: Dict[str, Any], parser: Optional[str]) -> LabResult:
+    """A stored result as its parser returned it, so the engine classifies it afresh"""
+    result = LabResult.from_dict(data)
+    flag_classified = parser is not None and parser.startswith(FLAG_CLASSIFYING_PARSERS)
+    result.classification = FLAG_CLASSIFICATIONS.get(result.flag, "UNKNOWN") if flag_classified else None
+    result.status = None
+    result.interpretation = None
+    return result
+
+def reanalyze(row: Dict[str, Any], reparse: bool = False) -> Optional[Dict[str, Any]]:
+    """New analysis_result for a stored analysis row, or None if it has no lab results"""
+    engine = registry.get_analysis_engine()
+    stored = row.get("analysis_result") or {}
+    parser = stored.get("parser")
+    if reparse:
+        lab_results, parser = engine._parse_results(row.get("ocr_text") or "", None)
+    else:
+        lab_results = [_restore_result(result, parser) for result in stored.get("results", [])]
+    if not lab_results:
+        return None
+
+    profile = (row.get("reports") or {}).get("profiles") or {}
+    analysis = engine._get_fallback_analysis(lab_results, profile.get("age"), profile.get("sex"))
+    if parser is not None:
+        analysis["parser"] = parser
+    return analysis
+
+def reanalyze_page(rows: List[Dict[str, Any]], reparse: bool = False) -> Tuple[List[Dict[str, Any]], List[str]]:
+    """Upsert payloads for the rows whose analysis changed, and the ids of the rows that failed"""
+    updates = []
+    failed = []
+    now = datetime.now(timezone.utc).isoformat()
+    for row in rows:
+        try:
+            analysis = reanalyze(row, reparse)
+        except Exception as e:
+            logger.error(f"Re-analysis of {row['id']} failed: {e}")
+            failed.append(row["id"])
+            continue
+        if analysis is None or analysis == row.get("analysis_result"):
+            continue
+
+        report = row.get("reports")
+        updates.append({
+            "analysis": {"id": row["id"], "report_id": row["report_id"], "analysis_result": analysis, "updated_at": now},
+            # The report row carries the summary columns save_analysis_result keeps in sync
+            "report": {
+                "id": report["id"],
+                "profile_id": report["profile_id"],
+                "file_path": report["file_path"],
+                "original_filename": report["original_filename"],
+                "summary": analysis.get("summary", ""),
+                "risk_level": analysis.get("risk_assessment", {}).get("risk_level", ""),
+                "abnormal_count": analysis.get("abnormal_count", 0),
+                "critical_count": analysis.get("critical_count", 0),
+                "updated_at": now
+            } if report else None
+        })
+    return updates, failed
+
+def _init_worker():
+    """Build the analysis engine once per worker process"""
+    registry.get_analysis_engine()
+
+class Checkpoint:
+    def __init__(self, path: str):
+        """Progress of a run, rewritten atomically after every page is written back"""
+        self.path = path
+        self.state = {"last_id": None, "processed": 0, "updated": 0, "failed_ids": [], "started": datetime.now(timezone.utc).isoformat()}
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                self.state.update(json.load(f))
+            logger.info(f"Resuming after analysis {self.state['last_id']} ({self.state['processed']} already processed)")
+
+    def advance(self, last_id: str, processed: int, updated: int, failed_ids: List[str], save: bool = True):
+        self.state["last_id"] = last_id
+        self.state["processed"] += processed
+        self.state["updated"] += updated
+        self.state["failed_ids"] = self.state["failed_ids"] + failed_ids
+        if save:
+            self.save()
+
+    def retried(self, ids: List[str], updated: int, failed_ids: List[str], save: bool = True):
+        """Record a retry of previously failed ids; the ones that failed again stay listed"""
+        retried = set(ids) - set(failed_ids)
+        self.state["updated"] += updated
+        self.state["failed_ids"] = [analysis_id for analysis_id in self.state["failed_ids"] if analysis_id not in retried]
+        if save:
+            self.save()
+
+    def save(self):
+        self.state["saved"] = datetime.now(timezone.utc).isoformat()
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.state, f, indent=2)
+        os.replace(tmp_path, self.path)
+
+def _columns(reparse: bool) -> str:
+    return ANALYSIS_COLUMNS.replace("analysis_result", "ocr_text, analysis_result") if reparse else ANALYSIS_COLUMNS
+
+def iter_pages(db_service, page_size: int, after: Optional[str], reparse: bool = False) -> Iterator[List[Dict[str, Any]]]:
+    """Completed analyses in id order, one page at a time; each page starts after the last id of the previous one"""
+    columns = _columns(reparse)
+    while True:
+        query = db_service.supabase.table("analyses").select(columns).eq("status", "completed").order("id").limit(page_size)
+        if after is not None:
+            query = query.gt("id", after)
+        rows = query.execute().data or []
+        if not rows:
+            return
+        yield rows
+        if len(rows) < page_size:
+            return
+        after = rows[-1]["id"]
+
+def iter_ids(db_service, ids: List[str], page_size: int, reparse: bool = False) -> Iterator[Tuple[List[str], List[Dict[str, Any]]]]:
+    """The analyses with the given ids, one page at a time, with the ids each page asked for"""
+    columns = _columns(reparse)
+    for start in range(0, len(ids), page_size):
+        page_ids = ids[start:start + page_size]
+        yield page_ids, db_service.supabase.table("analyses").select(columns).in_("id", page_ids).execute().data or []
+
+def write_updates(db_service, updates: List[Dict[str, Any]], batch_size: int):
+    for start in range(0, len(updates), batch_size):
+        batch = updates[start:start + batch_size]
+        db_service.supabase.table("analyses").upsert([update["analysis"] for update in batch]).execute()
+        reports = [update["report"] for update in batch if update["report"]]
+        if reports:
+            db_service.supabase.table("reports").upsert(reports).execute()
+
+def run(args) -> Dict[str, Any]:
+    db_service = registry.get_db_service()
+    checkpoint = Checkpoint(args.checkpoint)
+    start = time.perf_counter()
+    processed = 0
+
+    # Pages are written back and checkpointed in id order, so the checkpoint never skips an unwritten page
+    in_flight: Deque[Tuple[str, int, Future]] = deque()
+
+    def finish_oldest():
+        nonlocal processed
+        last_id, count, future = in_flight.popleft()
+        updates, failed_ids = future.result()
+        if not args.dry_run:
+            write_updates(db_service, updates, args.batch_size)
+        # A dry run leaves the checkpoint alone, so the real run still covers every row
+        checkpoint.advance(last_id, count, len(updates), failed_ids, save=not args.dry_run)
+        processed += count
+        rate = processed / (time.perf_counter() - start)
+        logger.info(f"Re-analyzed {checkpoint.state['processed']} analyses ({len(updates)} of the last {count} changed, {rate:.0f}/s)")
+
+    with ProcessPoolExecutor(max_workers=args.workers, initializer=_init_worker) as pool:
+        if args.retry_failed:
+            retry_failed(args, db_service, checkpoint, pool)
+            return checkpoint.state
+
+        fetched = 0
+        for rows in iter_pages(db_service, args.page_size, checkpoint.state["last_id"], args.reparse):
+            if args.limit:
+                rows = rows[:args.limit - fetched]
+            fetched += len(rows)
+            in_flight.append((rows[-1]["id"], len(rows), pool.submit(reanalyze_page, rows, args.reparse)))
+            # Keep every worker busy while bounding how many pages are held in memory
+            if len(in_flight) >= args.workers * 2:
+                finish_oldest()
+            if args.limit and fetched >= args.limit:
+                break
+        while in_flight:
+            finish_oldest()
+
+    logger.info(f"Re-analysis finished: {checkpoint.state}")
+    return checkpoint.state
+
+def retry_failed(args, db_service, checkpoint: Checkpoint, pool: ProcessPoolExecutor):
+    """Re-analyze the analyses the checkpoint lists as failed, leaving its position unchanged"""
+    ids = list(checkpoint.state["failed_ids"])
+    logger.info(f"Retrying {len(ids)} failed analyses")
+    pages = list(iter_ids(db_service, ids, args.page_size, args.reparse))
+    futures = [pool.submit(reanalyze_page, rows, args.reparse) for _, rows in pages]
+    for (page_ids, _), future in zip(pages, futures):
+        updates, failed_ids = future.result()
+        if not args.dry_run:
+            write_updates(db_service, updates, args.batch_size)
+        # Ids that no longer exist are dropped along with the ones that succeeded
+        checkpoint.retried(page_ids, len(updates), failed_ids, save=not args.dry_run)
+    logger.info(f"Retry finished, {len(checkpoint.state['failed_ids'])} analyses still failing")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=int(os.getenv("REANALYSIS_WORKERS", str(os.cpu_count() or 1))))
+    parser.add_argument("--page-size", type=int, default=int(os.getenv("REANALYSIS_PAGE_SIZE", "1000")),
+                        help="Analyses fetched per keyset page")
+    parser.add_argument("--batch-size", type=int, default=int(os.getenv("REANALYSIS_BATCH_SIZE", "500")),
+                        help="Rows per upsert")
+    parser.add_argument("--checkpoint", default=os.getenv("REANALYSIS_CHECKPOINT", "reanalysis_checkpoint.json"),
+                        help="Progress file; an existing one resumes the run")
+    parser.add_argument("--restart", action="store_true", help="Ignore an existing checkpoint and start from the first analysis")
+    parser.add_argument("--reparse", action="store_true", help="Parse the stored OCR text again instead of reusing stored results")
+    parser.add_argument("--limit", type=int, help="Stop after this many analyses")
+    parser.add_argument("--retry-failed", action="store_true",
+                        help="Re-analyze only the analyses the checkpoint lists as failed")
+    parser.add_argument("--dry-run", action="store_true", help="Re-analyze and count changes without writing them")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    if args.restart and os.path.exists(args.checkpoint):
+        os.remove(args.checkpoint)
+    run(args)
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,18 @@
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional, Sequence
+from bisect import bisect_right
 from dataclasses import dataclass
+import numpy as np
+from .analyte_catalog import get_catalog
+from .unit_converter import get_unit_converter
+
+CLASSIFICATIONS = np.array(["UNKNOWN", "NORMAL", "LOW", "HIGH", "CRITICAL_LOW", "CRITICAL_HIGH"], dtype=object)
+
+# Stratum of the ranges that apply during pregnancy, whatever the sex given
+PREGNANT = "pregnant"
+# Age used when the patient's age is unknown, which selects the adult bands
+DEFAULT_AGE = 40
+# Batch search keys put each stratum's ages in their own span of the number line
+AGE_SPAN = 1000.0
 
 @dataclass
 class ReferenceRange:
@@ -9,74 +22,92 @@ class ReferenceRange:
     age_min: Optional[int] = None
     age_max: Optional[int] = None
     sex: Optional[str] = None
+    pregnant: bool = False
 
 class ReferenceRanges:
     def __init__(self):
-        self.ranges = {
-            # Complete Blood Count (CBC)
-            "hemoglobin": {
-                "male": ReferenceRange(13.5, 17.5, "g/dL"),
-                "female": ReferenceRange(12.0, 15.5, "g/dL")
-            },
-            "hematocrit": {
-                "male": ReferenceRange(41.0, 50.0, "%"),
-                "female": ReferenceRange(36.0, 46.0, "%")
-            },
-            "white_blood_cells": ReferenceRange(4.5, 11.0, "K/uL"),
-            "platelets": ReferenceRange(150, 450, "K/uL"),
-            "red_blood_cells": ReferenceRange(4.5, 5.9, "M/uL"),
-            
-            # Comprehensive Metabolic Panel (CMP)
-            "glucose": ReferenceRange(70, 100, "mg/dL"),
-            "creatinine": ReferenceRange(0.7, 1.3, "mg/dL"),
-            "bun": ReferenceRange(7, 20, "mg/dL"),
-            "sodium": ReferenceRange(135, 145, "mEq/L"),
-            "potassium": ReferenceRange(3.5, 5.0, "mEq/L"),
-            "chloride": ReferenceRange(96, 106, "mEq/L"),
-            "co2": ReferenceRange(22, 28, "mEq/L"),
-            "calcium": ReferenceRange(8.5, 10.5, "mg/dL"),
-            "total_protein": ReferenceRange(6.0, 8.3, "g/dL"),
-            "albumin": ReferenceRange(3.4, 5.4, "g/dL"),
-            "total_bilirubin": ReferenceRange(0.3, 1.2, "mg/dL"),
-            "alkaline_phosphatase": ReferenceRange(44, 147, "U/L"),
-            "alt": ReferenceRange(7, 55, "U/L"),
-            "ast": ReferenceRange(8, 48, "U/L"),
-            
-            # Lipids
-            "total_cholesterol": ReferenceRange(0, 200, "mg/dL"),
-            "hdl": ReferenceRange(40, 60, "mg/dL"),
-            "ldl": ReferenceRange(0, 100, "mg/dL"),
-            "triglycerides": ReferenceRange(0, 150, "mg/dL"),
-            
-            # Diabetes
-            "hba1c": ReferenceRange(4.0, 5.6, "%"),
-            
-            # Thyroid
-            "tsh": ReferenceRange(0.4, 4.0, "mIU/L"),
-            "t4": ReferenceRange(0.8, 1.8, "ng/dL"),
-        }
-    
-    def get_range(self, test_name: str, age: Optional[int] = None, sex: Optional[str] = None) -> Optional[ReferenceRange]:
-        """Get reference range for a test"""
-        test_name = test_name.lower().replace(" ", "_")
+        self.catalog = get_catalog()
+        self.converter = get_unit_converter()
         
-        if test_name in self.ranges:
-            range_data = self.ranges[test_name]
-            
-            if isinstance(range_data, dict):
-                # Sex-specific ranges
-                if sex and sex.lower() in range_data:
-                    return range_data[sex.lower()]
-                elif "male" in range_data:
-                    return range_data["male"]  # Default to male
-            else:
-                return range_data
+        # Ranges from the analyte catalog, stratified by sex ("" for either sex) or pregnancy.
+        # Each stratum is a list of age bands sorted by age_min; a band runs until the next one starts.
+        self.ranges: Dict[str, Dict[str, List[ReferenceRange]]] = {}
+        self._band_starts: Dict[str, Dict[str, List[float]]] = {}
+        for test_name, entries in self.catalog.reference_ranges.items():
+            unit = self.catalog.unit(test_name)
+            strata: Dict[str, List[ReferenceRange]] = {}
+            for entry in entries:
+                stratum = PREGNANT if entry.get("pregnant") else entry.get("sex") or ""
+                strata.setdefault(stratum, []).append(ReferenceRange(
+                    entry["low"], entry["high"], unit, entry.get("age_min", 0), None, entry.get("sex"), bool(entry.get("pregnant"))
+                ))
+            for bands in strata.values():
+                bands.sort(key=lambda band: band.age_min)
+                for band, following in zip(bands, bands[1:]):
+                    band.age_max = following.age_min
+            self.ranges[test_name] = strata
+            self._band_starts[test_name] = {stratum: [band.age_min for band in bands] for stratum, bands in strata.items()}
         
+        # The same bands as flat arrays for classify_batch, one row per band. Rows are grouped by
+        # (test, stratum) and sorted by group then age, so one searchsorted over
+        # group * AGE_SPAN + age_min finds every value's band.
+        rows: List[ReferenceRange] = []
+        row_tests: List[str] = []
+        band_keys: List[float] = []
+        group_first: List[int] = []
+        self._groups: Dict[str, Dict[str, int]] = {}
+        for test_name, strata in self.ranges.items():
+            self._groups[test_name] = {}
+            for stratum, bands in strata.items():
+                group = len(group_first)
+                self._groups[test_name][stratum] = group
+                group_first.append(len(rows))
+                for band in bands:
+                    rows.append(band)
+                    row_tests.append(test_name)
+                    band_keys.append(group * AGE_SPAN + band.age_min)
+        self._band_keys = np.array(band_keys, dtype=np.float64)
+        self._group_first = np.array(group_first, dtype=np.intp)
+        self._low = np.array([r.low for r in rows], dtype=np.float64)
+        self._high = np.array([r.high for r in rows], dtype=np.float64)
+        self._critical_low = self._low * 0.5
+        self._critical_high = self._high * 2
+        self._units = np.array([r.unit for r in rows], dtype=object)
+        # Conversion table indices of each row's analyte and unit
+        self._row_analytes = np.array([self.converter.analyte_index(test) for test in row_tests], dtype=np.intp)
+        self._row_units = np.array([self.converter.unit_index(r.unit) for r in rows], dtype=np.intp)
+    
+    def _stratum(self, test_name: str, sex: Optional[str], pregnant: bool) -> Optional[str]:
+        """Stratum of the test's ranges that applies to the patient"""
+        strata = self.ranges.get(test_name)
+        if strata is None:
+            return None
+        if pregnant and PREGNANT in strata:
+            return PREGNANT
+        if sex and str(sex).lower() in strata:
+            return str(sex).lower()
+        if "" in strata:
+            return ""
+        if "male" in strata:
+            return "male"  # Default to male
         return None
     
-    def classify_value(self, test_name: str, value: float, unit: str, age: Optional[int] = None, sex: Optional[str] = None) -> Dict[str, Any]:
+    def get_range(self, test_name: str, age: Optional[int] = None, sex: Optional[str] = None,
+                  pregnant: bool = False) -> Optional[ReferenceRange]:
+        """Get the reference range for a test, for the patient's sex, pregnancy and age band"""
+        test_name = test_name.lower().replace(" ", "_")
+        stratum = self._stratum(test_name, sex, pregnant)
+        if stratum is None:
+            return None
+        
+        band = bisect_right(self._band_starts[test_name][stratum], DEFAULT_AGE if age is None else age) - 1
+        # Ages below the first band use the youngest band
+        return self.ranges[test_name][stratum][max(band, 0)]
+    
+    def classify_value(self, test_name: str, value: float, unit: str, age: Optional[int] = None, sex: Optional[str] = None,
+                       pregnant: bool = False) -> Dict[str, Any]:
         """Classify a lab value as Normal, Low, High, or Critical"""
-        ref_range = self.get_range(test_name, age, sex)
+        ref_range = self.get_range(test_name, age, sex, pregnant)
         
         if not ref_range:
             return {
@@ -86,7 +117,7 @@ class ReferenceRanges:
             }
         
         # Convert units if needed
-        converted_value = self._convert_units(value, unit, ref_range.unit)
+        converted_value = self._convert_units(test_name, value, unit, ref_range.unit)
         
         if converted_value < ref_range.low:
             if converted_value < ref_range.low * 0.5:  # Very low
@@ -109,14 +140,66 @@ class ReferenceRanges:
             "status": self._get_status_message(classification, test_name)
         }
     
-    def _convert_units(self, value: float, from_unit: str, to_unit: str) -> float:
-        """Convert between common lab units"""
-        # Add common unit conversions here
-        if from_unit.lower() == "mg/dl" and to_unit.lower() == "mmol/l":
-            return value * 0.0555  # For glucose
-        elif from_unit.lower() == "mmol/l" and to_unit.lower() == "mg/dl":
-            return value * 18.0  # For glucose
-        return value
+    def _group(self, test_name: str, sex: Optional[str], pregnant: bool) -> int:
+        """Index of the (test, stratum) group classify_value would use, or -1"""
+        test_name = str(test_name).lower().replace(" ", "_")
+        stratum = self._stratum(test_name, sex, pregnant)
+        return -1 if stratum is None else self._groups[test_name][stratum]
+    
+    def classify_batch(self, test_names: Sequence[str], values: Sequence[float], units: Sequence[str],
+                       ages: Optional[Sequence[Optional[float]]] = None,
+                       sexes: Optional[Sequence[Optional[str]]] = None,
+                       pregnant: Optional[Sequence[bool]] = None) -> Dict[str, np.ndarray]:
+        """Classify many values at once, with the same results as calling classify_value on each
+        
+        Takes parallel sequences and returns parallel arrays: "classification", "value"
+        (converted to the range's unit, NaN without a range) and "unit". Names, sexes and units
+        are resolved once per distinct value, then band search, conversion and comparisons run
+        over whole arrays.
+        """
+        values = np.asarray(values, dtype=np.float64)
+        count = len(values)
+        # Factorize into fixed-width string arrays; None becomes "None", which is no known sex or unit
+        names, name_index = np.unique(np.asarray(test_names, dtype=str), return_inverse=True)
+        sexes, sex_index = np.unique(np.asarray([None] * count if sexes is None else sexes, dtype=str),
+                                     return_inverse=True)
+        units, unit_index = np.unique(np.asarray(units, dtype=str), return_inverse=True)
+        pregnant = np.zeros(count, dtype=np.intp) if pregnant is None else np.asarray(pregnant, dtype=bool).astype(np.intp)
+        
+        # (test, stratum) group for every distinct (test, sex, pregnancy) combination
+        group_table = np.array([[[self._group(name, sex, flag) for flag in (False, True)] for sex in sexes] for name in names],
+                               dtype=np.intp).reshape(len(names), len(sexes), 2)
+        groups = group_table[name_index, sex_index, pregnant].reshape(-1) if count else np.zeros(0, dtype=np.intp)
+        known = groups >= 0
+        
+        # Age band: the last band of the group starting at or below the age, else the group's youngest band
+        ages = np.full(count, DEFAULT_AGE, dtype=np.float64) if ages is None else np.asarray(ages, dtype=np.float64)
+        ages = np.clip(np.where(np.isnan(ages), DEFAULT_AGE, ages), 0, AGE_SPAN - 1)
+        safe_groups = np.where(known, groups, 0)
+        rows = np.searchsorted(self._band_keys, safe_groups * AGE_SPAN + ages, side="right") - 1
+        safe_rows = np.where(known, np.maximum(rows, self._group_first[safe_groups]), 0)
+        
+        # One indexed gather into the conversion table; values without a known conversion stay as they are
+        unit_codes = np.array([self.converter.unit_index(unit) for unit in units], dtype=np.intp)[unit_index].reshape(-1)
+        factors = self.converter.lookup(self._row_analytes[safe_rows], unit_codes, self._row_units[safe_rows])
+        converted = np.where(known, values * np.where(np.isnan(factors), 1.0, factors), np.nan)
+        
+        low, high = self._low[safe_rows], self._high[safe_rows]
+        codes = np.select(
+            [~known, converted < self._critical_low[safe_rows], converted < low,
+             converted > self._critical_high[safe_rows], converted > high],
+            [0, 4, 2, 5, 3],
+            default=1
+        )
+        return {
+            "classification": CLASSIFICATIONS[codes],
+            "value": converted,
+            "unit": np.where(known, self._units[safe_rows], None)
+        }
+    
+    def _convert_units(self, test_name: str, value: float, from_unit: str, to_unit: str) -> float:
+        """Convert a value of this test between units, unchanged if no conversion is known"""
+        return self.converter.convert(test_name.lower().replace(" ", "_"), value, from_unit, to_unit)
     
     def _get_status_message(self, classification: str, test_name: str) -> str:
         """Get human-readable status message"""
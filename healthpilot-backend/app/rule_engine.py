@@ -0,0 +1,198 @@
+import os
+import json
+import time
+from typing import Any, Dict, List, Optional, Tuple
+from .lab_result import LabResult
+import logging
+
+logger = logging.getLogger(__name__)
+
+RULES_PATH = os.path.join(os.path.dirname(__file__), "data", "analysis_rules.json")
+
+# Condition keys that describe the patient rather than a fact about the results
+PATIENT_KEYS = ("age",)
+
+class CompiledRules:
+    def __init__(self, data: Dict[str, Any]):
+        """Rules compiled into a decision table: (analyte, classification) -> facts the result counts towards
+
+        A fact counts the results whose analyte and classification are listed in it (any
+        analyte or classification when the list is left out). A "first" fact only looks at
+        the first result of each of its analytes. Rules test fact counts and patient
+        attributes against min/max bounds; rules sharing a group stop at the first match.
+        """
+        self.version = data["version"]
+        self.fact_names = list(data["facts"])
+        fact_index = {name: i for i, name in enumerate(self.fact_names)}
+
+        self._table: Dict[Tuple[str, str], Tuple[int, ...]] = {}
+        self._first_table: Dict[Tuple[str, str], Tuple[int, ...]] = {}
+        self._first_any_classification: Dict[str, Tuple[int, ...]] = {}
+        self._any_analyte: Dict[str, Tuple[int, ...]] = {}
+        self._any_classification: Dict[str, Tuple[int, ...]] = {}
+        self._everything: Tuple[int, ...] = ()
+        for name, fact in data["facts"].items():
+            index = fact_index[name]
+            first = fact.get("match", "count") == "first"
+            if fact.get("match", "count") not in ("count", "first"):
+                raise ValueError(f"Fact {name} has unknown match {fact['match']!r}")
+            if first and "analytes" not in fact:
+                raise ValueError(f"Fact {name} matches first results but lists no analytes")
+            analytes, classifications = fact.get("analytes"), fact.get("classifications")
+            if analytes and classifications:
+                table = self._first_table if first else self._table
+                for analyte in analytes:
+                    for classification in classifications:
+                        table[(analyte, classification)] = table.get((analyte, classification), ()) + (index,)
+            elif analytes:
+                # Any classification: keyed by analyte alone
+                table = self._first_any_classification if first else self._any_classification
+                for analyte in analytes:
+                    table[analyte] = table.get(analyte, ()) + (index,)
+            elif classifications:
+                for classification in classifications:
+                    self._any_analyte[classification] = self._any_analyte.get(classification, ()) + (index,)
+            else:
+                self._everything += (index,)
+
+        self.risk_levels: List[str] = data.get("risk_levels", ["LOW", "MODERATE", "HIGH"])
+        self.risk_recommendations: Dict[str, List[str]] = data.get("risk_recommendations", {})
+        self.sections = {
+            section: [self._compile_rule(rule, fact_index) for rule in data.get(section, [])]
+            for section in ("summary", "recommendations", "risk", "early_warnings")
+        }
+
+    def _compile_rule(self, rule: Dict[str, Any], fact_index: Dict[str, int]) -> Dict[str, Any]:
+        conditions = []
+        for key, bounds in rule.get("when", {}).items():
+            if key not in PATIENT_KEYS and key not in fact_index:
+                raise ValueError(f"Rule {rule.get('id')} refers to unknown fact {key!r}")
+            unknown = set(bounds) - {"min", "max"}
+            if unknown:
+                raise ValueError(f"Rule {rule.get('id')} has unknown bounds {sorted(unknown)} for {key!r}")
+            conditions.append((key if key in PATIENT_KEYS else fact_index[key], bounds.get("min"), bounds.get("max")))
+        if "risk_level" in rule and rule["risk_level"] not in self.risk_levels:
+            raise ValueError(f"Rule {rule.get('id')} sets unknown risk level {rule['risk_level']!r}")
+        return {**rule, "conditions": conditions}
+
+    def count_facts(self, results: List[LabResult]) -> List[int]:
+        """Fact counts for a report, in one pass over its results"""
+        counts = [0] * len(self.fact_names)
+        seen = set()
+        table, first_table, first_any = self._table, self._first_table, self._first_any_classification
+        for result in results:
+            test_name, classification = result.test_name, result.classification
+            for index in table.get((test_name, classification), ()):
+                counts[index] += 1
+            for index in self._any_classification.get(test_name, ()):
+                counts[index] += 1
+            for index in self._any_analyte.get(classification, ()):
+                counts[index] += 1
+            for index in self._everything:
+                counts[index] += 1
+            if (first_table or first_any) and test_name not in seen:
+                seen.add(test_name)
+                for index in first_table.get((test_name, classification), ()) + first_any.get(test_name, ()):
+                    counts[index] += 1
+        return counts
+
+    def matches(self, section: str, counts: List[int], patient: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Rules of a section whose conditions hold, in declaration order"""
+        matched = []
+        decided_groups = set()
+        for rule in self.sections[section]:
+            group = rule.get("group")
+            if group is not None and group in decided_groups:
+                continue
+            if all(self._holds(key, low, high, counts, patient) for key, low, high in rule["conditions"]):
+                matched.append(rule)
+                if group is not None:
+                    decided_groups.add(group)
+        return matched
+
+    @staticmethod
+    def _holds(key, low: Optional[float], high: Optional[float], counts: List[int], patient: Dict[str, Any]) -> bool:
+        value = patient.get(key) if isinstance(key, str) else counts[key]
+        if value is None:
+            return False
+        return (low is None or value >= low) and (high is None or value <= high)
+
+class RuleEngine:
+    def __init__(self, data: Dict[str, Any], path: Optional[str] = None, reload_interval: float = 0):
+        """Summary, recommendations, risk assessment and early warnings from declarative rules
+
+        Rules are compiled once, and a report is categorized in a single pass regardless of
+        how many rules there are. With a `path` and a `reload_interval`, the rules file is
+        checked for changes at most that often and recompiled when it changes; a file that
+        fails to compile is logged and the previous rules stay in use.
+        """
+        self.compiled = CompiledRules(data)
+        self.path = path
+        self.reload_interval = reload_interval
+        self._mtime = os.path.getmtime(path) if path else None
+        self._checked = time.monotonic()
+
+    @classmethod
+    def load(cls, path: str = RULES_PATH, reload_interval: float = 0) -> "RuleEngine":
+        with open(path, "r", encoding="utf-8") as f:
+            engine = cls(json.load(f), path, reload_interval)
+        logger.info(f"Loaded analysis rules v{engine.compiled.version}")
+        return engine
+
+    def reload_if_changed(self) -> bool:
+        """Recompile the rules if the file changed since it was last read"""
+        if not self.path:
+            return False
+        try:
+            mtime = os.path.getmtime(self.path)
+            if mtime == self._mtime:
+                return False
+            with open(self.path, "r", encoding="utf-8") as f:
+                compiled = CompiledRules(json.load(f))
+        except Exception as e:
+            logger.error(f"Keeping analysis rules v{self.compiled.version}, reload failed: {e}")
+            return False
+        # Swapped in one assignment, so a report is always evaluated against one version
+        self.compiled = compiled
+        self._mtime = mtime
+        logger.info(f"Reloaded analysis rules v{compiled.version}")
+        return True
+
+    def _maybe_reload(self):
+        if self.reload_interval and time.monotonic() - self._checked >= self.reload_interval:
+            self._checked = time.monotonic()
+            self.reload_if_changed()
+
+    def evaluate(self, results: List[LabResult], age: Optional[int] = None, sex: Optional[str] = None) -> Dict[str, Any]:
+        """Summary, recommendations, risk assessment and early warnings for classified results"""
+        self._maybe_reload()
+        rules = self.compiled
+        counts = rules.count_facts(results)
+        patient = {"age": age}
+        facts = dict(zip(rules.fact_names, counts))
+
+        summary = " ".join(
+            message.format(**facts) for rule in rules.matches("summary", counts, patient) for message in rule.get("messages", [])
+        )
+        recommendations = [
+            message.format(**facts) for rule in rules.matches("recommendations", counts, patient) for message in rule.get("messages", [])
+        ]
+
+        risk_factors = []
+        risk_level = rules.risk_levels[0]
+        for rule in rules.matches("risk", counts, patient):
+            if "risk_factor" in rule:
+                risk_factors.append(rule["risk_factor"])
+            if "risk_level" in rule and rules.risk_levels.index(rule["risk_level"]) > rules.risk_levels.index(risk_level):
+                risk_level = rule["risk_level"]
+
+        return {
+            "summary": summary,
+            "recommendations": recommendations,
+            "risk_assessment": {
+                "risk_level": risk_level,
+                "risk_factors": risk_factors,
+                "recommendations": list(rules.risk_recommendations.get(risk_level, []))
+            },
+            "early_warnings": [dict(rule["warning"]) for rule in rules.matches("early_warnings", counts, patient)]
+        }
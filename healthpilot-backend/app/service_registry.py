@@ -0,0 +1,151 @@
+import os
+import time
+from typing import Dict, Any, Callable, Optional
+from .upload_service import UploadService
+from .analysis_engine import AnalysisEngine
+from .database import DatabaseService
+from .ocr_cache import OCRCache
+import logging
+
+logger = logging.getLogger(__name__)
+
+def _create_ocr_service():
+    """Build the OCR engine selected by OCR_ENGINE (tesseract, paddle or cascade)"""
+    engine = os.getenv("OCR_ENGINE", "tesseract").lower()
+    if engine == "paddle":
+        # Imported lazily so Tesseract-only workers never load Paddle
+        from .ocr_service import OCRService
+        return OCRService()
+    
+    from .tesseract_ocr_service import TesseractOCRService
+    if engine == "cascade":
+        from .cascade_ocr_service import CascadeOCRService
+        fallback = None  # Re-run weak pages through Tesseract at a higher DPI
+        if os.getenv("OCR_CASCADE_FALLBACK", "paddle").lower() == "paddle":
+            from .ocr_service import OCRService
+            fallback = OCRService()
+        return CascadeOCRService(TesseractOCRService(), fallback)
+    return TesseractOCRService()
+
+class ServiceRegistry:
+    def __init__(self, recycle_after: Optional[int] = None, forked_jobs: Optional[bool] = None):
+        """Long-lived services shared by every job that runs in this worker process
+
+        Recycling only applies when jobs run in this process (WORKER_FORK=false). A forked
+        job process exits after one job, so its count never reaches the limit, and whatever
+        it does to the services is discarded with it anyway.
+        """
+        if recycle_after is None:
+            recycle_after = int(os.getenv("WORKER_RECYCLE_AFTER_JOBS", "0"))  # 0 = never recycle
+        if forked_jobs is None:
+            forked_jobs = os.getenv("WORKER_FORK", "true").lower() == "true"
+        if forked_jobs and recycle_after:
+            logger.warning("WORKER_RECYCLE_AFTER_JOBS is ignored with WORKER_FORK=true; "
+                           "every forked job already starts from the worker's services")
+            recycle_after = 0
+        self.recycle_after = recycle_after
+        self.jobs_processed = 0
+
+        self.factories: Dict[str, Callable[[], Any]] = {
+            "ocr": _create_ocr_service,
+            "analysis": AnalysisEngine,
+            "upload": UploadService,
+            "database": DatabaseService,
+            "ocr_cache": OCRCache
+        }
+        self._services: Dict[str, Any] = {}
+
+    def get(self, name: str) -> Any:
+        """Get a service, creating it on first use"""
+        if name not in self._services:
+            start = time.perf_counter()
+            self._services[name] = self.factories[name]()
+            logger.info(f"Initialized {name} service in {time.perf_counter() - start:.2f}s")
+        return self._services[name]
+
+    def get_ocr_service(self):
+        return self.get("ocr")
+
+    def get_analysis_engine(self) -> AnalysisEngine:
+        return self.get("analysis")
+
+    def get_upload_service(self) -> UploadService:
+        return self.get("upload")
+
+    def get_db_service(self) -> DatabaseService:
+        return self.get("database")
+
+    def get_ocr_cache(self) -> OCRCache:
+        return self.get("ocr_cache")
+
+    def warm_up(self):
+        """Initialize every service up front, e.g. before the worker starts taking jobs"""
+        for name in self.factories:
+            try:
+                self.get(name)
+            except Exception as e:
+                logger.error(f"Failed to warm up {name} service: {e}")
+
+    def health_check(self, repair: bool = False) -> Dict[str, Any]:
+        """Check initialized services, optionally dropping unhealthy ones so they are rebuilt on next use"""
+        services = {}
+        for name, service in list(self._services.items()):
+            try:
+                self._check_service(name, service)
+                services[name] = "healthy"
+            except Exception as e:
+                services[name] = f"unhealthy: {e}"
+                logger.warning(f"{name} service failed health check: {e}")
+                if repair:
+                    self._close(name, self._services.pop(name))
+
+        report = {
+            "healthy": all(status == "healthy" for status in services.values()),
+            "services": services,
+            "jobs_processed": self.jobs_processed,
+            "recycle_after": self.recycle_after
+        }
+        if "analysis" in self._services:
+            report["lab_templates"] = self._services["analysis"].templates.stats()
+        return report
+
+    def _check_service(self, name: str, service: Any):
+        """Raise if a service is no longer usable"""
+        if name == "ocr":
+            service = getattr(service, "primary", service)  # Cascade: check the engine every page uses
+            if hasattr(service, "engine_version"):
+                import pytesseract
+                pytesseract.get_tesseract_version()
+            elif getattr(service, "ocr", None) is None:
+                raise RuntimeError("OCR model not loaded")
+        elif name == "upload":
+            if not os.path.isdir(service.upload_dir):
+                raise RuntimeError(f"Upload directory missing: {service.upload_dir}")
+        elif name == "database":
+            if service.supabase is None:
+                raise RuntimeError("Supabase client not initialized")
+
+    def record_job(self):
+        """Count a finished job and recycle services once the configured limit is reached"""
+        self.jobs_processed += 1
+        if self.recycle_after and self.jobs_processed % self.recycle_after == 0:
+            logger.info(f"Recycling services after {self.jobs_processed} jobs")
+            self.reset()
+
+    def reset(self):
+        """Drop all services so they are rebuilt on next use"""
+        for name, service in list(self._services.items()):
+            self._close(name, service)
+        self._services.clear()
+
+    @staticmethod
+    def _close(name: str, service: Any):
+        """Release what a service holds beyond memory, such as the OCR page pool"""
+        if hasattr(service, "close"):
+            try:
+                service.close()
+            except Exception as e:
+                logger.warning(f"Failed to close {name} service: {e}")
+
+# One registry per worker process
+registry = ServiceRegistry()
@@ -0,0 +1,154 @@
+from collections import deque
+from typing import Any, Deque, Dict, Iterable, Iterator, List, Optional, Tuple
+from .intelligent_lab_parser import IntelligentLabParser, UNIT_MATCHER
+from .line_features import extract_reference_range
+from .lab_result import LabResult
+import logging
+
+logger = logging.getLogger(__name__)
+
+# IntelligentLabParser reads values from 3 lines above a test name to 9 below it, then units
+# and ranges up to 3 lines around and 4 lines below the value line. A test is final once
+# LOOKAHEAD lines from its name have arrived, and never needs lines older than LOOKBEHIND.
+LOOKAHEAD = 14
+LOOKBEHIND = 6
+
+class _LineWindow:
+    """The LineFeatureIndex lookups over a sliding window of lines, keyed by document line number"""
+
+    def __init__(self):
+        self.start = 0
+        self.end = 0
+        self.lines: Dict[int, str] = {}
+        self.values: Dict[int, Dict[str, Any]] = {}
+        self.units: Dict[int, str] = {}
+        self.ranges: Dict[int, str] = {}
+
+    def append(self, line: str, value_info: Optional[Dict[str, Any]]):
+        index = self.end
+        self.end += 1
+        self.lines[index] = line
+        if not line:
+            return
+        if value_info:
+            self.values[index] = {'value': float(value_info['value']), 'flag': value_info['flag']}
+        unit = UNIT_MATCHER.match(line)
+        if unit:
+            self.units[index] = unit
+        reference_range = extract_reference_range(line)
+        if reference_range is not None:
+            self.ranges[index] = reference_range
+
+    def drop_before(self, index: int):
+        for i in range(self.start, min(index, self.end)):
+            self.lines.pop(i, None)
+            self.values.pop(i, None)
+            self.units.pop(i, None)
+            self.ranges.pop(i, None)
+        self.start = max(self.start, index)
+
+    def _span(self, start: int, end: int) -> range:
+        return range(max(0, start), min(self.end, end))
+
+    def unit_at(self, index: int) -> str:
+        return self.units.get(index, "")
+
+    def first_unit(self, start: int, end: int) -> str:
+        return next((self.units[i] for i in self._span(start, end) if i in self.units), "")
+
+    def first_range(self, start: int, end: int) -> str:
+        return next((self.ranges[i] for i in self._span(start, end) if i in self.ranges), "")
+
+    def value_lines(self, start: int, end: int) -> Iterator[int]:
+        return (i for i in self._span(start, end) if i in self.values)
+
+    def value_at(self, index: int) -> Dict[str, Any]:
+        return self.values[index]
+
+class StreamingLabParser:
+    def __init__(self, parser: Optional[IntelligentLabParser] = None):
+        """Incremental IntelligentLabParser: feed text as it is OCR'd, get each result once it is final
+
+        Results are identical to parsing the whole document at once, in the same order. A test
+        is emitted once the lines its value, unit and range may come from have all arrived, so
+        a value that follows its test name across a page break is still found. `finalize()`
+        settles the tests near the end of the document.
+        """
+        self.parser = parser or IntelligentLabParser()
+        self.reset()
+
+    def reset(self):
+        """Start a new document"""
+        self._window = _LineWindow()
+        self._pending: Deque[Dict[str, Any]] = deque()
+        self._partial = ""
+        self._pages = 0
+
+    def feed(self, chunk: str) -> List[LabResult]:
+        """Add raw text (any split, even mid-line) and return the results it completed"""
+        *lines, self._partial = (self._partial + chunk).split('\n')
+        for line in lines:
+            self._add_line(line)
+        return self._drain(final=False)
+
+    def feed_page(self, page_number: int, text: str) -> List[LabResult]:
+        """Add one page with the separators assemble_pdf_result puts between pages"""
+        # The page's own last line is completed here, so its results don't wait for the next page
+        prefix = "\n" if self._pages else ""
+        self._pages += 1
+        return self.feed(f"{prefix}--- Page {page_number} ---\n{text}\n")
+
+    def finalize(self) -> List[LabResult]:
+        """Settle every remaining test against the end of the document, then reset"""
+        if self._partial:
+            self._add_line(self._partial)
+            self._partial = ""
+        results = self._drain(final=True)
+        self.reset()
+        return results
+
+    def parse_stream(self, chunks: Iterable[str]) -> Iterator[LabResult]:
+        """Yield results while text chunks are still being produced"""
+        for chunk in chunks:
+            yield from self.feed(chunk)
+        yield from self.finalize()
+
+    def parse_pages(self, pages: Iterable[Tuple[int, str]]) -> Iterator[LabResult]:
+        """Yield results from (page_number, text) pairs, e.g. straight from a page-by-page OCR loop"""
+        for page_number, text in pages:
+            yield from self.feed_page(page_number, text)
+        yield from self.finalize()
+
+    def _add_line(self, line: str):
+        line = line.strip()
+        index = self._window.end
+        self._window.append(line, self.parser._extract_value_from_line(line) if line else None)
+        if not line:
+            return
+        test_match = self.parser._match_test_name(line)
+        if test_match:
+            test_name, match_score = test_match
+            self._pending.append({
+                'line_index': index,
+                'test_name': test_name,
+                'original_name': line,
+                'line': line,
+                'match_score': match_score
+            })
+
+    def _drain(self, final: bool) -> List[LabResult]:
+        """Resolve pending tests in document order, stopping at the first whose window is still open"""
+        results = []
+        while self._pending:
+            test_info = self._pending[0]
+            if not final and self._window.end < test_info['line_index'] + LOOKAHEAD:
+                break
+            self._pending.popleft()
+            value_info = self.parser._find_test_value_with_validation(self._window, test_info)
+            if value_info:
+                results.append(self.parser._build_result(test_info, value_info))
+
+        # Keep the lines the pending tests, and any test still to arrive, may look back to
+        oldest = self._pending[0]['line_index'] if self._pending else self._window.end
+        self._window.drop_before(oldest - LOOKBEHIND)
+        return results
@@ -1,86 +1,81 @@
 import re
 from typing import List, Dict, Any, Optional
+from .analyte_catalog import get_catalog
+from .lab_result import LabResult
 import logging
 
 logger = logging.getLogger(__name__)
 
+# The SI lipid/urate report this parser targets, most specific names first so a
+# "Non HDL Cholesterol" line is not claimed by HDL or total cholesterol
+TARGET_UNITS = {
+    "non_hdl_cholesterol": "mmol/L",
+    "hdl": "mmol/L",
+    "ldl": "mmol/L",
+    "triglycerides": "mmol/L",
+    "total_cholesterol": "mmol/L",
+    "urate": "umol/L"
+}
+
+# Optional HI/LO flag, the value, then an optional "low-high" reference range; a number that
+# is itself part of a range ("230-480") is never the value
+VALUE_PATTERN = re.compile(
+    r"(?:\b(HI|LO)\s+)?(?<![\d.\-–])(\d+(?:\.\d+)?)(?![\d.]*\s*[-–]\s*\d)"
+    r"(?:\s+(\d+(?:\.\d+)?)\s*[-–]\s*(\d+(?:\.\d+)?))?",
+    re.IGNORECASE
+)
+
 class TargetedLabParser:
     def __init__(self):
-        # Specific patterns for the known lab report format
-        self.target_patterns = {
-            "urate": {
-                "pattern": r"Urate\s+HI\s+(\d+)\s+(\d+)-(\d+)\s+umol/L",
-                "value_index": 1,
-                "range_start": 2,
-                "range_end": 3,
-                "unit": "umol/L"
-            },
-            "triglycerides": {
-                "pattern": r"HI\s+(\d+\.\d+)\s+FASTING",
-                "value_index": 1,
-                "unit": "mmol/L"
-            },
-            "total_cholesterol": {
-                "pattern": r"HI\s+(\d+\.\d+)",
-                "value_index": 1,
-                "unit": "mmol/L"
-            },
-            "hdl": {
-                "pattern": r"LO\s+(\d+\.\d+)",
-                "value_index": 1,
-                "unit": "mmol/L"
-            },
-            "ldl": {
-                "pattern": r"HI\s+(\d+\.\d+)",
-                "value_index": 1,
-                "unit": "mmol/L"
-            },
-            "non_hdl_cholesterol": {
-                "pattern": r"HI\s+(\d+\.\d+)",
-                "value_index": 1,
-                "unit": "mmol/L"
-            }
-        }
+        self.catalog = get_catalog()
+        
+        # Test names come from the catalog aliases; a name must be a whole word
+        self.target_patterns = [
+            (test_name, re.compile(rf"(?<![a-z])(?:{self.catalog.alias_pattern(test_name)})(?![a-z])", re.IGNORECASE), unit)
+            for test_name, unit in TARGET_UNITS.items()
+        ]
     
     def parse_lab_results(self, text: str) -> List[Dict[str, Any]]:
+        """Results of parse_records as JSON-ready dicts"""
+        return [result.to_dict() for result in self.parse_records(text)]
+    
+    def parse_records(self, text: str) -> List[LabResult]:
         """Parse OCR text and extract specific lab results"""
         results = []
-        lines = text.split('\n')
+        found = set()
+        lines = [line.strip() for line in text.split('\n')]
         
-        # Look for specific patterns in the text
-        for test_name, pattern_info in self.target_patterns.items():
-            for i, line in enumerate(lines):
-                line = line.strip()
-                if not line:
+        for i, line in enumerate(lines):
+            if not line:
+                continue
+            
+            # The first target named on the line claims it
+            for test_name, name_pattern, unit in self.target_patterns:
+                name = name_pattern.search(line)
+                if name is None:
                     continue
-                
-                match = re.search(pattern_info["pattern"], line, re.IGNORECASE)
-                if match:
-                    try:
-                        value = float(match.group(pattern_info["value_index"]))
-                        
-                        # Determine flag based on pattern
-                        flag = "HI" if "HI" in pattern_info["pattern"] else "LO" if "LO" in pattern_info["pattern"] else ""
-                        
-                        # Get reference range if available
-                        reference_range = ""
-                        if "range_start" in pattern_info and "range_end" in pattern_info:
-                            range_start = match.group(pattern_info["range_start"])
-                            range_end = match.group(pattern_info["range_end"])
-                            reference_range = f"{range_start}-{range_end}"
-                        
-                        results.append({
-                            "test_name": test_name,
-                            "original_name": test_name.replace("_", " ").title(),
-                            "value": value,
-                            "unit": pattern_info["unit"],
-                            "flag": flag,
-                            "reference_range": reference_range,
-                            "line": line
-                        })
-                        break  # Found this test, move to next
-                    except (ValueError, IndexError):
-                        continue
+                if test_name not in found:
+                    match = self._find_value(lines, i, name.end())
+                    if match:
+                        found.add(test_name)
+                        results.append(LabResult(
+                            test_name=test_name,
+                            original_name=self.catalog.display_name(test_name),
+                            value=float(match.group(2)),
+                            unit=unit,
+                            flag=(match.group(1) or "").upper(),
+                            reference_range=f"{match.group(3)}-{match.group(4)}" if match.group(3) else "",
+                            line=line
+                        ))
+                break
         
         logger.info(f"Parsed {len(results)} lab results from text")
-        return results 
\ No newline at end of file
+        return results
+    
+    @staticmethod
+    def _find_value(lines: List[str], line_index: int, name_end: int) -> Optional[re.Match]:
+        """Value after the name on its own line, or starting the next line for stacked rows"""
+        match = VALUE_PATTERN.search(lines[line_index], name_end)
+        if match is None and line_index + 1 < len(lines):
+            match = VALUE_PATTERN.match(lines[line_index + 1])
+        return match
@@ -1,45 +1,127 @@
 import os
-import tempfile
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple, Union
+import numpy as np
 import pytesseract
-from pdf2image import convert_from_path
 from PIL import Image
+from .ocr_layout import OCRLayout
+from .image_preprocessor import ImagePreprocessor
+from .pdf_page_results import PDFPagePipeline
 import logging
 
 logger = logging.getLogger(__name__)
 
-class TesseractOCRService:
-    def __init__(self):
+def _init_page_worker():
+    """Limit Tesseract to one thread per pool process so pages don't oversubscribe cores"""
+    os.environ["OMP_THREAD_LIMIT"] = "1"
+
+def _ocr_page_image(image: Union[Image.Image, np.ndarray], preprocessor: Optional[ImagePreprocessor] = None) -> Dict:
+    """OCR a single in-memory image (also the entry point for pool processes)"""
+    try:
+        timings = None
+        if preprocessor is not None:
+            image, timings = preprocessor.process(image)
+        
+        # image_to_data gives words with boxes and confidences in a single Tesseract run
+        data = pytesseract.image_to_data(image, output_type=pytesseract.Output.DICT)
+        layout, text = _build_page_layout(data)
+        result = {
+            "text": text,
+            "lines": layout.line_texts(),
+            "confidence_scores": layout.line_confidences(),
+            "average_confidence": layout.average_confidence,
+            "layout": layout,
+            "success": True
+        }
+        if timings is not None:
+            result["preprocessing"] = timings
+        return result
+    except Exception as e:
+        return {
+            "text": "",
+            "lines": [],
+            "confidence_scores": [],
+            "average_confidence": 0,
+            "success": False,
+            "error": str(e)
+        }
+
+def _build_page_layout(data: Dict[str, List]) -> Tuple[OCRLayout, str]:
+    """Turn Tesseract's image_to_data output into a layout plus plain text"""
+    words, confidences, boxes, line_ids = [], [], [], []
+    line_keys = {}
+    line_words: List[List[str]] = []
+    paragraph_starts = set()
+    last_paragraph = None
+    
+    for i, word in enumerate(data["text"]):
+        word = word.strip()
+        confidence = float(data["conf"][i])
+        if not word or confidence < 0:
+            continue  # Structural rows (blocks, paragraphs) carry no text
+        
+        paragraph = (data["block_num"][i], data["par_num"][i])
+        key = paragraph + (data["line_num"][i],)
+        if key not in line_keys:
+            line_keys[key] = len(line_keys)
+            line_words.append([])
+            if last_paragraph is not None and paragraph != last_paragraph:
+                paragraph_starts.add(line_keys[key])
+            last_paragraph = paragraph
+        
+        line_id = line_keys[key]
+        line_words[line_id].append(word)
+        words.append(word)
+        confidences.append(confidence / 100)
+        boxes.append((data["left"][i], data["top"][i], data["width"][i], data["height"][i]))
+        line_ids.append(line_id)
+    
+    # Blank line between paragraphs, matching image_to_string's output
+    text_lines = []
+    for line_id, line in enumerate(line_words):
+        if line_id in paragraph_starts:
+            text_lines.append("")
+        text_lines.append(" ".join(line))
+    
+    layout = OCRLayout(words, confidences, boxes, line_ids, [0] * len(words))
+    return layout, "\n".join(text_lines)
+
+class TesseractOCRService(PDFPagePipeline):
+    # Pool processes OCR pages with the module-level function, one Tesseract thread each
+    page_worker = staticmethod(_ocr_page_image)
+    page_worker_initializer = staticmethod(_init_page_worker)
+    
+    def __init__(self, parallel_pages: Optional[bool] = None, max_workers: Optional[int] = None):
         """Initialize Tesseract OCR service"""
         try:
             # Test if tesseract is available
-            pytesseract.get_tesseract_version()
+            self.engine_version = str(pytesseract.get_tesseract_version())
             logger.info("Tesseract OCR initialized successfully")
         except Exception as e:
             logger.error(f"Failed to initialize Tesseract OCR: {e}")
             raise
+        
+        # Page-parallel mode for multi-page PDFs (env overrides for worker deployments)
+        if parallel_pages is None:
+            parallel_pages = os.getenv("OCR_PARALLEL_PAGES", "false").lower() == "true"
+        self._init_page_pipeline(parallel_pages, max_workers)
+    
+    def cache_signature(self, preprocess: Optional[bool] = None) -> Dict:
+        """Engine and settings that affect OCR output, used to key cached results"""
+        return {
+            "engine": "tesseract",
+            "version": self.engine_version,
+            "dpi": self.rasterizer.dpi,
+            "text_layer": self.use_text_layer,
+            "preprocess": self.preprocess if preprocess is None else preprocess,
+            "skip_blank": self.skip_blank_pages,
+            "skip_duplicates": self.skip_duplicate_pages
+        }
     
-    def extract_text_from_image(self, image_path: str) -> Dict:
+    def extract_text_from_image(self, image_path: str, preprocess: Optional[bool] = None) -> Dict:
         """Extract text from an image file using Tesseract"""
         try:
             # Open the image
             image = Image.open(image_path)
-            
-            # Extract text using Tesseract
-            text = pytesseract.image_to_string(image)
-            
-            # For Tesseract, we don't have confidence scores, so we'll use a default
-            lines = text.split('\n')
-            confidence_scores = [0.8] * len(lines)  # Default confidence
-            
-            return {
-                "text": text,
-                "lines": lines,
-                "confidence_scores": confidence_scores,
-                "average_confidence": 0.8,
-                "success": True
-            }
-            
         except Exception as e:
             logger.error(f"OCR failed for {image_path}: {e}")
             return {
@@ -50,111 +132,14 @@ class TesseractOCRService:
                 "success": False,
                 "error": str(e)
             }
-    
-    def extract_text_from_pdf(self, pdf_path: str) -> Dict:
-        """Extract text from PDF by converting to images first"""
-        try:
-            logger.info(f"Starting PDF processing for: {pdf_path}")
-            logger.info(f"PDF file exists: {os.path.exists(pdf_path)}")
-            
-            # Convert PDF to images
-            logger.info("Converting PDF to images...")
-            images = convert_from_path(
-                pdf_path,
-                dpi=150,  # Lower DPI to reduce memory usage
-                fmt='PNG',
-                thread_count=1  # Single thread to reduce memory usage
-            )
-            logger.info(f"PDF converted to {len(images)} images")
-            
-            all_text = []
-            all_confidence_scores = []
-            
-            for i, image in enumerate(images):
-                logger.info(f"Processing page {i+1}/{len(images)}")
-                
-                # Resize image to reduce memory usage if it's too large
-                max_size = (2000, 2000)  # Maximum dimensions
-                if image.size[0] > max_size[0] or image.size[1] > max_size[1]:
-                    image.thumbnail(max_size, Image.Resampling.LANCZOS)
-                
-                # Save image temporarily
-                with tempfile.NamedTemporaryFile(suffix='.png', delete=False) as tmp_file:
-                    image.save(tmp_file.name, 'PNG', optimize=True)
-                    tmp_path = tmp_file.name
-                
-                try:
-                    # Extract text from this page
-                    page_result = self.extract_text_from_image(tmp_path)
-                    if page_result["success"]:
-                        all_text.append(f"--- Page {i+1} ---\n{page_result['text']}")
-                        all_confidence_scores.extend(page_result["confidence_scores"])
-                        logger.info(f"Page {i+1} text extracted: {len(page_result['text'])} chars")
-                    else:
-                        logger.warning(f"Page {i+1} OCR failed: {page_result.get('error', 'Unknown error')}")
-                    
-                    # Clear image from memory
-                    image.close()
-                    
-                finally:
-                    # Clean up temporary file
-                    try:
-                        os.unlink(tmp_path)
-                    except:
-                        pass
-            
-            final_text = "\n\n".join(all_text)
-            logger.info(f"PDF processing completed. Total text length: {len(final_text)}")
-            
-            return {
-                "text": final_text,
-                "pages": len(images),
-                "average_confidence": sum(all_confidence_scores) / len(all_confidence_scores) if all_confidence_scores else 0,
-                "success": True
-            }
-            
-        except Exception as e:
-            logger.error(f"PDF processing failed for {pdf_path}: {e}")
-            return {
-                "text": "",
-                "pages": 0,
-                "average_confidence": 0,
-                "success": False,
-                "error": str(e)
-            }
-    
-    def process_file(self, file_path: str) -> Dict:
-        """Process any file (PDF, image, or text) and extract text"""
-        file_ext = os.path.splitext(file_path)[1].lower()
         
-        if file_ext == '.pdf':
-            return self.extract_text_from_pdf(file_path)
-        elif file_ext in ['.png', '.jpg', '.jpeg', '.tiff', '.bmp']:
-            return self.extract_text_from_image(file_path)
-        elif file_ext == '.txt':
-            # For text files, just read the content directly
-            try:
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    text = f.read()
-                return {
-                    "text": text,
-                    "lines": text.split('\n'),
-                    "confidence_scores": [1.0] * len(text.split('\n')),  # Perfect confidence for text files
-                    "average_confidence": 1.0,
-                    "success": True
-                }
-            except Exception as e:
-                return {
-                    "text": "",
-                    "lines": [],
-                    "confidence_scores": [],
-                    "average_confidence": 0,
-                    "success": False,
-                    "error": str(e)
-                }
-        else:
-            return {
-                "text": "",
-                "success": False,
-                "error": f"Unsupported file type: {file_ext}"
-            } 
\ No newline at end of file
+        with image:
+            return self.extract_text_from_image_data(image, preprocess)
+    
+    def extract_text_from_image_data(self, image: Union[Image.Image, np.ndarray], preprocess: Optional[bool] = None) -> Dict:
+        """Extract text from an in-memory PIL image or NumPy array using Tesseract"""
+        # pytesseract accepts both PIL images and arrays, so no encoding or disk I/O is needed
+        result = _ocr_page_image(image, self._preprocessor_for(preprocess))
+        if not result["success"]:
+            logger.error(f"OCR failed for in-memory image: {result['error']}")
+        return result
@@ -0,0 +1,122 @@
+import re
+from typing import Dict, List, Optional, Sequence, Union
+import numpy as np
+from .analyte_catalog import AnalyteCatalog, get_catalog
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Spellings of the same unit that OCR and different lab systems produce
+UNIT_SPELLINGS = [
+    (re.compile(r"[µμ]"), "u"),
+    (re.compile(r"\s+"), ""),
+    (re.compile(r"^x(?=10)"), ""),
+    (re.compile(r"10(?:\*\*|\*|e)(?=\d)"), "10^"),
+]
+
+class UnitConverter:
+    def __init__(self, catalog: Optional[AnalyteCatalog] = None):
+        """Analyte-aware unit conversion through a dense (analyte, from unit, to unit) factor table
+
+        The catalog gives each analyte's factors from alternative units to its own unit; the
+        table holds every pairwise factor, NaN where no conversion is known. Converting is
+        one lookup and one multiply, on scalars or whole arrays.
+        """
+        self.catalog = catalog or get_catalog()
+        self._normalized: Dict[str, str] = {}
+
+        self.analytes = list(self.catalog.names)
+        self._analyte_index = {name: i for i, name in enumerate(self.analytes)}
+        self.units: List[str] = []
+        self._unit_index: Dict[str, int] = {}
+        for unit in self.catalog.units:
+            self._add_unit(unit)
+        for conversions in self.catalog.conversions.values():
+            for unit in conversions:
+                self._add_unit(unit)
+
+        # to_own[a, u]: factor from unit u to analyte a's own unit
+        to_own = np.full((len(self.analytes), len(self.units)), np.nan)
+        for name, a in self._analyte_index.items():
+            unit = self.catalog.unit(name)
+            if unit:
+                to_own[a, self.unit_index(unit)] = 1.0
+            for from_unit, factor in self.catalog.conversions.get(name, {}).items():
+                to_own[a, self.unit_index(from_unit)] = factor
+        self.table = to_own[:, :, None] / to_own[:, None, :]
+        # Same unit in and out converts with 1 even for analytes without a unit of their own
+        self.table[:, np.arange(len(self.units)), np.arange(len(self.units))] = 1.0
+        logger.info(f"Built unit conversion table for {len(self.analytes)} analytes and {len(self.units)} units")
+
+    def _add_unit(self, unit: str):
+        key = self.normalize_unit(unit)
+        if key not in self._unit_index:
+            self._unit_index[key] = len(self.units)
+            self.units.append(unit)
+
+    def normalize_unit(self, unit: Optional[str]) -> str:
+        """Lookup key for a unit: catalog aliases resolved, case, spaces, micro signs and exponents normalized"""
+        if not unit:
+            return ""
+        key = self._normalized.get(unit)
+        if key is None:
+            key = unit.lower()
+            for pattern, replacement in UNIT_SPELLINGS:
+                key = pattern.sub(replacement, key)
+            key = self.catalog.unit_aliases.get(key, key).lower()
+            self._normalized[unit] = key
+        return key
+
+    def unit_index(self, unit: Optional[str]) -> int:
+        return self._unit_index.get(self.normalize_unit(unit), -1)
+
+    def analyte_index(self, test_name: str) -> int:
+        return self._analyte_index.get(test_name, -1)
+
+    def lookup(self, analytes: np.ndarray, from_units: np.ndarray, to_units: np.ndarray) -> np.ndarray:
+        """Factors for arrays of table indices, NaN where any index is -1 or no conversion is known"""
+        known = (analytes >= 0) & (from_units >= 0) & (to_units >= 0)
+        factors = self.table[np.where(known, analytes, 0), np.where(known, from_units, 0), np.where(known, to_units, 0)]
+        return np.where(known, factors, np.nan)
+
+    def factor(self, test_name: str, from_unit: Optional[str], to_unit: Optional[str]) -> Optional[float]:
+        """Factor converting the analyte from one unit to another, or None if unknown"""
+        if self.normalize_unit(from_unit) == self.normalize_unit(to_unit):
+            return 1.0
+        a, f, t = self.analyte_index(test_name), self.unit_index(from_unit), self.unit_index(to_unit)
+        if a < 0 or f < 0 or t < 0 or np.isnan(self.table[a, f, t]):
+            return None
+        return float(self.table[a, f, t])
+
+    def convert(self, test_name: str, value: Union[float, np.ndarray], from_unit: Optional[str],
+                to_unit: Optional[str] = None) -> Union[float, np.ndarray]:
+        """Convert to `to_unit` (default the analyte's own unit); values without a known conversion are returned as is"""
+        factor = self.factor(test_name, from_unit, to_unit or self.catalog.unit(test_name))
+        return value if factor is None or factor == 1.0 else value * factor
+
+    def convert_many(self, test_names: Sequence[str], values: Sequence[float], from_units: Sequence[str],
+                     to_units: Optional[Sequence[str]] = None) -> np.ndarray:
+        """convert() over parallel sequences, resolving each distinct name and unit once"""
+        values = np.asarray(values, dtype=np.float64)
+        names, name_index = np.unique(np.asarray(test_names, dtype=str), return_inverse=True)
+        analytes = np.array([self.analyte_index(name) for name in names], dtype=np.intp)[name_index]
+        from_indices = self._unit_indices(from_units)
+        if to_units is None:
+            to_indices = np.array([self.unit_index(self.catalog.unit(name)) for name in names], dtype=np.intp)[name_index]
+        else:
+            to_indices = self._unit_indices(to_units)
+        factors = self.lookup(analytes.reshape(-1), from_indices, to_indices.reshape(-1))
+        return values * np.where(np.isnan(factors), 1.0, factors)
+
+    def _unit_indices(self, units: Sequence[str]) -> np.ndarray:
+        unique, index = np.unique(np.asarray(units, dtype=str), return_inverse=True)
+        return np.array([self.unit_index(unit) for unit in unique], dtype=np.intp)[index].reshape(-1)
+
+_converter: Optional[UnitConverter] = None
+
+def get_unit_converter() -> UnitConverter:
+    """Converter shared by the whole process, built on first use"""
+    global _converter
+    if _converter is None:
+        _converter = UnitConverter()
+    return _converter
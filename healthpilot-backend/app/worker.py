@@ -1,11 +1,15 @@
 import os
 from dotenv import load_dotenv
-from rq import Worker, Queue
+from rq import Worker, SimpleWorker, Queue
 from redis import Redis
+from .service_registry import registry
+import logging
 
 # Load environment variables
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 # Redis connection
 redis_conn = Redis(host='localhost', port=6379, db=0)
 
@@ -15,7 +19,13 @@ high_queue = Queue('high', connection=redis_conn)
 
 def start_worker():
     """Start RQ worker"""
-    worker = Worker([default_queue, high_queue], connection=redis_conn)
+    # Load OCR and analysis engines once; forked job processes inherit them warm
+    registry.warm_up()
+    logger.info(f"Worker services health: {registry.health_check()}")
+    
+    # WORKER_FORK=false runs jobs in this process so services persist across jobs and can be recycled
+    worker_class = Worker if os.getenv("WORKER_FORK", "true").lower() == "true" else SimpleWorker
+    worker = worker_class([default_queue, high_queue], connection=redis_conn)
     worker.work()
 
 if __name__ == '__main__':
@@ -0,0 +1,153 @@
+"""Parser throughput, memory and recall on synthetic lab reports
+
+    python -m benchmarks.parser_bench run --reports 200 --output benchmarks/baselines/main.json
+    python -m benchmarks.parser_bench diff benchmarks/baselines/main.json benchmarks/baselines/branch.json
+"""
+import argparse
+import json
+import logging
+import platform
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+from typing import Any, Dict, List
+from app.lab_parser import LabParser
+from app.flexible_lab_parser import FlexibleLabParser
+from app.intelligent_lab_parser import IntelligentLabParser
+from app.targeted_lab_parser import TargetedLabParser
+from app.comprehensive_lab_parser import ComprehensiveLabParser
+from .synthetic_reports import LAYOUTS, ReportSpec, SyntheticReport, generate_reports
+
+PARSERS = {
+    "LabParser": LabParser,
+    "FlexibleLabParser": FlexibleLabParser,
+    "IntelligentLabParser": IntelligentLabParser,
+    "TargetedLabParser": TargetedLabParser,
+    "ComprehensiveLabParser": ComprehensiveLabParser
+}
+
+# Metric -> +1 if higher is better, -1 if lower is better
+METRICS = {"lines_per_sec": 1, "reports_per_sec": 1, "peak_memory_kb": -1, "recall": 1}
+
+def _recall(reports: List[SyntheticReport], outputs: List[List]) -> float:
+    """Share of printed (test, value) pairs the parser found with the right value"""
+    expected = found = 0
+    for report, results in zip(reports, outputs):
+        values: Dict[str, set] = {}
+        for result in results:
+            values.setdefault(result.test_name, set()).add(round(float(result.value), 4))
+        for test_name, value in report.expected:
+            expected += 1
+            found += round(value, 4) in values.get(test_name, ())
+    return found / expected if expected else 0.0
+
+def bench_parser(parser, reports: List[SyntheticReport], repeat: int = 3) -> Dict[str, float]:
+    """Best-of-`repeat` throughput, then one traced pass for peak memory"""
+    lines = sum(report.line_count for report in reports)
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        outputs = [parser.parse_records(report.text) for report in reports]
+        best = min(best, time.perf_counter() - start)
+
+    # Tracing slows parsing down, so memory is measured on a separate pass
+    tracemalloc.start()
+    for report in reports:
+        parser.parse_records(report.text)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "lines_per_sec": round(lines / best, 1),
+        "reports_per_sec": round(len(reports) / best, 2),
+        "peak_memory_kb": round(peak / 1024, 1),
+        "recall": round(_recall(reports, outputs), 4)
+    }
+
+def run(args) -> Dict[str, Any]:
+    results: Dict[str, Dict[str, Dict[str, float]]] = {}
+    for layout in args.layouts:
+        spec = ReportSpec(args.analytes, args.noise, args.ocr_errors, args.pages, layout)
+        reports = generate_reports(spec, args.reports, args.seed)
+        results[layout] = {}
+        for name in args.parsers:
+            results[layout][name] = bench_parser(PARSERS[name](), reports, args.repeat)
+            print(f"{layout:8} {name:24} " + "  ".join(f"{k}={v}" for k, v in results[layout][name].items()))
+
+    return {
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "config": {
+            "reports": args.reports, "analytes": args.analytes, "noise": args.noise,
+            "ocr_errors": args.ocr_errors, "pages": args.pages, "seed": args.seed, "repeat": args.repeat
+        },
+        "results": results
+    }
+
+def diff(baseline: Dict[str, Any], current: Dict[str, Any], threshold: float) -> int:
+    """Print metric changes and return how many moved the wrong way by more than `threshold`"""
+    if baseline.get("config") != current.get("config"):
+        print(f"warning: configs differ\n  baseline {baseline.get('config')}\n  current  {current.get('config')}")
+
+    regressions = 0
+    for layout, parsers in current["results"].items():
+        for name, metrics in parsers.items():
+            old = baseline["results"].get(layout, {}).get(name)
+            if old is None:
+                print(f"{layout:8} {name:24} new")
+                continue
+            for metric, direction in METRICS.items():
+                before, after = old.get(metric), metrics.get(metric)
+                if before is None or after is None:
+                    continue
+                change = (after - before) / before if before else 0.0
+                regressed = change * direction < -threshold
+                regressions += regressed
+                print(f"{layout:8} {name:24} {metric:16} {before:>12} -> {after:<12} {change:+.1%}{'  REGRESSION' if regressed else ''}")
+    return regressions
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="Benchmark the parsers and write a JSON baseline")
+    run_parser.add_argument("--reports", type=int, default=100)
+    run_parser.add_argument("--analytes", type=int, default=12)
+    run_parser.add_argument("--noise", type=float, default=0.3, help="Noise lines per result, on average")
+    run_parser.add_argument("--ocr-errors", type=float, default=0.0, help="Per-character garbling rate for test names")
+    run_parser.add_argument("--pages", type=int, default=1)
+    run_parser.add_argument("--layouts", nargs="+", choices=LAYOUTS, default=list(LAYOUTS))
+    run_parser.add_argument("--parsers", nargs="+", choices=list(PARSERS), default=list(PARSERS))
+    run_parser.add_argument("--seed", type=int, default=0)
+    run_parser.add_argument("--repeat", type=int, default=3)
+    run_parser.add_argument("--output", help="Where to save the baseline JSON")
+
+    diff_parser = commands.add_parser("diff", help="Compare two baselines")
+    diff_parser.add_argument("baseline")
+    diff_parser.add_argument("current")
+    diff_parser.add_argument("--threshold", type=float, default=0.1, help="Relative change counted as a regression")
+
+    args = parser.parse_args(argv)
+    # Parsers log every report at INFO
+    logging.basicConfig(level=logging.WARNING)
+
+    if args.command == "run":
+        report = run(args)
+        if args.output:
+            with open(args.output, "w", encoding="utf-8") as f:
+                json.dump(report, f, indent=2)
+            print(f"Saved baseline to {args.output}")
+        return 0
+
+    with open(args.baseline, "r", encoding="utf-8") as f:
+        baseline = json.load(f)
+    with open(args.current, "r", encoding="utf-8") as f:
+        current = json.load(f)
+    regressions = diff(baseline, current, args.threshold)
+    print(f"{regressions} regression(s) beyond {args.threshold:.0%}")
+    return 1 if regressions else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,137 @@
+import random
+from functools import lru_cache
+from dataclasses import dataclass, field
+from typing import List, Optional, Tuple
+from app.analyte_catalog import get_catalog
+from app.reference_ranges import ReferenceRanges
+
+LAYOUTS = ("inline", "stacked", "flagged")
+
+# Characters OCR commonly confuses, applied at `ocr_error_rate` per character
+OCR_CONFUSIONS = {
+    "l": "1", "i": "l", "o": "0", "O": "0", "e": "c", "S": "5", "B": "8", "g": "q", "rn": "m", "m": "rn"
+}
+
+NOISE_LINES = [
+    "Collected: {date} {time}", "Received: {date} {time}", "Lab ID: {number}", "Specimen: Serum",
+    "Ordering physician: Dr. Smith", "Page reviewed by: {initials}", "Comment: sample slightly hemolysed",
+    "Method: photometric", "Reported: {date}", "{number} {initials} {number}"
+]
+
+@dataclass
+class ReportSpec:
+    """Shape of the synthetic reports to generate"""
+    analytes: int = 12
+    noise: float = 0.3  # Noise lines per result, on average
+    ocr_error_rate: float = 0.0  # Chance each character of a test name is garbled
+    pages: int = 1
+    layout: str = "stacked"
+
+@dataclass
+class SyntheticReport:
+    text: str
+    expected: List[Tuple[str, float]] = field(default_factory=list)  # (test name, value) actually printed
+
+    @property
+    def line_count(self) -> int:
+        return self.text.count("\n") + 1
+
+def _analyte_pool() -> List[str]:
+    """Analytes with a unit and a reference range, so reports can carry realistic values"""
+    catalog = get_catalog()
+    return [name for name in catalog.names if catalog.unit(name) and name in catalog.reference_ranges]
+
+def _garble(text: str, rate: float, rng: random.Random) -> str:
+    if not rate:
+        return text
+    out = []
+    i = 0
+    while i < len(text):
+        pair = text[i:i + 2]
+        if pair in OCR_CONFUSIONS and rng.random() < rate:
+            out.append(OCR_CONFUSIONS[pair])
+            i += 2
+            continue
+        char = text[i]
+        out.append(OCR_CONFUSIONS[char] if char in OCR_CONFUSIONS and rng.random() < rate else char)
+        i += 1
+    return "".join(out)
+
+def _noise_line(rng: random.Random) -> str:
+    return rng.choice(NOISE_LINES).format(
+        date=f"{rng.randint(1, 28):02d}/{rng.randint(1, 12):02d}/20{rng.randint(10, 25)}",
+        time=f"{rng.randint(0, 23):02d}:{rng.randint(0, 59):02d}",
+        number=rng.randint(10000, 99999),
+        initials="".join(rng.choice("ABCDEFGHJKLMNPRSTW") for _ in range(2))
+    )
+
+@lru_cache(maxsize=None)
+def _reference_ranges() -> ReferenceRanges:
+    return ReferenceRanges()
+
+def _value(name: str, rng: random.Random) -> Tuple[float, str, str]:
+    """(value, flag, reference range text) for an analyte, out of range about a third of the time"""
+    catalog = get_catalog()
+    ref = _reference_ranges().get_range(name)
+    low, high = ref.low, ref.high
+    valid_low, valid_high = catalog.valid_ranges.get(name, (low * 0.5, high * 2))
+    span = high - low
+    roll = rng.random()
+    if roll < 0.17 and low > valid_low:
+        value = rng.uniform(max(valid_low, low - span * 0.5), low)
+    elif roll < 0.33:
+        value = rng.uniform(high, min(valid_high, high + span * 0.5))
+    else:
+        value = rng.uniform(max(low, valid_low), min(high, valid_high))
+    decimals = 2 if high < 10 else 1 if high < 100 else 0
+    value = round(value, decimals)
+    flag = "LO" if value < low else "HI" if value > high else ""
+    return value, flag, f"{low:g}-{high:g}"
+
+def _result_lines(alias: str, value: float, flag: str, reference_range: str, unit: str, layout: str) -> List[str]:
+    value_text = f"{value:g}"
+    if layout == "inline":
+        # "Glucose: 95 mg/dL 70-100"
+        return [f"{alias}: {value_text} {unit} {reference_range}"]
+    if layout == "flagged":
+        # "Glucose HI 120 70-100 mg/dL", one row per test as printed by most analyzers
+        return [f"{alias} {flag + ' ' if flag else ''}{value_text} {reference_range} {unit}"]
+    # "stacked": name, value, unit and range each on their own line, as OCR splits table cells
+    return [alias, f"{flag} {value_text}".strip(), unit, reference_range]
+
+def generate_report(spec: ReportSpec, rng: random.Random, pool: Optional[List[str]] = None) -> SyntheticReport:
+    """One OCR-like report with its expected (test name, value) pairs"""
+    if spec.layout not in LAYOUTS:
+        raise ValueError(f"Unknown layout {spec.layout!r}, expected one of {LAYOUTS}")
+    catalog = get_catalog()
+    pool = pool or _analyte_pool()
+    names = rng.sample(pool, min(spec.analytes, len(pool)))
+
+    rows: List[List[str]] = []
+    expected = []
+    for name in names:
+        alias = rng.choice([catalog.display_name(name)] + catalog.aliases[name]).title()
+        value, flag, reference_range = _value(name, rng)
+        lines = _result_lines(_garble(alias, spec.ocr_error_rate, rng), value, flag, reference_range,
+                              catalog.unit(name), spec.layout)
+        rows.append(lines)
+        expected.append((name, value))
+
+    # Spread rows over pages, with noise lines between them
+    pages: List[List[str]] = [[] for _ in range(max(1, spec.pages))]
+    for i, lines in enumerate(rows):
+        page = pages[i * len(pages) // len(rows)]
+        page.extend(lines)
+        noise = int(spec.noise) + (rng.random() < spec.noise % 1)
+        page.extend(_noise_line(rng) for _ in range(noise))
+
+    text = "\n\n".join(
+        f"--- Page {number} ---\n" + "\n".join([_noise_line(rng), "LABORATORY REPORT"] + lines)
+        for number, lines in enumerate(pages, start=1)
+    )
+    return SyntheticReport(text, expected)
+
+def generate_reports(spec: ReportSpec, count: int, seed: int = 0) -> List[SyntheticReport]:
+    rng = random.Random(seed)
+    pool = _analyte_pool()
+    return [generate_report(spec, rng, pool) for _ in range(count)]
@@ -0,0 +1,19 @@
+from app.analyte_catalog import get_catalog
+from app.lab_parser import LabParser
+
+def test_short_aliases_match_whole_words_only():
+    """Test that short aliases like "hb" and "k" don't match inside longer names"""
+    trie = get_catalog().alias_trie
+
+    assert trie.match("Hb 13.2 g/dL") == "hemoglobin"
+    assert trie.match("HGB: 13.2") == "hemoglobin"
+    assert trie.match("K 4.1 mmol/L") == "potassium"
+    assert trie.match("HbA1c 6.3 %") == "hba1c"
+    assert trie.match("Alkaline Phosphatase 113 U/L") == "alkaline_phosphatase"
+    # Whole-line matching is unaffected
+    assert get_catalog().exact_alias_trie.match("Hb") == "hemoglobin"
+
+def test_hba1c_row_is_not_read_as_hemoglobin():
+    """Test that a stacked HbA1c row is not reported as hemoglobin"""
+    results = LabParser().parse_records("HbA1c\nHI 6.3\n%\n4.0-5.6")
+    assert "hemoglobin" not in [result.test_name for result in results]
@@ -0,0 +1,71 @@
+from PIL import Image
+from app.cascade_ocr_service import CascadeOCRService
+from app.ocr_layout import OCRLayout
+
+# Paddle-style detections: each test name and value is its own box, listed out of row order
+SEGMENTS = [
+    ("95", 0.97, (300, 12, 40, 20)),
+    ("Glucose", 0.96, (20, 10, 120, 22)),
+    ("HDL", 0.95, (20, 50, 60, 22)),
+    ("1.2", 0.98, (300, 53, 40, 20)),
+    ("LDL", 0.94, (20, 90, 60, 22)),
+    ("100", 0.96, (300, 91, 50, 20)),
+]
+
+class FakeRasterizer:
+    dpi = 150
+
+    def get_page_count(self, pdf_path):
+        return 1
+
+    def iter_pages(self, pdf_path, pages=None, dpi=None):
+        for page_number in pages:
+            yield page_number, Image.new('L', (400, 120), 255)
+
+class WeakPrimary:
+    """Cheap engine that only managed a blurry single row on the page"""
+    rasterizer = FakeRasterizer()
+
+    def iter_page_results(self, pdf_path, page_count, preprocess=None):
+        yield 1, {
+            "text": "Glucose 95",
+            "lines": ["Glucose 95"],
+            "confidence_scores": [0.52],
+            "average_confidence": 0.52,
+            "success": True
+        }, "ocr"
+
+class PaddleLikeFallback:
+    """Heavy engine that returns its detections the way OCRService does"""
+
+    def extract_text_from_image_data(self, image, preprocess=None):
+        words, confidences, boxes = zip(*SEGMENTS)
+        layout = OCRLayout.from_segments(words, confidences, boxes)
+        lines = layout.line_texts()
+        return {
+            "text": "\n".join(lines),
+            "lines": lines,
+            "confidence_scores": layout.line_confidences(),
+            "average_confidence": layout.average_confidence,
+            "layout": layout,
+            "success": True
+        }
+
+def test_from_segments_groups_detections_into_rows():
+    """Test that separate name and value detections on one printed row become one line"""
+    words, confidences, boxes = zip(*SEGMENTS)
+    layout = OCRLayout.from_segments(words, confidences, boxes)
+
+    assert layout.line_texts() == ["Glucose 95", "HDL 1.2", "LDL 100"]
+    assert len(layout.line_confidences()) == 3
+
+def test_low_confidence_primary_page_loses_to_better_fallback():
+    """Test that a weak primary page is replaced by a fallback page with more lab rows"""
+    cascade = CascadeOCRService(WeakPrimary(), PaddleLikeFallback(), min_confidence=0.75, min_rows=1)
+
+    result = cascade.extract_text_from_pdf("report.pdf")
+
+    assert result["success"]
+    assert result["page_sources"][0]["source"] == "ocr_fallback"
+    assert "HDL 1.2" in result["text"]
+    assert cascade.count_lab_rows(PaddleLikeFallback().extract_text_from_image_data(None)) == 3
@@ -0,0 +1,29 @@
+from app.analyte_catalog import get_catalog
+
+def test_fuzzy_lookup_tolerates_ocr_errors():
+    """Test that garbled analyte names resolve with a score and short or unrelated words don't"""
+    index = get_catalog().fuzzy_index
+
+    assert index.lookup("Hemoglobin") == ("hemoglobin", 1.0)
+    assert index.lookup("Hemog1obin") == ("hemoglobin", 0.9)
+    assert index.lookup("Triglycer1de")[0] == "triglycerides"
+    assert index.lookup("Cholesterd")[0] == "total_cholesterol"
+
+    # Short aliases ("k", "na", "hb") only ever match exactly
+    assert index.lookup("ab") is None
+    assert index.lookup("Patient") is None
+    assert index.lookup("HI 1.98") is None
+
+def test_fuzzy_lookup_rejects_lines_that_cannot_be_names():
+    """Test that long lines and value lines skip the fuzzy lookup but garbled names still match"""
+    from app.intelligent_lab_parser import IntelligentLabParser
+    index = get_catalog().fuzzy_index
+    parser = IntelligentLabParser()
+
+    assert index.lookup("Specimen collected at the main laboratory on arrival") is None
+    assert index.lookup("x" * (index._max_length + index.max_distance + 1)) is None
+
+    assert parser._match_test_name("5odium")[0] == "sodium"
+    assert parser._match_test_name("Red 8l0od Cells")[0] == "red_blood_cells"
+    assert parser._match_test_name("Sodlum 140") is None
+    assert parser._match_test_name("Collected: 2024-01-05") is None
@@ -0,0 +1,54 @@
+import numpy as np
+from PIL import Image
+from app.image_preprocessor import ImagePreprocessor
+
+def _bars(height: int = 400, width: int = 600) -> np.ndarray:
+    """White page with dark horizontal bars standing in for lines of text"""
+    page = np.full((height, width), 255, dtype=np.uint8)
+    for top in range(60, height - 60, 40):
+        page[top:top + 8, 80:width - 80] = 0
+    return page
+
+def test_binarize_separates_ink_from_uneven_background():
+    """Test that ink on a lighting gradient comes out black and the gradient itself white"""
+    gradient = np.tile(np.linspace(120, 250, 400), (200, 1)).astype(np.uint8)
+    page = gradient.copy()
+    page[90:110, 50:350] -= 60  # A stroke 60 levels darker than the background under it
+
+    binary = ImagePreprocessor().binarize(page)
+    assert binary.dtype == np.uint8 and set(np.unique(binary)) == {0, 255}
+    assert (binary[92:108, 55:345] == 0).all()
+    assert (binary[:80] == 255).all() and (binary[120:] == 255).all()
+    # A single global threshold can't do this: the stroke's right end is lighter than the gradient's left edge
+    assert page[100, 340] > gradient[0, 0]
+
+def test_deskew_straightens_rotated_bars():
+    """Test that a page rotated by a few degrees is measured and rotated back"""
+    preprocessor = ImagePreprocessor()
+    assert preprocessor.estimate_skew(_bars()) == 0.0
+
+    tilted = np.asarray(Image.fromarray(_bars()).rotate(3, expand=True, fillcolor=255), dtype=np.uint8)
+    assert abs(abs(preprocessor.estimate_skew(tilted)) - 3) <= preprocessor.skew_step
+
+    straightened = preprocessor.deskew(tilted)
+    assert abs(preprocessor.estimate_skew(straightened)) < preprocessor.skew_step
+
+def test_crop_removes_blank_border():
+    """Test that cropping keeps the ink plus the margin and leaves a blank page alone"""
+    preprocessor = ImagePreprocessor(margin=10)
+    page = np.full((300, 400), 255, dtype=np.uint8)
+    page[50:80, 100:150] = 0
+
+    cropped = preprocessor.crop_borders(page)
+    assert cropped.shape == (30 + 20, 50 + 20)
+    assert (cropped[10:40, 10:60] == 0).all()
+
+    blank = np.full((300, 400), 255, dtype=np.uint8)
+    assert preprocessor.crop_borders(blank) is blank
+
+def test_process_runs_enabled_steps_in_order():
+    """Test that the pipeline accepts RGB arrays, runs steps in pipeline order and times each one"""
+    rgb = np.stack([_bars()] * 3, axis=-1)
+    pixels, timings = ImagePreprocessor(steps=("crop", "binarize")).process(rgb)
+    assert list(timings) == ["grayscale", "binarize", "crop"]
+    assert pixels.shape == (8 * 7 + 6 * 32 + 20, 600 - 160 + 20)
@@ -0,0 +1,11 @@
+from app.lab_result import LabResult
+
+def test_from_dict_round_trips_to_dict():
+    """Test that a stored result rebuilds into the same record, extras and value line included"""
+    result = LabResult("glucose", "Glucose", 95.0, unit="mg/dL", flag="HI", reference_range="70-99 mg/dL",
+                       classification="HIGH", match_score=0.9, line="Glucose", value_line="HI 95",
+                       status="Above normal range", interpretation="Elevated blood sugar levels.",
+                       extras={"page": 2, "agreed_parsers": ["lab", "flexible"]})
+    data = result.to_dict()
+    assert LabResult.from_dict(data) == result
+    assert LabResult.from_dict(data).to_dict() == data
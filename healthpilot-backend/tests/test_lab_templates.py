@@ -0,0 +1,71 @@
+from app.lab_templates import TemplateRegistry, RedisTemplateCounters
+
+REPORT = """CITY PATHOLOGY
+Patient: Jane Doe
+Urate HI 590 230-480 umol/L
+Triglyceride HI 1.98 FASTING
+Cholesterol HI 5.20
+Desired: <4.40
+HDL Cholesterol LO 0.95 Desired: >1.20
+LDL Cholesterol HI 3.43
+Non HDL Cholesterol
+HI 4.25 Desired: <3.10
+"""
+
+def test_known_layout_uses_template_and_caches_fingerprint():
+    """Test that a known layout is parsed by its plan and a second report with new values hits the fingerprint cache"""
+    registry = TemplateRegistry.load()
+
+    first = registry.parse(REPORT)
+    assert first["template_id"] == "urate_fasting_lipids"
+    assert not first["fingerprint_cache_hit"]
+    assert [(r.test_name, r.value, r.flag) for r in first["results"]] == [
+        ("urate", 590.0, "HI"), ("triglycerides", 1.98, "HI"), ("total_cholesterol", 5.2, "HI"),
+        ("hdl", 0.95, "LO"), ("ldl", 3.43, "HI"), ("non_hdl_cholesterol", 4.25, "HI")
+    ]
+
+    second = registry.parse(REPORT.replace("Jane Doe", "John Roe").replace("590", "410"))
+    assert second["fingerprint_cache_hit"]
+    assert second["results"][0].value == 410.0
+
+    assert registry.parse("Glucose: 95 mg/dL") is None
+    stats = registry.stats()
+    assert (stats["lookups"], stats["template_hits"], stats["fingerprint_cache_hits"]) == (3, 2, 1)
+
+def test_lipid_panel_from_another_lab_is_not_matched():
+    """Test that analyte names alone don't select the template, and a printed unit the template doesn't expect rejects it"""
+    registry = TemplateRegistry.load()
+    us_report = "Urate 6.1 mg/dL\nTriglycerides 150 mg/dL\nTotal Cholesterol 210\nHDL 45\nLDL 130\n"
+    assert registry.parse(us_report) is None
+    assert registry.parse("CITY PATHOLOGY\n" + us_report) is None
+
+def test_vendor_footer_is_fingerprinted():
+    """Test that a marker in the footer is recognized and numbered from the end of the document"""
+    registry = TemplateRegistry.load()
+    report = REPORT.replace("CITY PATHOLOGY\n", "") + "\n".join(f"Comment {i}" for i in range(70)) + "\nCity Pathology\n"
+    assert registry.fingerprint(report.split("\n")) == ((0, -1),)
+    assert registry.parse(report)["template_id"] == "urate_fasting_lipids"
+
+class FakeRedis:
+    """Just the hash commands the template counters use"""
+
+    def __init__(self):
+        self.hashes = {}
+
+    def hincrby(self, key, field, amount):
+        fields = self.hashes.setdefault(key, {})
+        fields[field.encode('utf-8')] = fields.get(field.encode('utf-8'), 0) + amount
+
+    def hgetall(self, key):
+        return dict(self.hashes.get(key, {}))
+
+def test_stats_accumulate_across_job_processes():
+    """Test that registries sharing a Redis counter store report cumulative hit rates, as forked jobs do"""
+    redis_conn = FakeRedis()
+    for report in (REPORT, "Glucose: 95 mg/dL"):
+        # A fresh registry per job, like a forked job process that exits afterwards
+        TemplateRegistry.load(counters=RedisTemplateCounters(redis_conn)).parse(report)
+
+    stats = TemplateRegistry.load(counters=RedisTemplateCounters(redis_conn)).stats()
+    assert (stats["lookups"], stats["template_hits"], stats["template_hit_rate"]) == (2, 1, 0.5)
+    assert stats["cached_fingerprints"] == 0
@@ -0,0 +1,42 @@
+from app.layout_lab_parser import LayoutLabParser
+from app.ocr_layout import OCRLayout
+
+def _layout(rows):
+    """One word per entry, rows 40px apart, words in a cell 60px apart"""
+    words, boxes = [], []
+    for row, cells in enumerate(rows):
+        for left, text in cells:
+            for k, word in enumerate(text.split()):
+                words.append(word)
+                boxes.append((left + k * 60, 100 + row * 40, 50, 20))
+    return OCRLayout(words, [0.9] * len(words), boxes, list(range(len(words))), [0] * len(words))
+
+def test_layout_parser_reads_table_columns():
+    """Test that rows under a header are split into test, result, flag, unit and range columns"""
+    layout = _layout([
+        [(0, "Patient: Jane Doe")],
+        [(0, "Test"), (400, "Result"), (600, "Flag"), (700, "Units"), (900, "Reference Range")],
+        [(0, "Urate"), (400, "590"), (600, "HI"), (700, "umol/L"), (900, "230 - 480")],
+        [(0, "Total Cholesterol"), (400, "5.2"), (700, "mmol/L"), (900, "Desired: <5.5")]
+    ])
+    results = LayoutLabParser().parse_layout(layout)
+
+    assert [(r["test_name"], r["value"], r["flag"], r["unit"], r["reference_range"]) for r in results] == [
+        ("urate", 590.0, "HI", "umol/L", "230-480"),
+        ("total_cholesterol", 5.2, "", "mmol/L", "<5.5")
+    ]
+    assert results[0]["classification"] == "HIGH"
+
+def test_layout_parser_without_header():
+    """Test that rows are read by content when the page has no header row"""
+    layout = _layout([
+        [(0, "1"), (100, "Glucose"), (400, "95"), (600, "mg/dL"), (900, "70-99")],
+        [(0, "Triglycerides HI 2.3 mmol/L < 1.7")],
+        [(0, "Collected 10.30")]
+    ])
+    results = LayoutLabParser().parse_layout(layout)
+
+    assert [(r["test_name"], r["value"], r["flag"], r["reference_range"]) for r in results] == [
+        ("glucose", 95.0, "", "70-99"),
+        ("triglycerides", 2.3, "HI", "<1.7")
+    ]
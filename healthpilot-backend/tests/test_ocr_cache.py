@@ -0,0 +1,66 @@
+import os
+from app.ocr_cache import OCRCache
+
+def test_cache_round_trip_and_key(tmp_path):
+    """Test that cached results round-trip and keys depend on file bytes and settings"""
+    cache = OCRCache(backend="local", cache_dir=str(tmp_path / "cache"), max_mb=1)
+    report = tmp_path / "report.pdf"
+    report.write_bytes(b"%PDF-1.4 fake report")
+
+    key = cache.make_key(str(report), {"engine": "tesseract", "dpi": 150})
+    assert key == cache.make_key(str(report), {"dpi": 150, "engine": "tesseract"})
+    assert key != cache.make_key(str(report), {"engine": "tesseract", "dpi": 300})
+
+    assert cache.get(key) is None
+    cache.set(key, {"text": "Glucose 90 mg/dL", "success": True})
+    assert cache.get(key)["text"] == "Glucose 90 mg/dL"
+
+    # Failed OCR results are never cached
+    cache.set("failed", {"text": "", "success": False})
+    assert cache.get("failed") is None
+
+def test_cache_evicts_least_recently_used(tmp_path):
+    """Test that the local backend stays within its size bound"""
+    cache = OCRCache(backend="local", cache_dir=str(tmp_path / "cache"), max_mb=1)
+    text = "x" * (400 * 1024)
+
+    cache.set("first", {"text": text, "success": True})
+    cache.set("second", {"text": text, "success": True})
+    # Explicit mtimes, since coarse filesystem timestamps can't order writes made back to back
+    os.utime(tmp_path / "cache" / "first.json", (1, 1))
+    os.utime(tmp_path / "cache" / "second.json", (2, 2))
+    cache.get("first")  # Touch so "second" becomes the oldest entry
+    cache.set("third", {"text": text, "success": True})
+
+    assert cache.get("first") is not None
+    assert cache.get("second") is None
+    assert cache.get("third") is not None
+    assert len(os.listdir(tmp_path / "cache")) == 2
+
+def test_local_cache_only_scans_when_over_its_bound(tmp_path, monkeypatch):
+    """Test that writes under the size bound don't walk the cache directory"""
+    cache = OCRCache(backend="local", cache_dir=str(tmp_path / "cache"), max_mb=1)
+    scans = []
+    real_scandir = os.scandir
+    monkeypatch.setattr(os, "scandir", lambda path: scans.append(path) or real_scandir(path))
+    text = "x" * (300 * 1024)
+
+    cache.set("first", {"text": text, "success": True})
+    cache.set("second", {"text": text, "success": True})
+    cache.set("first", {"text": text, "success": True})  # Overwrite doesn't grow the cache
+    assert scans == []
+
+    cache.set("third", {"text": text, "success": True})
+    cache.set("fourth", {"text": text, "success": True})
+    assert len(scans) == 1
+    assert len(os.listdir(tmp_path / "cache")) == 3
+
+def test_cache_hit_survives_concurrent_eviction(tmp_path, monkeypatch):
+    """Test that an entry evicted between the read and the LRU touch is still returned"""
+    cache = OCRCache(backend="local", cache_dir=str(tmp_path / "cache"), max_mb=1)
+    cache.set("report", {"text": "Glucose 90 mg/dL", "success": True})
+
+    def evicted(path, times=None):
+        raise FileNotFoundError(path)
+    monkeypatch.setattr(os, "utime", evicted)
+    assert cache.get("report")["text"] == "Glucose 90 mg/dL"
@@ -0,0 +1,23 @@
+from PIL import Image, ImageDraw
+from app.page_screening import PageScreener
+
+def _page(lines):
+    image = Image.new("RGB", (1275, 1650), "white")
+    draw = ImageDraw.Draw(image)
+    for i, line in enumerate(lines):
+        draw.text((100, 100 + 30 * i), line, fill="black")
+    return image
+
+def test_screener_skips_blank_and_repeated_pages():
+    """Test that blank pages and exact repeats are skipped but same-layout pages with new values are not"""
+    rows = [f"Test {i}   {i * 3.1:.1f} mg/dL   1.0-5.0" for i in range(30)]
+    changed = list(rows)
+    changed[10] = "Test 10   99.9 mg/dL   1.0-5.0"
+    pages = [(1, _page(rows)), (2, _page([])), (3, _page(rows)), (4, _page(changed))]
+
+    skipped = {}
+    kept = [page_number for page_number, _ in PageScreener().filter(iter(pages), skipped)]
+
+    assert kept == [1, 4]
+    assert skipped[2]["reason"] == "blank"
+    assert skipped[3] == {"reason": "duplicate", "duplicate_of": 1}
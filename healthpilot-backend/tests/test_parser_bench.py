@@ -0,0 +1,15 @@
+from benchmarks.synthetic_reports import ReportSpec, generate_reports
+from benchmarks.parser_bench import diff
+
+def test_synthetic_reports_are_deterministic():
+    """Test that a seed reproduces the same reports and every report prints the requested analytes"""
+    spec = ReportSpec(analytes=5, noise=1.0, ocr_error_rate=0.1, pages=2, layout="inline")
+    first = generate_reports(spec, 3, seed=7)
+    assert [r.text for r in first] == [r.text for r in generate_reports(spec, 3, seed=7)]
+    assert all(len(r.expected) == 5 and r.text.count("--- Page") == 2 for r in first)
+
+def test_diff_flags_regressions():
+    """Test that lower throughput or recall and higher memory count as regressions, improvements don't"""
+    baseline = {"results": {"inline": {"LabParser": {"lines_per_sec": 1000, "peak_memory_kb": 10, "recall": 0.5}}}}
+    current = {"results": {"inline": {"LabParser": {"lines_per_sec": 800, "peak_memory_kb": 12, "recall": 0.9}}}}
+    assert diff(baseline, current, threshold=0.1) == 2
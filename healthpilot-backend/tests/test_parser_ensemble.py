@@ -0,0 +1,66 @@
+import threading
+import time
+from app.lab_result import LabResult
+from app.parser_ensemble import ParserEnsemble
+
+class _FixedParser:
+    def __init__(self, results, wait=None):
+        self.results = results
+        self.wait = wait
+
+    def parse_records(self, text):
+        if self.wait:
+            self.wait.wait(5)
+        return [LabResult(name, name, value, unit, flag) for name, value, unit, flag in self.results]
+
+def test_ensemble_votes_and_stops_once_required_tests_agree():
+    """Test that the weighted majority value wins, agreeing parsers are listed and a slow parser isn't waited for"""
+    release = threading.Event()
+    ensemble = ParserEnsemble(
+        parsers={
+            "a": _FixedParser([("glucose", 95.0, "mg/dL", ""), ("hdl", 0.95, "", "LO")]),
+            "b": _FixedParser([("glucose", 95.0, "", ""), ("hdl", 9.5, "mmol/L", "")]),
+            "slow": _FixedParser([("glucose", 59.0, "mg/dL", "")], wait=release)
+        },
+        weights={"a": 1.0, "b": 1.0, "slow": 1.0},
+        required_tests=["glucose"],
+        min_agreement=2
+    )
+    try:
+        results = ensemble.parse_lab_results("report")
+    finally:
+        release.set()
+
+    glucose, hdl = results
+    assert (glucose["value"], glucose["unit"], glucose["agreed_parsers"], glucose["confidence"]) == (95.0, "mg/dL", ["a", "b"], 1.0)
+    # One vote each: the tie goes to the parser listed first
+    assert (hdl["value"], hdl["flag"], hdl["classification"], hdl["agreed_parsers"]) == (0.95, "LO", "LOW", ["a"])
+
+def test_skipped_slow_parser_does_not_delay_the_next_parse():
+    """Test that once required tests agree, a slow low-weight parser isn't left running into the next parse"""
+    release = threading.Event()
+    slow = _FixedParser([("glucose", 59.0, "mg/dL", "")], wait=release)
+    ensemble = ParserEnsemble(
+        parsers={
+            "slow": slow,
+            "a": _FixedParser([("glucose", 95.0, "mg/dL", "")]),
+            "b": _FixedParser([("glucose", 95.0, "mg/dL", "")])
+        },
+        weights={"slow": 0.5, "a": 1.0, "b": 1.0},
+        required_tests=["glucose"],
+        min_agreement=2
+    )
+    calls = []
+    slow_parse = slow.parse_records
+    slow.parse_records = lambda text: calls.append(text) or slow_parse(text)
+    try:
+        start = time.perf_counter()
+        first = ensemble.parse_records("report 1")
+        second = ensemble.parse_records("report 2")
+        elapsed = time.perf_counter() - start
+    finally:
+        release.set()
+
+    assert elapsed < 1.0
+    assert calls == []
+    assert [r.value for r in first] == [r.value for r in second] == [95.0]
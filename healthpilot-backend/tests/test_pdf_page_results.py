@@ -0,0 +1,59 @@
+import multiprocessing
+import numpy as np
+from PIL import Image
+from app.pdf_page_results import PDFPagePipeline
+
+def _ocr_page(image, preprocessor=None):
+    """Page worker standing in for an OCR engine: reports how dark the page is"""
+    ink = int((np.asarray(image.convert('L')) < 128).sum())
+    return {"text": f"ink {ink}", "confidence_scores": [0.9], "average_confidence": 0.9, "success": True}
+
+class FakeRasterizer:
+    dpi = 150
+
+    def get_page_count(self, pdf_path):
+        return 3
+
+    def iter_pages(self, pdf_path, pages=None, dpi=None):
+        for page_number in pages:
+            pixels = np.full((60, 60), 255, dtype=np.uint8)
+            pixels[10:10 + page_number * 5, 10:50] = 0
+            yield page_number, Image.fromarray(pixels)
+
+class FakeEngine(PDFPagePipeline):
+    page_worker = staticmethod(_ocr_page)
+
+    def __init__(self):
+        self._init_page_pipeline(parallel_pages=True, max_workers=2)
+        self.use_text_layer = False
+        self.skip_blank_pages = self.skip_duplicate_pages = False
+        self.rasterizer = FakeRasterizer()
+
+    def extract_text_from_image_data(self, image, preprocess=None):
+        return _ocr_page(image)
+
+def test_forked_worker_shuts_the_page_pool_down_after_each_pdf(monkeypatch):
+    """Test that under forking workers every PDF gets its own pool and no pool process outlives it"""
+    monkeypatch.setenv("WORKER_FORK", "true")
+    engine = FakeEngine()
+
+    result = engine.extract_text_from_pdf("report.pdf")
+    assert result["success"]
+    assert result["text"] == "--- Page 1 ---\nink 200\n\n--- Page 2 ---\nink 400\n\n--- Page 3 ---\nink 600"
+    assert engine._pool is None
+    assert multiprocessing.active_children() == []
+
+def test_in_process_worker_keeps_the_page_pool_warm(monkeypatch):
+    """Test that with WORKER_FORK=false the pool is reused across PDFs until the service is closed"""
+    monkeypatch.setenv("WORKER_FORK", "false")
+    engine = FakeEngine()
+
+    engine.extract_text_from_pdf("first.pdf")
+    pool = engine._pool
+    assert pool is not None
+    engine.extract_text_from_pdf("second.pdf")
+    assert engine._pool is pool
+
+    engine.close()
+    assert engine._pool is None
+    assert multiprocessing.active_children() == []
@@ -0,0 +1,144 @@
+import json
+from argparse import Namespace
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+from app import reanalysis
+
+class FakeQuery:
+    """Just enough of the Supabase query builder for the re-analysis command"""
+    def __init__(self, db, table):
+        self.db, self.table, self.filters, self.limit_to = db, table, [], None
+
+    def select(self, columns):
+        self.db.selects += 1
+        return self
+
+    def eq(self, column, value):
+        self.filters.append(lambda row: row.get(column) == value)
+        return self
+
+    def gt(self, column, value):
+        self.filters.append(lambda row: row[column] > value)
+        return self
+
+    def in_(self, column, values):
+        self.filters.append(lambda row: row[column] in values)
+        return self
+
+    def order(self, column):
+        return self
+
+    def limit(self, count):
+        self.limit_to = count
+        return self
+
+    def upsert(self, rows):
+        self.db.upserts.setdefault(self.table, []).extend(rows)
+        return self
+
+    def execute(self):
+        rows = sorted((row for row in self.db.tables.get(self.table, []) if all(f(row) for f in self.filters)), key=lambda row: row["id"])
+        return Namespace(data=rows[:self.limit_to])
+
+class FakeDB:
+    def __init__(self, analyses):
+        self.tables = {"analyses": analyses}
+        self.selects = 0
+        self.upserts = {}
+        self.supabase = self
+
+    def table(self, name):
+        return FakeQuery(self, name)
+
+def make_rows(count):
+    return [
+        {"id": f"a{i:03d}", "report_id": f"r{i:03d}", "status": "completed", "analysis_result": {"version": 1},
+         "reports": {"id": f"r{i:03d}", "profile_id": "p", "file_path": "f", "original_filename": "o"}}
+        for i in range(count)
+    ]
+
+@pytest.fixture
+def fake_run(monkeypatch, tmp_path):
+    """run() against a fake database, with threads instead of processes and a stub re-analysis"""
+    failing = set()
+
+    def reanalyze(row, reparse=False):
+        if row["id"] in failing:
+            raise ValueError("bad row")
+        return {"version": 2}
+
+    monkeypatch.setattr(reanalysis, "reanalyze", reanalyze)
+    monkeypatch.setattr(reanalysis, "ProcessPoolExecutor", ThreadPoolExecutor)
+    monkeypatch.setattr(reanalysis, "_init_worker", lambda: None)
+
+    def run(db, **overrides):
+        monkeypatch.setattr(reanalysis.registry, "get_db_service", lambda: db)
+        args = dict(workers=2, page_size=10, batch_size=4, checkpoint=str(tmp_path / "checkpoint.json"),
+                    reparse=False, limit=None, dry_run=False, retry_failed=False)
+        args.update(overrides)
+        return reanalysis.run(Namespace(**args))
+
+    run.failing = failing
+    run.checkpoint = tmp_path / "checkpoint.json"
+    return run
+
+def test_iter_pages_walks_ids_in_keyset_pages():
+    """Test that pages follow on from the previous page's last id and a short page ends the walk"""
+    db = FakeDB(make_rows(25) + [{"id": "a999", "status": "processing"}])
+    pages = list(reanalysis.iter_pages(db, 10, None))
+    assert [len(page) for page in pages] == [10, 10, 5]
+    assert [row["id"] for page in pages for row in page] == [f"a{i:03d}" for i in range(25)]
+    assert db.selects == 3
+
+    # A full last page needs one more (empty) query to know it was the last
+    db = FakeDB(make_rows(20))
+    assert [len(page) for page in reanalysis.iter_pages(db, 10, "a004")] == [10, 5]
+    db = FakeDB(make_rows(20))
+    assert [len(page) for page in reanalysis.iter_pages(db, 10, None)] == [10, 10]
+    assert db.selects == 3
+
+def test_run_resumes_from_checkpoint(fake_run):
+    """Test that a limited run stops after --limit analyses and the next run picks up after them"""
+    db = FakeDB(make_rows(25))
+    state = fake_run(db, limit=12)
+    assert (state["last_id"], state["processed"], state["updated"]) == ("a011", 12, 12)
+    assert json.loads(fake_run.checkpoint.read_text())["last_id"] == "a011"
+
+    state = fake_run(db)
+    assert (state["last_id"], state["processed"], state["updated"]) == ("a024", 25, 25)
+    assert sorted(row["id"] for row in db.upserts["analyses"]) == [f"a{i:03d}" for i in range(25)]
+    assert len(db.upserts["reports"]) == 25
+
+def test_dry_run_writes_nothing(fake_run):
+    """Test that a dry run counts changes but neither upserts nor saves the checkpoint"""
+    db = FakeDB(make_rows(25))
+    state = fake_run(db, dry_run=True)
+    assert (state["processed"], state["updated"]) == (25, 25)
+    assert db.upserts == {}
+    assert not fake_run.checkpoint.exists()
+
+def test_failed_ids_are_recorded_and_retried(fake_run):
+    """Test that failing rows are listed in the checkpoint and --retry-failed clears the ones that now succeed"""
+    db = FakeDB(make_rows(25))
+    fake_run.failing.update({"a003", "a017"})
+    state = fake_run(db)
+    assert (state["last_id"], state["updated"], state["failed_ids"]) == ("a024", 23, ["a003", "a017"])
+
+    fake_run.failing.discard("a003")
+    state = fake_run(db, retry_failed=True)
+    assert (state["last_id"], state["updated"], state["failed_ids"]) == ("a024", 24, ["a017"])
+    assert json.loads(fake_run.checkpoint.read_text())["failed_ids"] == ["a017"]
+
+def test_restore_result_keeps_only_flag_classifications():
+    """Test that flag-classifying parsers keep their flag's classification and range-classified results are reset"""
+    stored = {"test_name": "glucose", "original_name": "Glucose", "value": 130.0, "unit": "mg/dL", "flag": "HI",
+              "classification": "CRITICAL_HIGH", "status": "Above normal range", "interpretation": "Elevated"}
+
+    for parser in ("layout", "ensemble", "template:urate_fasting_lipids"):
+        result = reanalysis._restore_result(stored, parser)
+        assert (result.classification, result.status, result.interpretation) == ("HIGH", None, None)
+    assert reanalysis._restore_result({**stored, "flag": ""}, "layout").classification == "UNKNOWN"
+
+    for parser in ("lab", None):
+        result = reanalysis._restore_result(stored, parser)
+        assert (result.classification, result.status, result.interpretation) == (None, None, None)
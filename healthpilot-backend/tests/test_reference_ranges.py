@@ -0,0 +1,39 @@
+from app.reference_ranges import ReferenceRanges
+
+def test_classify_batch_matches_classify_value():
+    """Test that the batch API converts and classifies like one classify_value call per value"""
+    ranges = ReferenceRanges()
+    rows = [
+        ("glucose", 95, "mg/dL", None),
+        ("glucose", 9.0, "mmol/L", None),
+        ("Hemoglobin", 11.0, "g/dL", "Female"),
+        ("hemoglobin", 5.0, "g/dL", None),
+        ("ldl", 400, "mg/dL", "male"),
+        ("not_a_test", 1.0, "", None),
+    ]
+    names, values, units, sexes = zip(*rows)
+    batch = ranges.classify_batch(names, values, units, sexes=sexes)
+
+    for i, (name, value, unit, sex) in enumerate(rows):
+        single = ranges.classify_value(name, value, unit, sex=sex)
+        assert batch["classification"][i] == single["classification"]
+        assert batch["unit"][i] == single.get("unit")
+        if "value" in single:
+            assert batch["value"][i] == single["value"]
+    assert list(batch["classification"][[0, 3, 5]]) == ["NORMAL", "CRITICAL_LOW", "UNKNOWN"]
+
+def test_age_bands_and_pregnancy():
+    """Test that age and pregnancy select their bands in both the single and batch paths"""
+    ranges = ReferenceRanges()
+    assert ranges.get_range("creatinine", age=8).high == 0.7
+    assert ranges.get_range("creatinine", age=15).high == 1.0
+    assert ranges.get_range("creatinine").high == 1.3
+    assert ranges.get_range("tsh", age=75).high == 6.0
+    assert ranges.get_range("hemoglobin", age=30, sex="female", pregnant=True).low == 11.0
+
+    # 0.9 mg/dL creatinine is high for a child, normal for an adult
+    assert ranges.classify_value("creatinine", 0.9, "mg/dL", age=8)["classification"] == "HIGH"
+    batch = ranges.classify_batch(["creatinine"] * 3 + ["hemoglobin"] * 2, [0.9, 0.9, 0.9, 11.5, 11.5],
+                                  ["mg/dL"] * 3 + ["g/dL"] * 2, ages=[8, 15, None, 30, 30],
+                                  sexes=[None, None, None, "female", "female"], pregnant=[False, False, False, False, True])
+    assert list(batch["classification"]) == ["HIGH", "NORMAL", "NORMAL", "LOW", "NORMAL"]
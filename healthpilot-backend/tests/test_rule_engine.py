@@ -0,0 +1,44 @@
+import json
+import os
+from app.lab_result import LabResult
+from app.rule_engine import RuleEngine, RULES_PATH
+
+def _result(test_name, classification):
+    return LabResult(test_name, test_name, 1.0, classification=classification)
+
+def test_default_rules_assess_lipid_report():
+    """Test that first-result and counting facts, groups and risk levels combine as the analysis expects"""
+    engine = RuleEngine.load()
+    report = engine.evaluate([
+        _result("hdl", "LOW"), _result("ldl", "HIGH"), _result("hdl", "NORMAL"), _result("glucose", "NORMAL")
+    ], age=52)
+
+    assert report["risk_assessment"]["risk_level"] == "HIGH"
+    assert report["risk_assessment"]["risk_factors"] == [
+        "Elevated LDL cholesterol", "Low HDL cholesterol", "Age-related cardiovascular risk"
+    ]
+    assert [w["type"] for w in report["early_warnings"]] == ["CARDIOVASCULAR"]
+    assert report["summary"].startswith("📊 Your lab results show 2 values")
+    # Only the first matching rule of a group applies
+    assert "As we get older, it's important to have regular health checkups." in report["recommendations"]
+    assert not any("establish regular health checkups" in r for r in report["recommendations"])
+
+def test_rules_hot_reload(tmp_path):
+    """Test that an edited rules file is picked up and a broken one keeps the previous rules"""
+    with open(RULES_PATH, "r", encoding="utf-8") as f:
+        rules = json.load(f)
+    path = tmp_path / "rules.json"
+    path.write_text(json.dumps(rules), encoding="utf-8")
+    engine = RuleEngine.load(str(path))
+
+    rules["early_warnings"].append({"id": "low_glucose", "when": {"low_glucose": {"min": 1}}, "warning": {"type": "GLUCOSE"}})
+    rules["facts"]["low_glucose"] = {"analytes": ["glucose"], "classifications": ["LOW"]}
+    path.write_text(json.dumps(rules), encoding="utf-8")
+    os.utime(path, (1, 1))
+    assert engine.reload_if_changed()
+    assert engine.evaluate([_result("glucose", "LOW")])["early_warnings"] == [{"type": "GLUCOSE"}]
+
+    path.write_text('{"version": "broken"}', encoding="utf-8")
+    os.utime(path, (2, 2))
+    assert not engine.reload_if_changed()
+    assert engine.evaluate([_result("glucose", "LOW")])["early_warnings"] == [{"type": "GLUCOSE"}]
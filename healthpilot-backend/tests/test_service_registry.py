@@ -0,0 +1,20 @@
+from app.service_registry import ServiceRegistry
+
+class FakeService:
+    closed = False
+
+    def close(self):
+        self.closed = True
+
+def test_recycling_applies_only_to_in_process_jobs():
+    """Test that services are recycled after the job limit in-process, and recycling is off for forked jobs"""
+    registry = ServiceRegistry(recycle_after=2, forked_jobs=False)
+    registry.factories["fake"] = FakeService
+    service = registry.get("fake")
+
+    registry.record_job()
+    assert registry.get("fake") is service
+    registry.record_job()
+    assert service.closed and registry.get("fake") is not service
+
+    assert ServiceRegistry(recycle_after=2, forked_jobs=True).recycle_after == 0
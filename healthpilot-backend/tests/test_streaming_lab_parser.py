@@ -0,0 +1,19 @@
+from app.intelligent_lab_parser import IntelligentLabParser
+from app.streaming_lab_parser import StreamingLabParser
+
+def test_streaming_matches_batch_and_spans_page_breaks():
+    """Test that a value after a page break is found, results arrive before the end and match a batch parse"""
+    pages = [
+        (1, "Patient: Jane Doe\nGlucose"),
+        (2, "95\nmg/dL\n70-99\n" + "Note\n" * 15 + "Hemoglobin\nLO 11.2\ng/dL"),
+    ]
+    parser = StreamingLabParser()
+
+    assert parser.feed_page(*pages[0]) == []
+    early = parser.feed_page(*pages[1])
+    assert [(r.test_name, r.value) for r in early] == [("glucose", 95.0)]
+    late = parser.finalize()
+    assert [(r.test_name, r.value, r.flag) for r in late] == [("hemoglobin", 11.2, "LO")]
+
+    text = "\n\n".join(f"--- Page {n} ---\n{t}" for n, t in pages)
+    assert early + late == IntelligentLabParser().parse_records(text)
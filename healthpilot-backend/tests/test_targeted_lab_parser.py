@@ -0,0 +1,21 @@
+from app.targeted_lab_parser import TargetedLabParser
+
+REPORT = """CITY PATHOLOGY
+Urate HI 590 230-480 umol/L
+Triglyceride HI 1.98 FASTING
+Cholesterol HI 5.20
+Desired: <4.40
+HDL Cholesterol LO 0.95 Desired: >1.20
+LDL Cholesterol HI 3.43
+Non HDL Cholesterol
+HI 4.25 Desired: <3.10
+"""
+
+def test_each_value_is_read_from_its_own_named_row():
+    """Test that every target is found by its catalog name, including a value on the following line"""
+    results = TargetedLabParser().parse_records(REPORT)
+
+    assert [(r.test_name, r.value, r.flag, r.reference_range) for r in results] == [
+        ("urate", 590.0, "HI", "230-480"), ("triglycerides", 1.98, "HI", ""), ("total_cholesterol", 5.2, "HI", ""),
+        ("hdl", 0.95, "LO", ""), ("ldl", 3.43, "HI", ""), ("non_hdl_cholesterol", 4.25, "HI", "")
+    ]
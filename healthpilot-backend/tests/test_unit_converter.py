@@ -0,0 +1,25 @@
+import numpy as np
+from app.unit_converter import UnitConverter
+from app.reference_ranges import ReferenceRanges
+
+def test_conversions_are_analyte_specific():
+    """Test that mmol/L converts with each analyte's own factor and unit spellings are normalized"""
+    converter = UnitConverter()
+    assert converter.convert("glucose", 5.0, "mmol/L") == 90.0
+    assert round(converter.convert("total_cholesterol", 5.2, "mmol/L"), 1) == 201.1
+    assert round(converter.convert("glucose", 90.0, "mg/dL", "mmol/L"), 2) == 5.0
+    assert converter.convert("platelets", 250, "x10*9/L") == 250
+    assert round(converter.convert("creatinine", 88.4, "µmol/L"), 2) == 1.0
+    # No known conversion leaves the value alone
+    assert converter.factor("alt", "mmol/L", "U/L") is None
+    assert converter.convert("alt", 30, "mmol/L") == 30
+
+    values = converter.convert_many(["ldl", "triglycerides", "unknown"], [2.0, 1.0, 7.0], ["mmol/L", "mmol/L", "mg/dL"])
+    assert np.allclose(values, [77.34, 88.57, 7.0])
+
+def test_reference_ranges_classify_mmol_cholesterol():
+    """Test that cholesterol reported in mmol/L is converted before classification"""
+    result = ReferenceRanges().classify_value("total_cholesterol", 6.5, "mmol/L")
+    assert result["unit"] == "mg/dL"
+    assert round(result["value"]) == 251
+    assert result["classification"] == "HIGH"